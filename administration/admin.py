@@ -2,6 +2,7 @@ from django.contrib import admin
 from django.contrib.admin.models import LogEntry
 from django.contrib.auth.models import Permission
 from administration.models import ProxySuggestion, ProxyInappropriate, ProxyFaqSection, ProxyTos, ProxyFaq, ProxyText
+from api.utils import content_cache
 
 
 class SuggestionAdmin(admin.ModelAdmin):
@@ -23,23 +24,49 @@ class InappropriateAdmin(admin.ModelAdmin):
     user_link.allow_tags = True
 
 
-class FaqSectionAdmin(admin.ModelAdmin):
+class ContentCacheAdmin(admin.ModelAdmin):
+    """
+    Invalidates the cached responses of cache_namespace (api.utils.content_cache) once the changes are
+    committed: the invalidation sent on save (core.signals.content_cache) happens within the transaction
+    of the view, and a concurrent request may have cached the former content again since.
+    """
+    cache_namespace = None
+
+    def changeform_view(self, request, *args, **kwargs):
+        return self.invalidate_after(request, super().changeform_view(request, *args, **kwargs))
+
+    def delete_view(self, request, *args, **kwargs):
+        return self.invalidate_after(request, super().delete_view(request, *args, **kwargs))
+
+    def changelist_view(self, request, *args, **kwargs):
+        return self.invalidate_after(request, super().changelist_view(request, *args, **kwargs))
+
+    def invalidate_after(self, request, response):
+        if request.method == 'POST':
+            content_cache.invalidate(self.cache_namespace)
+        return response
+
+
+class FaqSectionAdmin(ContentCacheAdmin):
     list_display = ['id', 'title']
+    cache_namespace = 'faq'
 
 
-class FaqAdmin(admin.ModelAdmin):
+class FaqAdmin(ContentCacheAdmin):
     list_display = ['id', 'section_link', 'question', 'private']
     list_filter = ['section', 'private']
     search_fields = ['question', 'answer']
+    cache_namespace = 'faq'
 
     def section_link(self, item):
         return '<a href="../../administration/proxyfaqsection/%d/">%s</a>' % (item.section.id, str(item.section))
     section_link.allow_tags = True
 
-class TextAdmin(admin.ModelAdmin):
+class TextAdmin(ContentCacheAdmin):
     list_display = ['id', 'tag', 'last_update']
     list_filter = ['private']
     search_fields = ['tag', 'content']
+    cache_namespace = 'text'
 
 
 admin.site.register(LogEntry)
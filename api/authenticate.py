@@ -1,13 +1,130 @@
-from rest_framework_jwt.authentication import JSONWebTokenAuthentication
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+import jwt
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from rest_framework_jwt.authentication import JSONWebTokenAuthentication, jwt_decode_handler
+from rest_framework_jwt.settings import api_settings
+from rest_framework.authentication import get_authorization_header
+from rest_framework.compat import smart_text
 from rest_framework.response import Response
 from rest_framework import exceptions
 from rest_framework import status
 
+from core.db_router import use_primary
+
+
+class UserCache():
+    """
+    Thread safe LRU of authenticated users, keyed by token.
+    An entry expires after 'ttl' seconds, or with its token if sooner.
+    Each call to get returns its own copy of the user.
+    """
+
+    def __init__(self, size, ttl):
+        self.size = size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token):
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            user, expires = entry
+            if expires <= time.time():
+                del self._entries[token]
+                return None
+            self._entries.move_to_end(token)
+            return copy.copy(user)
+
+    def set(self, token, user, token_expires=None):
+        expires = time.time() + self.ttl
+        if token_expires is not None:
+            expires = min(expires, token_expires)
+        with self._lock:
+            self._entries[token] = (copy.copy(user), expires)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def discard_user(self, user_id):
+        with self._lock:
+            for token in [token for token, (user, _) in self._entries.items() if user.pk == user_id]:
+                del self._entries[token]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+user_cache = UserCache(getattr(settings, 'JWT_USER_CACHE_SIZE', 1000),
+                       getattr(settings, 'JWT_USER_CACHE_TTL', 0))
+
+
+@receiver([post_save, post_delete], sender=get_user_model())
+def discard_cached_user(sender, instance, **kwargs):
+    user_cache.discard_user(instance.pk)
+
+
+class CachedJSONWebTokenAuthentication(JSONWebTokenAuthentication):
+    """
+    JSONWebTokenAuthentication decoding the token once per request.
+    The outcome is kept on the request, so that DRF authentication and every
+    AuthUser call of the permission classes share it.
+    When JWT_USER_CACHE_TTL is set, users are also kept across requests in 'user_cache'.
+    """
+
+    def authenticate(self, request):
+        http_request = getattr(request, '_request', request)
+        if not hasattr(http_request, '_jwt_auth'):
+            try:
+                http_request._jwt_auth = self.authenticate_token(request)
+            except exceptions.AuthenticationFailed as ex:
+                http_request._jwt_auth = ex
+        if isinstance(http_request._jwt_auth, exceptions.AuthenticationFailed):
+            raise http_request._jwt_auth
+        return http_request._jwt_auth
+
+    def authenticate_token(self, request):
+        auth = get_authorization_header(request).split()
+        auth_header_prefix = api_settings.JWT_AUTH_HEADER_PREFIX.lower()
+
+        if not auth or smart_text(auth[0].lower()) != auth_header_prefix:
+            return None
+        if len(auth) != 2:
+            # Let the parent raise the matching error
+            return super().authenticate(request)
+
+        token = auth[1]
+        if user_cache.ttl:
+            user = user_cache.get(token)
+            if user is not None:
+                return user, token
+        try:
+            payload = jwt_decode_handler(token)
+        except jwt.ExpiredSignature:
+            raise exceptions.AuthenticationFailed('Signature has expired.')
+        except jwt.DecodeError:
+            raise exceptions.AuthenticationFailed('Error decoding signature.')
+        # An activation or a deactivation must be seen at once
+        with use_primary():
+            user = self.authenticate_credentials(payload)
+        if user_cache.ttl:
+            user_cache.set(token, user, payload.get('exp'))
+        return user, token
+
 
 class AuthUser:
     def authenticate(self, request):
         try:
-            auth_data = JSONWebTokenAuthentication().authenticate(request)
+            auth_data = CachedJSONWebTokenAuthentication().authenticate(request)
             if not auth_data:
                 msg = {"detail": "Missing credentials"}
                 raise exceptions.AuthenticationFailed(msg)
@@ -1,8 +1,7 @@
-from django.db.models import Q
 from rest_framework.permissions import BasePermission
 
 from api.authenticate import AuthUser
-from core.models import Member
+from api.utils.memberships import get_memberships
 
 
 # Includes permissions for community and member objects
@@ -17,12 +16,7 @@ class IsCommunityOwner(BasePermission):
         user, response = AuthUser().authenticate(request)
         if not user:
             return False
-        elif Member.objects.filter(
-                user=user.id,
-                community=obj.id,
-                status="1",
-                role="0"
-        ).exists():
+        elif get_memberships(request, user).is_owner(obj.id):
             return True
         else:
             return False
@@ -36,12 +30,7 @@ class IsCommunityModerator(BasePermission):
         user, response = AuthUser().authenticate(request)
         if not user:
             return False
-        elif Member.objects.filter(
-                Q(user=user.id),
-                Q(community=obj.id),
-                Q(status="1"),
-                Q(role="1") | Q(role="0")
-        ).exists():
+        elif get_memberships(request, user).is_moderator(obj.id):
             return True
         else:
             return False
@@ -78,12 +67,8 @@ class IsMemberManager(BasePermission):
         user, response = AuthUser().authenticate(request)
         if not user:
             return False
-        elif Member.objects.filter(
-                user=user.id,
-                community=obj.community,
-                status="1",
-                role="1"
-        ).exists() and obj.role == "2":
+        memberships = get_memberships(request, user)
+        if memberships.get(obj.community_id) == ("1", "1") and obj.role == "2":
             data = request.DATA
             if 'role' in data:
                 if data['role'] == "2":
@@ -92,12 +77,7 @@ class IsMemberManager(BasePermission):
                     return False
             else:
                 return True
-        elif Member.objects.filter(
-                user=user.id,
-                community=obj.community,
-                status="1",
-                role="0"
-        ).exists():
+        elif memberships.is_owner(obj.community_id):
             return True
         else:
             return False
\ No newline at end of file
@@ -1,7 +1,8 @@
 from rest_framework.permissions import BasePermission
 
 from api.authenticate import AuthUser
-from core.models import Offer, MeetingPoint, Member, Meeting
+from api.utils.memberships import get_memberships
+from core.models import Offer, MeetingPoint, Meeting
 
 
 class IsConcernedByMeeting(BasePermission):
@@ -28,7 +29,7 @@ class IsConcernedByMeeting(BasePermission):
         if not MeetingPoint.objects.filter(id=data['meeting_point']).exists():
             return False
         mp = MeetingPoint.objects.get(id=data['meeting_point'])
-        if not Member.objects.filter(user=user, community=mp.location.community, status='1').exists():
+        if not get_memberships(request, user).is_member(mp.location.community_id):
             return False
         return True
 
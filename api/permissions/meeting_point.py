@@ -1,7 +1,7 @@
-from django.db.models import Q
 from rest_framework.permissions import BasePermission
 from api.authenticate import AuthUser
-from core.models import Location, Member
+from api.utils.memberships import get_memberships
+from core.models import Location
 
 
 class IsCommunityMember(BasePermission):
@@ -18,7 +18,7 @@ class IsCommunityMember(BasePermission):
         if not Location.objects.filter(id=data['location']).exists():
             return False
         loc = Location.objects.get(id=data['location'])
-        if not Member.objects.filter(user=user, community=loc.community, status='1').exists():
+        if not get_memberships(request, user).is_member(loc.community_id):
             return False
         return True
 
@@ -26,7 +26,7 @@ class IsCommunityMember(BasePermission):
         user, response = AuthUser().authenticate(request)
         if not user:
             return False
-        if not Member.objects.filter(user=user, community=obj.location.community, status='1').exists():
+        if not get_memberships(request, user).is_member(obj.location.community_id):
             return False
         return True
 
@@ -39,9 +39,6 @@ class IsCommunityModerator(BasePermission):
         user, response = AuthUser().authenticate(request)
         if not user:
             return False
-        if not Member.objects.filter(Q(user=user),
-                                     Q(community=obj.location.community),
-                                     Q(status='1'),
-                                     Q(role='0') | Q(role='1')).exists():
+        if not get_memberships(request, user).is_moderator(obj.location.community_id):
             return False
         return True
\ No newline at end of file
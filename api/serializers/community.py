@@ -1,4 +1,6 @@
 from rest_framework import serializers
+from api.serializers.media_variants import MediaVariantsField
+from api.utils.thumbnails import AVATAR_VARIANTS, BANNER_VARIANTS
 
 from core.models import Community, LocalCommunity, TransportCommunity
 
@@ -7,9 +9,13 @@ class AbstractCommunitySerializer(serializers.ModelSerializer):
 
     members_count = serializers.IntegerField(source='get_members_count', read_only=True)
 
+    banner_variants = MediaVariantsField(BANNER_VARIANTS, source='banner')
+
+    logo_variants = MediaVariantsField(AVATAR_VARIANTS, source='logo')
+
     class Meta:
         model = Community
-        read_only_fields = ('creation_date', 'last_update')
+        read_only_fields = ('creation_date', 'last_update', 'accepted_members_count', 'pending_members_count')
         abstract = True
 
 
@@ -19,24 +25,36 @@ class CommunitySerializer(serializers.ModelSerializer):
 
     members_count = serializers.IntegerField(source='get_members_count', read_only=True)
 
+    banner_variants = MediaVariantsField(BANNER_VARIANTS, source='banner')
+
+    logo_variants = MediaVariantsField(AVATAR_VARIANTS, source='logo')
+
     class Meta:
         model = Community
-        read_only_fields = ('creation_date', 'last_update')
+        read_only_fields = ('creation_date', 'last_update', 'accepted_members_count', 'pending_members_count')
 
 
 class LocalCommunitySerializer(serializers.ModelSerializer):
 
     members_count = serializers.IntegerField(source='get_members_count', read_only=True)
 
+    banner_variants = MediaVariantsField(BANNER_VARIANTS, source='banner')
+
+    logo_variants = MediaVariantsField(AVATAR_VARIANTS, source='logo')
+
     class Meta:
         model = LocalCommunity
-        read_only_fields = ('creation_date', 'last_update')
+        read_only_fields = ('creation_date', 'last_update', 'accepted_members_count', 'pending_members_count')
 
 
 class TransportCommunitySerializer(serializers.ModelSerializer):
 
     members_count = serializers.IntegerField(source='get_members_count', read_only=True)
 
+    banner_variants = MediaVariantsField(BANNER_VARIANTS, source='banner')
+
+    logo_variants = MediaVariantsField(AVATAR_VARIANTS, source='logo')
+
     class Meta:
         model = TransportCommunity
-        read_only_fields = ('creation_date', 'last_update')
+        read_only_fields = ('creation_date', 'last_update', 'accepted_members_count', 'pending_members_count')
@@ -0,0 +1,16 @@
+from rest_framework import serializers
+from api.utils.thumbnails import variant_paths
+
+
+class MediaVariantsField(serializers.Field):
+    """
+    Read only {variant: media path} of an image field, or of a media path.
+    Paths are relative to the media endpoint, as the image fields.
+    """
+
+    def __init__(self, variants, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.variants = variants
+
+    def to_native(self, value):
+        return variant_paths(getattr(value, 'name', value), self.variants)
@@ -1,15 +1,21 @@
 from rest_framework import serializers
+from api.serializers.media_variants import MediaVariantsField
+from api.utils.thumbnails import BANNER_VARIANTS
 from core.models import MeetingPoint
 
 
 class MeetingPointCreateSerializer(serializers.ModelSerializer):
 
+    photo_variants = MediaVariantsField(BANNER_VARIANTS, source='photo')
+
     class Meta:
         model = MeetingPoint
 
 
 class MeetingPointSerializer(serializers.ModelSerializer):
 
+    photo_variants = MediaVariantsField(BANNER_VARIANTS, source='photo')
+
     class Meta:
         model = MeetingPoint
         read_only_fields = ('location', )
@@ -1,10 +1,14 @@
 from rest_framework import serializers
+from api.serializers.media_variants import MediaVariantsField
+from api.utils.thumbnails import AVATAR_VARIANTS
 from core.models.notification import Notification
 
 
 class NotificationSerializer(serializers.ModelSerializer):
     """ """
 
+    photo_variants = MediaVariantsField(AVATAR_VARIANTS, source='photo')
+
     class Meta:
         model = Notification
         read_only_fields = ['user', 'created_on']
\ No newline at end of file
@@ -1,5 +1,7 @@
 from rest_framework import serializers
+from api.serializers.media_variants import MediaVariantsField
 from api.serializers.skill import SkillSerializer
+from api.utils.thumbnails import AVATAR_VARIANTS
 from core.models import Profile
 
 
@@ -13,6 +15,8 @@ class ProfileCreateSerializer(serializers.ModelSerializer):
 
     level = serializers.FloatField(source='get_user_level', read_only=True)
 
+    photo_variants = MediaVariantsField(AVATAR_VARIANTS, source='photo')
+
     class Meta:
         model = Profile
 
@@ -27,6 +31,8 @@ class ProfileSerializer(serializers.ModelSerializer):
 
     level = serializers.FloatField(source='get_user_level', read_only=True)
 
+    photo_variants = MediaVariantsField(AVATAR_VARIANTS, source='photo')
+
     skills = SkillSerializer(source='get_skills', many=True, read_only=True)
 
     class Meta:
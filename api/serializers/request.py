@@ -1,5 +1,7 @@
 from rest_framework import serializers
 from api.serializers import ReportableModelSerializer
+from api.serializers.media_variants import MediaVariantsField
+from api.utils.thumbnails import AVATAR_VARIANTS
 from core.models import Request
 
 
@@ -11,7 +13,9 @@ class RequestCreateSerializer(ReportableModelSerializer):
 
     user_photo = serializers.CharField(source='get_photo', read_only=True)
 
-    user_is_donor = serializers.BooleanField(source='user.profile.is_donor', read_only=True)
+    user_photo_variants = MediaVariantsField(AVATAR_VARIANTS, source='get_photo')
+
+    user_is_donor = serializers.BooleanField(source='get_user_is_donor', read_only=True)
 
     user_is_early_adopter = serializers.BooleanField(source='user.profile.is_early_adopter', read_only=True)
 
@@ -19,4 +19,12 @@ from api.tests.tests_evaluation import EvaluationTests
 from api.tests.tests_meeting import MeetingTests
 from api.tests.tests_meeting_point import MeetingPointTests
 from api.tests.tests_message import MessageTests
-from api.tests.tests_text import TextTests
\ No newline at end of file
+from api.tests.tests_text import TextTests
+from api.tests.tests_mail import MailDispatcherTests, OutboxTests, DrainLoopTests
+from api.tests.tests_audit import AuditLogTests
+from api.tests.tests_indexes import IndexTests
+from api.tests.tests_notification import NotificationTests
+from api.tests.tests_media import MediaVariantTests, MediaServingTests
+from api.tests.tests_deployment import DeploymentTests, LoadBenchmarkTests
+from api.tests.tests_db_pool import DatabasePoolTests, DatabasePoolStatsTests
+from api.tests.tests_db_router import ReplicaRoutingTests
@@ -0,0 +1,94 @@
+from django.contrib.admin.models import LogEntry, ADDITION, CHANGE
+from django.contrib.auth.hashers import make_password
+from django.contrib.contenttypes.models import ContentType
+from rest_framework import status
+
+from api.tests.api_test_case import CustomAPITestCase
+from api.utils import audit
+from core.models import Community, Member, Profile
+
+
+class AuditLogTests(CustomAPITestCase):
+
+    def setUp(self):
+        """
+
+        """
+        user1 = self.user_model.objects.create(password=make_password('user1'), email='user1@test.com',
+                                               first_name='1', last_name='User', is_active=True)
+        user2 = self.user_model.objects.create(password=make_password('user2'), email='user2@test.com',
+                                               first_name='2', last_name='User', is_active=True)
+        Profile.objects.create(user=user1)
+        Profile.objects.create(user=user2)
+        community = Community.objects.create(name='com1', description='desc1', auto_accept_member=True)
+        Member.objects.create(user=user1, community=community, role='0', status='1')
+
+    def test_log_from_request(self):
+        """
+        Ensure the actions of a request are logged at its end, without loading related objects
+        """
+        response = self.client.post('/api/v1/communities/1/join_community/', HTTP_AUTHORIZATION=self.auth('user2'))
+        self.assertEqual(status.HTTP_201_CREATED, response.status_code)
+
+        entry = LogEntry.objects.get()
+        self.assertEqual(2, entry.user_id)
+        self.assertEqual(str(response.data['id']), entry.object_id)
+        self.assertEqual('Member %d (user 2, community 1)' % response.data['id'], entry.object_repr)
+        self.assertEqual(ADDITION, entry.action_flag)
+
+    def test_buffered_entries_written_in_one_query(self):
+        """
+        Ensure buffered entries are captured without query, and written in one
+        """
+        member = Member.objects.get(id=1)
+        audit.AuditLogMiddleware().process_request(None)
+        with self.assertNumQueries(0):
+            for i in range(10):
+                audit.log_action(1, Member, member, CHANGE, change_message='change %d' % i)
+        audit.write([])
+        ContentType.objects.get_for_model(Member)
+        with self.assertNumQueries(1):
+            audit.AuditLogMiddleware().process_response(None, None)
+        self.assertEqual(10, LogEntry.objects.filter(object_repr='Member 1 (user 1, community 1)').count())
+
+    def test_log_outside_request(self):
+        """
+        Ensure an action logged outside of a request is written at once
+        """
+        audit.log_action(1, Member, Member.objects.get(id=1), CHANGE, change_message='command')
+        self.assertEqual('command', LogEntry.objects.get().change_message)
+
+    def test_rolled_back_entries_dropped(self):
+        """
+        Ensure the entries of a transaction are kept only if it commits
+        """
+        member = Member.objects.get(id=1)
+        audit.AuditLogMiddleware().process_request(None)
+        try:
+            with audit.atomic():
+                audit.log_action(1, Member, member, CHANGE, change_message='rolled back')
+                with audit.atomic():
+                    audit.log_action(1, Member, member, CHANGE, change_message='nested')
+                raise ValueError()
+        except ValueError:
+            pass
+        with audit.atomic():
+            audit.log_action(1, Member, member, CHANGE, change_message='committed')
+            try:
+                with audit.atomic():
+                    audit.log_action(1, Member, member, CHANGE, change_message='savepoint rolled back')
+                    raise ValueError()
+            except ValueError:
+                pass
+        audit.AuditLogMiddleware().process_response(None, None)
+        self.assertEqual(['committed'], list(LogEntry.objects.values_list('change_message', flat=True)))
+
+    def test_background_flusher(self):
+        """
+        Ensure entries handed to the flusher are kept until it writes them
+        """
+        flusher = audit.AuditLogFlusher(interval=60, batch_size=100)
+        flusher.submit([audit.AuditEntry(1, Member, Member.objects.get(id=1), CHANGE)])
+        self.assertEqual(0, LogEntry.objects.count())
+        flusher.flush()
+        self.assertEqual(1, LogEntry.objects.count())
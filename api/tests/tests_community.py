@@ -1,8 +1,13 @@
 from django.contrib.auth import get_user_model
 from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils.six import StringIO
 from rest_framework import status
 from django.contrib.auth.models import User
 from api.tests.api_test_case import CustomAPITestCase
+from api.utils.memberships import get_memberships
 from core.models import Member, Community, LocalCommunity, TransportCommunity
 
 
@@ -304,3 +309,107 @@ class CommunityTests(CustomAPITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         data = response.data
         self.assertEqual(0, data['count'])
+
+    def test_members_count_follows_memberships(self):
+        """
+        Ensure stored member counters follow join, accept, ban and leave actions
+        """
+        self.client.post('/api/v1/communities/1/join_community/', HTTP_AUTHORIZATION=self.auth('user4'))
+        community = Community.objects.get(id=1)
+        self.assertEqual(0, community.accepted_members_count)
+        self.assertEqual(1, community.pending_members_count)
+
+        member = Member.objects.get(user=4, community=1)
+        Member.objects.create(user=self.user_model.objects.get(id=1), community=community, role='0', status='1')
+        self.client.post('/api/v1/communities/1/accept_member/', {'id': member.id},
+                         HTTP_AUTHORIZATION=self.auth('user1'), format='json')
+        community = Community.objects.get(id=1)
+        self.assertEqual(2, community.accepted_members_count)
+        self.assertEqual(0, community.pending_members_count)
+
+        self.client.post('/api/v1/communities/1/ban_member/', {'id': member.id},
+                         HTTP_AUTHORIZATION=self.auth('user1'), format='json')
+        self.assertEqual(1, Community.objects.get(id=1).accepted_members_count)
+
+        self.client.post('/api/v1/communities/4/leave_community/', HTTP_AUTHORIZATION=self.auth('user3'))
+        self.assertEqual(2, Community.objects.get(id=4).accepted_members_count)
+
+    def test_members_count_relative_updates(self):
+        """
+        Ensure member changes shift the stored counters instead of writing a recount
+        """
+        Community.objects.filter(id=1).update(accepted_members_count=10, pending_members_count=5)
+        member = Member.objects.create(user=self.user_model.objects.get(id=4), community_id=1, status='0')
+        self.assertEqual(6, Community.objects.get(id=1).pending_members_count)
+
+        member.status = '1'
+        member.save()
+        community = Community.objects.get(id=1)
+        self.assertEqual(11, community.accepted_members_count)
+        self.assertEqual(5, community.pending_members_count)
+
+        member.delete()
+        self.assertEqual(10, Community.objects.get(id=1).accepted_members_count)
+
+    def test_reconcile_members_count(self):
+        """
+        Ensure the reconciliation command fixes drifted counters
+        """
+        Community.objects.filter(id=4).update(accepted_members_count=42)
+        Community.objects.filter(id=1).update(pending_members_count=3)
+
+        call_command('reconcile_members_count', stdout=StringIO())
+        self.assertEqual(3, Community.objects.get(id=4).accepted_members_count)
+        self.assertEqual(0, Community.objects.get(id=1).pending_members_count)
+
+    def test_list_communities_constant_queries(self):
+        """
+        Ensure listing communities does not run queries per community
+        """
+        url = '/api/v1/communities/'
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url, HTTP_AUTHORIZATION=self.auth('user3'))
+        LocalCommunity.objects.create(name='lcom6', description='descl6', city='Paris', country='FR',
+                                      gps_x=0, gps_y=0)
+        TransportCommunity.objects.create(name='tcom6', description='desct6', departure='dep6', arrival='arr6')
+        with CaptureQueriesContext(connection) as more_queries:
+            response = self.client.get(url, HTTP_AUTHORIZATION=self.auth('user3'))
+        self.assertEqual(12, response.data['count'])
+        self.assertEqual(len(queries), len(more_queries))
+
+    def test_moderator_actions_single_membership_query(self):
+        """
+        Ensure the permission checks of a moderator action share one membership query
+        """
+        member = Member.objects.create(user=self.user_model.objects.get(email='user4@test.com'),
+                                       community=Community.objects.get(id=4), role='2', status='0')
+        moderator = self.user_model.objects.get(email='user2@test.com')
+        token = self.auth('user2')
+        for url, data in [('/api/v1/communities/4/retrieve_members/', None),
+                          ('/api/v1/communities/4/accept_member/', {'id': member.id})]:
+            with CaptureQueriesContext(connection) as queries:
+                if data is None:
+                    response = self.client.get(url, HTTP_AUTHORIZATION=token)
+                else:
+                    response = self.client.post(url, data, HTTP_AUTHORIZATION=token, format='json')
+            self.assertEqual(status.HTTP_200_OK, response.status_code)
+            membership_queries = [q for q in queries.captured_queries
+                                  if 'FROM "core_member" WHERE "core_member"."user_id" = %s' in q['sql']
+                                  and 'PARAMS = (%d,)' % moderator.id in q['sql']]
+            self.assertEqual(1, len(membership_queries))
+
+    def test_memberships_reloaded_after_change(self):
+        """
+        Ensure a membership change is seen by the permission checks of the same request
+        """
+        class FakeRequest():
+            pass
+
+        request = FakeRequest()
+        user = self.user_model.objects.get(email='user4@test.com')
+        memberships = get_memberships(request, user)
+        self.assertFalse(memberships.is_member(4))
+        self.assertIs(memberships, get_memberships(request, user))
+        Member.objects.create(user=user, community=Community.objects.get(id=4), role='2', status='1')
+        self.assertTrue(memberships.is_member(4))
+        self.assertFalse(memberships.is_moderator(4))
@@ -1,5 +1,6 @@
 from django.contrib.auth import get_user_model
 from django.contrib.auth.hashers import make_password
+from django.test.utils import override_settings
 from rest_framework import status
 from django.contrib.auth.models import User
 from api.tests.api_test_case import CustomAPITestCase
@@ -256,7 +257,8 @@ class LocalCommunityTests(CustomAPITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
         data = response.data
-        self.assertEqual(4, data['count'])
+        self.assertEqual(3, data['count'])
+        self.assertEqual(['con2', 'loccom1', 'loc2'], [community['name'] for community in data['results']])
 
     def test_list_communities_around_me_2(self):
         """
@@ -273,7 +275,8 @@ class LocalCommunityTests(CustomAPITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
         data = response.data
-        self.assertEqual(3, data['count'])
+        self.assertEqual(2, data['count'])
+        self.assertEqual(['loc1', 'loccom1'], [community['name'] for community in data['results']])
 
     def test_list_communities_around_me_3(self):
         """
@@ -290,4 +293,50 @@ class LocalCommunityTests(CustomAPITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
         data = response.data
-        self.assertEqual(2, data['count'])
+        self.assertEqual(1, data['count'])
+        self.assertEqual('com1', data['results'][0]['name'])
+
+    def test_list_communities_around_me_missing_radius(self):
+        """
+        Ensure a search radius is required
+        """
+        url = '/api/v1/local_communities/0/list_communities_around_me/'
+        response = self.client.get(url, {'gps_x': 0, 'gps_y': 0}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_list_communities_around_me_invalid_values(self):
+        """
+        Ensure non finite values, points outside the globe and negative radiuses are rejected
+        """
+        url = '/api/v1/local_communities/0/list_communities_around_me/'
+        for data in [{'gps_x': 'nan', 'gps_y': 1, 'radius': 5}, {'gps_x': 1, 'gps_y': 1, 'radius': 'nan'},
+                     {'gps_x': 1, 'gps_y': 1, 'radius': 'inf'}, {'gps_x': 1, 'gps_y': '-inf', 'radius': 5},
+                     {'gps_x': 181, 'gps_y': 1, 'radius': 5}, {'gps_x': 1, 'gps_y': 91, 'radius': 5},
+                     {'gps_x': 1, 'gps_y': 1, 'radius': -1}]:
+            response = self.client.get(url, data, format='json')
+            self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+
+    @override_settings(GEO_MAX_RADIUS=1)
+    def test_list_communities_around_me_radius_capped(self):
+        """
+        Ensure the search radius is capped at GEO_MAX_RADIUS
+        """
+        LocalCommunity.objects.create(name='far', description='far', city='Nouméa', country='FR',
+                                      gps_x=166.45, gps_y=-22.27)
+        url = '/api/v1/local_communities/0/list_communities_around_me/'
+        response = self.client.get(url, {'gps_x': 166.4, 'gps_y': -22.3, 'radius': 10}, format='json')
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(0, response.data['count'])
+
+    def test_list_communities_around_me_far_away(self):
+        """
+        Ensure communities outside the geohash cells of the search are not candidates
+        """
+        LocalCommunity.objects.create(name='far', description='far', city='Nouméa', country='FR',
+                                      gps_x=166.45, gps_y=-22.27)
+        self.assertEqual(6, LocalCommunity.objects.count())
+        self.assertEqual(1, len(LocalCommunity.objects.around(166.4, -22.3, 10)))
+        self.assertEqual(0, len(LocalCommunity.objects.around(166.4, -22.3, 1)))
+        url = '/api/v1/local_communities/0/list_communities_around_me/'
+        response = self.client.get(url, {'gps_x': 2, 'gps_y': 2, 'radius': 115}, format='json')
+        self.assertEqual(3, response.data['count'])
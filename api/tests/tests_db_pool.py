@@ -0,0 +1,148 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from django.db.utils import ConnectionHandler
+from django.test import SimpleTestCase
+from rest_framework import status
+from rest_framework.test import APITestCase
+import core.db_pool
+from core.db_pool import PoolTimeout, warm_up
+
+
+class DatabasePoolTests(SimpleTestCase):
+
+    def setUp(self):
+        """
+        Make a SQLite database file
+        """
+        self.directory = tempfile.mkdtemp()
+        self.alias = 'pool_%d' % id(self)
+
+    def tearDown(self):
+        pool = core.db_pool._pools.pop(self.alias, None)
+        if pool is not None:
+            pool.close_idle()
+        shutil.rmtree(self.directory)
+
+    def handler(self, **options):
+        return ConnectionHandler({'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:'},
+                                  self.alias: {'ENGINE': 'core.db_pool.sqlite3',
+                                               'NAME': os.path.join(self.directory, 'db.sqlite3'),
+                                               'POOL': options}})
+
+    def query(self, wrapper):
+        cursor = wrapper.cursor()
+        cursor.execute('SELECT 1')
+        cursor.fetchall()
+
+    def test_connections_are_reused(self):
+        """
+        Ensure a closed connection is given back to the pool, and reused by other wrappers
+        """
+        first = self.handler()[self.alias]
+        self.query(first)
+        raw = first.connection
+        first.close()
+        self.assertIsNone(first.connection)
+        second = self.handler()[self.alias]
+        self.query(second)
+        self.assertIs(raw, second.connection)
+        second.close()
+        stats = second.pool.stats()
+        self.assertEqual(1, stats['created'])
+        self.assertEqual(2, stats['checkouts'])
+        self.assertEqual(1, stats['idle'])
+        self.assertEqual(0, stats['in_use'])
+
+    def test_bounded_pool(self):
+        """
+        Ensure checkouts wait for a connection when MAX_SIZE are in use, up to TIMEOUT
+        """
+        first = self.handler(MAX_SIZE=1, TIMEOUT=0.1)[self.alias]
+        self.query(first)
+        second = self.handler(MAX_SIZE=1, TIMEOUT=0.1)[self.alias]
+        self.assertRaises(PoolTimeout, self.query, second)
+        self.assertEqual(1, first.pool.stats()['timeouts'])
+
+        first.pool.options['TIMEOUT'] = 5
+        first.allow_thread_sharing = True
+        timer = threading.Timer(0.2, first.close)
+        timer.start()
+        self.query(second)
+        timer.join()
+        stats = second.pool.stats()
+        self.assertTrue(stats['wait_max'] >= 0.15)
+        self.assertEqual(1, stats['created'])
+        second.close()
+
+    def test_health_check(self):
+        """
+        Ensure idle connections are checked before reuse, and replaced when broken
+        """
+        wrapper = self.handler(CHECK_AFTER=0)[self.alias]
+        self.query(wrapper)
+        raw = wrapper.connection
+        wrapper.close()
+        raw.close()
+        time.sleep(0.01)
+        self.query(wrapper)
+        self.assertIsNot(raw, wrapper.connection)
+        stats = wrapper.pool.stats()
+        self.assertEqual(1, stats['health_check_failures'])
+        self.assertEqual(2, stats['created'])
+        wrapper.close()
+
+    def test_max_lifetime(self):
+        """
+        Ensure old connections are closed instead of reused
+        """
+        wrapper = self.handler(MAX_LIFETIME=0)[self.alias]
+        self.query(wrapper)
+        raw = wrapper.connection
+        time.sleep(0.01)
+        wrapper.close()
+        self.query(wrapper)
+        self.assertIsNot(raw, wrapper.connection)
+        self.assertEqual(0, wrapper.pool.stats()['idle'])
+        wrapper.close()
+
+    def test_transaction_not_leaked(self):
+        """
+        Ensure an open transaction is rolled back before the connection is reused
+        """
+        wrapper = self.handler()[self.alias]
+        wrapper.cursor().execute('CREATE TABLE item (id integer)')
+        wrapper.set_autocommit(False)
+        wrapper.cursor().execute('INSERT INTO item VALUES (1)')
+        wrapper.close()
+        cursor = wrapper.cursor()
+        cursor.execute('SELECT COUNT(*) FROM item')
+        self.assertEqual(0, cursor.fetchone()[0])
+        wrapper.close()
+
+    def test_warm_up(self):
+        """
+        Ensure warm up opens MIN_SIZE connections, once
+        """
+        handler = self.handler(MIN_SIZE=3, MAX_SIZE=2)
+        self.assertEqual({self.alias: 2}, warm_up(handler))
+        self.assertEqual({self.alias: 0}, warm_up(handler))
+        stats = handler[self.alias].pool.stats()
+        self.assertEqual(2, stats['idle'])
+        self.assertEqual(2, stats['created'])
+
+
+class DatabasePoolStatsTests(APITestCase):
+
+    def test_pool_stats_action(self):
+        """
+        Ensure pool statistics are only given to allowed addresses
+        """
+        url = '/api/v1/server_actions/database_pool_stats/'
+        response = self.client.get(url, REMOTE_ADDR='192.168.161.12')
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        response = self.client.get(url, REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(status.HTTP_401_UNAUTHORIZED, response.status_code)
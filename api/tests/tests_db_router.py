@@ -0,0 +1,136 @@
+import os
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.test.utils import override_settings
+from rest_framework import status
+from rest_framework.test import APITransactionTestCase
+
+from core.db_router import STICKY_COOKIE, ReplicaRouter, use_primary, use_replica
+from core.models import Faq, FaqSection, UserStats
+import core.utils
+
+
+@override_settings(DATABASE_REPLICAS=['replica'], DATABASE_REPLICA_STICKY_SECONDS=60, CONTENT_CACHE_TIMEOUT=0)
+class ReplicaRoutingTests(APITransactionTestCase):
+    """
+    The test database is the primary, a SQLite file the replica: their rows differ.
+    Not within a transaction, whose reads would stay on the primary.
+    The FAQ is read without its cache, which is built from the primary.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.directory = tempfile.mkdtemp()
+        connections.databases['replica'] = {'ENGINE': 'django.db.backends.sqlite3',
+                                            'NAME': os.path.join(cls.directory, 'replica.sqlite3')}
+        connections.ensure_defaults('replica')
+        connections.prepare_test_settings('replica')
+        with connections['replica'].schema_editor() as editor:
+            editor.create_model(FaqSection)
+            editor.create_model(Faq)
+        section = FaqSection.objects.using('replica').create(title='Replica')
+        Faq.objects.using('replica').create(section=section, private=False, question='replica?', answer='yes')
+
+    @classmethod
+    def tearDownClass(cls):
+        connections['replica'].close()
+        del connections.databases['replica']
+        del connections._connections.replica
+        shutil.rmtree(cls.directory)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        section = FaqSection.objects.create(title='Primary')
+        Faq.objects.create(section=section, private=False, question='primary?', answer='yes')
+        self.user = get_user_model().objects.create(password=make_password('user1'), email='user1@test.com',
+                                                    first_name='1', last_name='User', is_active=True)
+
+    def questions(self, **extra):
+        response = self.client.get('/api/v1/faq/', **extra)
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        return [faq['question'] for faq in response.data['results']]
+
+    def test_reads_on_replica(self):
+        """
+        Ensure GET requests read the replica, and that users are authenticated against the primary
+        """
+        self.assertEqual(['replica?'], self.questions())
+        token = core.utils.gen_auth_token(self.user)
+        # The user only exists on the primary
+        self.assertEqual(['replica?'], self.questions(HTTP_AUTHORIZATION='JWT ' + token))
+
+    def test_read_your_writes(self):
+        """
+        Ensure a client reads the primary after a POST, other clients still reading the replica
+        """
+        self.client.post('/api/v1/faq/', {}, REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(['primary?'], self.questions(REMOTE_ADDR='10.0.0.1'))
+        self.client.cookies.clear()
+        self.assertEqual(['replica?'], self.questions(REMOTE_ADDR='10.0.0.2'))
+
+    def test_read_your_writes_by_cookie(self):
+        """
+        Ensure the cookie set by a POST keeps a client on the primary, even for a process which did not
+        see the POST, and that it can not be forged
+        """
+        self.client.post('/api/v1/faq/', {}, REMOTE_ADDR='10.0.0.1')
+        # Other process: its cache has no key of the client
+        cache.clear()
+        self.assertEqual(['primary?'], self.questions(REMOTE_ADDR='10.0.0.2'))
+        self.client.cookies[STICKY_COOKIE] = '1'
+        self.assertEqual(['replica?'], self.questions(REMOTE_ADDR='10.0.0.2'))
+
+    def test_read_your_writes_by_user(self):
+        """
+        Ensure a user reads the primary after a POST, whatever its address
+        """
+        auth = 'JWT ' + core.utils.gen_auth_token(self.user)
+        self.client.post('/api/v1/faq/', {}, REMOTE_ADDR='10.0.0.1', HTTP_AUTHORIZATION=auth)
+        self.client.cookies.clear()
+        self.assertEqual(['primary?'], self.questions(REMOTE_ADDR='10.0.0.2', HTTP_AUTHORIZATION=auth))
+
+    @override_settings(DATABASE_REPLICA_STICKY_SECONDS=0)
+    def test_sticky_window(self):
+        """
+        Ensure a client reads the replica again after the window
+        """
+        self.client.post('/api/v1/faq/', {}, REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(['replica?'], self.questions(REMOTE_ADDR='10.0.0.1'))
+
+    def test_router(self):
+        """
+        Ensure reads go to the primary outside replica blocks and within use_primary
+        """
+        router = ReplicaRouter()
+        self.assertEqual('default', router.db_for_read(Faq))
+        with use_replica():
+            self.assertEqual('replica', router.db_for_read(Faq))
+            with use_primary():
+                self.assertEqual('default', router.db_for_read(Faq))
+            self.assertEqual('replica', router.db_for_read(Faq))
+        self.assertEqual('default', router.db_for_write(Faq))
+        self.assertFalse(router.allow_migrate('replica', Faq))
+
+    def test_user_stats_on_primary(self):
+        """
+        Ensure stats are computed and stored from the primary, even within a replica block
+        """
+        with use_replica():
+            # The replica has no stats table
+            stats = UserStats.objects.get_for_user(self.user.id)
+        self.assertEqual(self.user.id, stats.user_id)
+
+    def test_router_in_transaction(self):
+        """
+        Ensure reads within a transaction of the primary stay on it
+        """
+        router = ReplicaRouter()
+        with use_replica(), transaction.atomic():
+            self.assertEqual('default', router.db_for_read(Faq))
@@ -0,0 +1,58 @@
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase, LiveServerTestCase
+from core.management.commands.benchmark_workers import run_load
+from smartribe import gunicorn_conf
+
+
+class DeploymentTests(SimpleTestCase):
+
+    def test_threaded_profile(self):
+        """
+        Ensure the threaded profile uses gthread workers, and keeps database connections
+        """
+        settings = gunicorn_conf.worker_settings('threaded', {'GUNICORN_THREADS': '16'})
+        self.assertEqual('gunicorn.workers.gthread.ThreadWorker', settings['worker_class'])
+        self.assertEqual(16, settings['threads'])
+        self.assertEqual(2, settings['workers'])
+        self.assertEqual('0.0.0.0:7777', settings['bind'])
+        self.assertEqual(60, gunicorn_conf.database_connection_age('threaded'))
+        self.assertEqual(8, gunicorn_conf.notification_waiters(settings))
+
+    def test_sync_profile(self):
+        """
+        Ensure the sync profile matches the former command line
+        """
+        settings = gunicorn_conf.worker_settings('sync', {'GUNICORN_WORKERS': '4'})
+        self.assertEqual('sync', settings['worker_class'])
+        self.assertEqual(4, settings['workers'])
+        self.assertFalse('threads' in settings)
+        self.assertEqual(0, gunicorn_conf.notification_waiters(settings))
+
+    def test_gevent_profile(self):
+        """
+        Ensure the gevent profile does not keep database connections, and requires gevent
+        """
+        self.assertEqual(0, gunicorn_conf.database_connection_age('gevent'))
+        try:
+            import gevent
+        except ImportError:
+            self.assertRaises(ImproperlyConfigured, gunicorn_conf.worker_settings, 'gevent', {})
+        else:
+            self.assertEqual('gevent', gunicorn_conf.worker_settings('gevent', {})['worker_class'])
+
+    def test_unknown_profile(self):
+        self.assertRaises(ValueError, gunicorn_conf.worker_settings, 'eventlet', {})
+
+
+class LoadBenchmarkTests(LiveServerTestCase):
+
+    def test_run_load(self):
+        """
+        Ensure the benchmark load counts requests, errors and latencies
+        """
+        host, port = self.server_thread.host, self.server_thread.port
+        stats = run_load(host, port, ['/api/v1/faq/', '/api/v1/missing/'], 20, 4)
+        self.assertEqual(10, stats['requests'])
+        self.assertEqual(10, stats['errors'])
+        self.assertTrue(stats['throughput'] > 0)
+        self.assertTrue(0 < stats['p50'] <= stats['p95'])
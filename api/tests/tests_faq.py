@@ -3,9 +3,12 @@ from django.contrib.auth.hashers import make_password
 from django.template.defaultfilters import length
 from rest_framework import status
 from django.contrib.auth.models import User
+from django.db.models.signals import post_save, post_delete
 from api.tests.api_test_case import CustomAPITestCase
 import core.utils
-from core.models import FaqSection, Faq
+from administration.models import ProxyFaq, ProxyFaqSection, ProxyText
+from api.utils import content_cache
+from core.models import FaqSection, Faq, Suggestion
 
 
 class FaqTests(CustomAPITestCase):
@@ -49,3 +52,104 @@ class FaqTests(CustomAPITestCase):
         self.assertEqual(status.HTTP_200_OK, response.status_code)
         data = response.data
         self.assertEqual(3, data['count'])
+
+    def test_list_faq_cached(self):
+        """
+        Ensure answers are served from the cache, without any query, and per visibility
+        """
+        url = '/api/v1/faq/'
+
+        self.assertEqual(1, self.client.get(url).data['count'])
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(1, response.data['count'])
+        self.assertEqual('no-cache', response['Cache-Control'])
+
+        response = self.client.get(url, HTTP_AUTHORIZATION=self.auth('user1'))
+        self.assertEqual(3, response.data['count'])
+        self.assertEqual(1, self.client.get(url).data['count'])
+
+    def test_list_faq_not_modified(self):
+        """
+        Ensure a client holding the current answers gets a 304 response, until they change
+        """
+        url = '/api/v1/faq/'
+
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(status.HTTP_304_NOT_MODIFIED, response.status_code)
+        self.assertEqual(b'', response.content)
+        self.assertEqual(etag, response['ETag'])
+
+        Faq.objects.filter(private=False).get().delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(0, response.data['count'])
+        self.assertNotEqual(etag, response['ETag'])
+
+    def test_list_faq_invalidated_from_administration(self):
+        """
+        Ensure answers and sections changed from the administration (proxy models) are served at once
+        """
+        url = '/api/v1/faq/'
+
+        self.client.get(url)
+        section = ProxyFaqSection.objects.get(title='General')
+        ProxyFaq.objects.create(section=section, private=False, question='when?', answer='now')
+        response = self.client.get(url)
+        self.assertEqual(2, response.data['count'])
+
+        section.title = 'Misc'
+        section.save()
+        response = self.client.get(url)
+        self.assertEqual(['Misc', 'Misc'], [faq['section']['title'] for faq in response.data['results']])
+
+    def test_list_faq_other_params_cached(self):
+        """
+        Ensure query parameters other than filters and pagination share the cached answers
+        """
+        url = '/api/v1/faq/'
+
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            response = self.client.get(url + '?x=random')
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(1, response.data['count'])
+
+        response = self.client.get(url + '?page_size=1&page=2')
+        self.assertEqual(status.HTTP_404_NOT_FOUND, response.status_code)
+
+    def test_list_faq_invalidated_after_administration_commit(self):
+        """
+        Ensure the administration invalidates the answers again once its transaction is committed,
+        after the invalidation sent on save
+        """
+        self.user_model.objects.create(password=make_password('admin'), email='admin@test.com', first_name='A',
+                                       last_name='Admin', is_active=True, is_staff=True, is_superuser=True)
+        self.assertTrue(self.client.login(username='admin@test.com', password='admin'))
+        faq = ProxyFaq.objects.get(question='where?')
+        versions = []
+
+        def saved(sender, instance, **kwargs):
+            versions.append(content_cache.version('faq'))
+        post_save.connect(saved, sender=ProxyFaq)
+        try:
+            response = self.client.post('/admin/administration/proxyfaq/%d/' % faq.id,
+                                        {'section': faq.section_id, 'private': 'on', 'question': 'where?',
+                                         'answer': 'garden'})
+        finally:
+            post_save.disconnect(saved, sender=ProxyFaq)
+        self.assertEqual(status.HTTP_302_FOUND, response.status_code)
+        self.assertEqual(1, len(versions))
+        self.assertLess(versions[0], content_cache.version('faq'))
+
+    def test_invalidation_senders(self):
+        """
+        Ensure the invalidation is connected to the content models and their proxies only,
+        other models keeping their fast delete
+        """
+        for model in (Faq, FaqSection, ProxyFaq, ProxyFaqSection, ProxyText):
+            self.assertTrue(post_save.has_listeners(model))
+            self.assertTrue(post_delete.has_listeners(model))
+        self.assertFalse(post_delete.has_listeners(Suggestion))
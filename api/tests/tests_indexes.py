@@ -0,0 +1,87 @@
+from django.contrib.auth.hashers import make_password
+from django.db import connection
+from django.test import TestCase
+
+from core.models import Community, Member, SkillCategory, Request, Offer, Message, Notification
+
+
+def used_indexes(queryset):
+    """
+    Returns the columns of the indexes used by the query plan of a queryset, one tuple per index.
+    Supports SQLite (EXPLAIN QUERY PLAN) and MySQL (EXPLAIN), returns None on other databases.
+    """
+    sql, params = queryset.query.sql_with_params()
+    table = queryset.model._meta.db_table
+    cursor = connection.cursor()
+    indexes = []
+    if connection.vendor == 'sqlite':
+        cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+        for row in cursor.fetchall():
+            words = row[-1].split()
+            if 'INDEX' in words:
+                name = words[words.index('INDEX') + 1]
+                cursor.execute('PRAGMA index_info(%s)' % connection.ops.quote_name(name))
+                indexes.append(tuple(column for _, _, column in sorted(cursor.fetchall())))
+    elif connection.vendor == 'mysql':
+        cursor.execute('EXPLAIN ' + sql, params)
+        columns = [column[0] for column in cursor.description]
+        for row in cursor.fetchall():
+            row = dict(zip(columns, row))
+            if row['table'] == table and row['key']:
+                cursor.execute('SHOW INDEX FROM %s WHERE Key_name = %%s' % connection.ops.quote_name(table),
+                               [row['key']])
+                index_columns = [column[0] for column in cursor.description]
+                rows = [dict(zip(index_columns, index_row)) for index_row in cursor.fetchall()]
+                indexes.append(tuple(r['Column_name'] for r in sorted(rows, key=lambda r: r['Seq_in_index'])))
+    else:
+        return None
+    return indexes
+
+
+class IndexTests(TestCase):
+
+    def setUp(self):
+        """
+        One row per table, without table statistics: plans follow the available indexes.
+        """
+        from django.contrib.auth import get_user_model
+        self.user = get_user_model().objects.create(password=make_password('user1'), email='user1@test.com',
+                                                    first_name='1', last_name='User', is_active=True)
+        self.community = Community.objects.create(name='com1', description='desc1')
+        Member.objects.create(user=self.user, community=self.community, role='0', status='1')
+        category = SkillCategory.objects.create(name='cat', detail='desc')
+        self.request = Request.objects.create(user=self.user, category=category, community=self.community,
+                                              title='help1', detail='det help1')
+        self.offer = Offer.objects.create(request=self.request, user=self.user, detail='offer1')
+        Message.objects.create(offer=self.offer, user=self.user, content='message1')
+        Notification.objects.create(user=self.user, title='title', message='message', link='/offers/1/')
+
+    def assertUsesIndex(self, columns, queryset):
+        indexes = used_indexes(queryset)
+        if indexes is None:
+            self.skipTest('index introspection not supported on %s' % connection.vendor)
+        self.assertIn(columns, indexes)
+
+    def test_member_indexes(self):
+        self.assertUsesIndex(('user_id', 'community_id'),
+                             Member.objects.filter(user=self.user, community=self.community))
+        self.assertUsesIndex(('community_id', 'status', 'role'),
+                             Member.objects.filter(community=self.community, status='1', role__in=['0', '1']))
+
+    def test_request_indexes(self):
+        self.assertUsesIndex(('user_id', 'created_on'),
+                             Request.objects.filter(user=self.user).order_by('-created_on'))
+        self.assertUsesIndex(('community_id', 'closed'),
+                             Request.objects.filter(community=self.community, closed=False))
+
+    def test_offer_indexes(self):
+        self.assertUsesIndex(('request_id', 'closed'),
+                             Offer.objects.filter(request=self.request, closed=False))
+
+    def test_notification_indexes(self):
+        self.assertUsesIndex(('user_id', 'seen', 'created_on'),
+                             Notification.objects.filter(user=self.user, seen=False).order_by('-created_on'))
+
+    def test_message_indexes(self):
+        self.assertUsesIndex(('offer_id', 'creation_date'),
+                             Message.objects.filter(offer=self.offer).order_by('creation_date'))
@@ -0,0 +1,321 @@
+import asyncore
+import datetime
+import smtpd
+import threading
+import time
+
+from django.core import mail
+from django.core.mail import EmailMessage
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.management import call_command
+from django.db import transaction
+from django.db.utils import OperationalError
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import override_settings
+from django.utils import timezone
+from django.utils.six import StringIO
+
+from api.utils.asyncronous_mail import MailDispatcher, send_mail, send_mass_mail
+from core.management.commands import drain_outbox
+from core.models import OutgoingMail
+
+
+class LocalSMTPServer(smtpd.SMTPServer):
+    """
+    SMTP stand-in, keeping received mails and counting connections.
+    Its sockets are polled in their own map by its own thread: nothing is shared between tests.
+    """
+
+    def __init__(self):
+        self.socket_map = {}
+        super().__init__(('127.0.0.1', 0), None, map=self.socket_map)
+        self.port = self.socket.getsockname()[1]
+        self.received = []
+        self.connections = 0
+        self._stopped = threading.Event()
+
+    def handle_accepted(self, conn, addr):
+        self.connections += 1
+        super().handle_accepted(conn, addr)
+
+    def process_message(self, peer, mailfrom, rcpttos, data, **kwargs):
+        self.received.append((mailfrom, rcpttos, data))
+
+    def start(self):
+        self._thread = threading.Thread(target=self._serve)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _serve(self):
+        while not self._stopped.is_set():
+            asyncore.loop(timeout=0.05, map=self.socket_map, count=1)
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join(5)
+        asyncore.close_all(map=self.socket_map)
+
+
+class FlakyBackend(BaseEmailBackend):
+    """ Fails the first 'failures' sends """
+
+    failures = 0
+    sent = []
+
+    def send_messages(self, email_messages):
+        if FlakyBackend.failures:
+            FlakyBackend.failures -= 1
+            raise IOError('Connection lost')
+        FlakyBackend.sent.extend(email_messages)
+        return len(email_messages)
+
+
+class BlockingBackend(BaseEmailBackend):
+    """ Waits for 'release' before sending """
+
+    release = threading.Event()
+    sent = []
+
+    def send_messages(self, email_messages):
+        BlockingBackend.release.wait(5)
+        BlockingBackend.sent.extend(email_messages)
+        return len(email_messages)
+
+
+class MailDispatcherTests(SimpleTestCase):
+
+    def setUp(self):
+        self.server = LocalSMTPServer()
+        self.server.start()
+        self.dispatchers = []
+
+    def tearDown(self):
+        for dispatcher in self.dispatchers:
+            self.assertTrue(dispatcher.stop(10))
+        self.server.stop()
+        self.assertFalse(self.server._thread.is_alive())
+
+    def dispatcher(self, **kwargs):
+        dispatcher = MailDispatcher(**kwargs)
+        self.dispatchers.append(dispatcher)
+        return dispatcher
+
+    def message(self, i):
+        return EmailMessage('subject %d' % i, 'body', 'noreply@smartribe.fr', ['user%d@test.com' % i])
+
+    def test_send_through_smtp(self):
+        """
+        Ensure queued mails are delivered, reusing the workers' SMTP connections
+        """
+        dispatcher = self.dispatcher(workers=2, backend='django.core.mail.backends.smtp.EmailBackend',
+                                    connection_kwargs={'host': '127.0.0.1', 'port': self.server.port,
+                                                       'username': '', 'password': '', 'use_tls': False})
+        for i in range(20):
+            dispatcher.submit(self.message(i))
+        self.assertTrue(dispatcher.flush(10))
+
+        self.assertEqual(20, len(self.server.received))
+        self.assertEqual(set('user%d@test.com' % i for i in range(20)),
+                         set(rcpttos[0] for _, rcpttos, _ in self.server.received))
+        self.assertLessEqual(self.server.connections, 2)
+        metrics = dispatcher.metrics()
+        self.assertEqual(20, metrics['queued'])
+        self.assertEqual(20, metrics['sent'])
+        self.assertEqual(0, metrics['queue_depth'])
+        self.assertLessEqual(metrics['connections'], 2)
+        self.assertGreater(metrics['latency_max'], 0)
+
+    def test_retry_with_backoff(self):
+        """
+        Ensure a failed mail is retried, and dropped after max_retries
+        """
+        FlakyBackend.failures = 2
+        FlakyBackend.sent = []
+        dispatcher = self.dispatcher(workers=1, retry_backoff=0.01, max_retries=2,
+                                    backend='api.tests.tests_mail.FlakyBackend')
+        dispatcher.submit(self.message(1))
+        self.assertTrue(dispatcher.flush(5))
+        self.assertEqual(1, len(FlakyBackend.sent))
+        self.assertEqual(2, dispatcher.metrics()['retries'])
+
+        FlakyBackend.failures = 3
+        with self.assertLogs('api.utils.asyncronous_mail', level='WARNING'):
+            dispatcher.submit(self.message(2), fail_silently=True)
+            self.assertTrue(dispatcher.flush(5))
+        self.assertEqual(1, len(FlakyBackend.sent))
+        self.assertEqual(1, dispatcher.metrics()['failed'])
+
+    def test_stop(self):
+        """
+        Ensure stop sends the queued mails, then ends the workers
+        """
+        FlakyBackend.failures = 0
+        FlakyBackend.sent = []
+        dispatcher = MailDispatcher(workers=2, backend='api.tests.tests_mail.FlakyBackend')
+        for i in range(5):
+            dispatcher.submit(self.message(i))
+        threads = list(dispatcher._threads)
+        self.assertTrue(dispatcher.stop(5))
+        self.assertEqual(5, len(FlakyBackend.sent))
+        self.assertFalse(any(thread.is_alive() for thread in threads))
+        self.assertEqual(0, dispatcher.queue.unfinished_tasks)
+
+    def test_backpressure(self):
+        """
+        Ensure a producer facing a full queue waits, then sends the mail himself
+        """
+        BlockingBackend.release.clear()
+        BlockingBackend.sent = []
+        dispatcher = self.dispatcher(workers=1, queue_size=1, batch_size=1, enqueue_timeout=0.05,
+                                    backend='api.tests.tests_mail.BlockingBackend')
+        dispatcher.submit(self.message(1))
+        # Wait for the worker to take the first mail, the second one fills the queue
+        deadline = time.time() + 5
+        while dispatcher.metrics()['queue_depth'] and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(0, dispatcher.metrics()['queue_depth'])
+        dispatcher.submit(self.message(2))
+        self.assertEqual(1, dispatcher.metrics()['queue_depth'])
+        threading.Timer(0.2, BlockingBackend.release.set).start()
+        with self.assertLogs('api.utils.asyncronous_mail', level='WARNING'):
+            dispatcher.submit(self.message(3))
+        self.assertTrue(dispatcher.flush(5))
+        self.assertEqual(3, len(BlockingBackend.sent))
+        self.assertEqual(1, dispatcher.metrics()['sent_inline'])
+
+
+@override_settings(MAIL_OUTBOX=True)
+class OutboxTests(TestCase):
+
+    def send(self, i):
+        send_mail('subject %d' % i, 'body', 'noreply@smartribe.fr', ['user%d@test.com' % i], html='<p>body</p>')
+
+    def test_enqueue(self):
+        """
+        Ensure mails are stored instead of being sent
+        """
+        self.send(1)
+        self.assertEqual(0, len(mail.outbox))
+        outgoing = OutgoingMail.objects.get()
+        self.assertEqual('0', outgoing.status)
+        self.assertEqual('user1@test.com', outgoing.recipients)
+
+    def test_enqueue_many(self):
+        """
+        Ensure a batch of mails is stored in one query
+        """
+        with self.assertNumQueries(1):
+            send_mass_mail([('subject %d' % i, 'body', 'noreply@smartribe.fr', ['user%d@test.com' % i])
+                            for i in range(10)])
+        self.assertEqual(0, len(mail.outbox))
+        self.assertEqual(10, len(set(OutgoingMail.objects.values_list('message_id', flat=True))))
+
+    def test_rollback(self):
+        """
+        Ensure mails of a rolled back transaction are never sent
+        """
+        try:
+            with transaction.atomic():
+                self.send(1)
+                raise IOError('Request failed')
+        except IOError:
+            pass
+        self.assertEqual(0, OutgoingMail.objects.count())
+
+    def test_drain(self):
+        """
+        Ensure the drain sends every pending mail once, with its Message-ID
+        """
+        for i in range(5):
+            self.send(i)
+        out = StringIO()
+        call_command('drain_outbox', batch_size=2, stdout=out)
+        self.assertIn('5 mails sent, 0 failed.', out.getvalue())
+        self.assertEqual(5, len(mail.outbox))
+        message_ids = set(OutgoingMail.objects.values_list('message_id', flat=True))
+        self.assertEqual(message_ids, set(m.extra_headers['Message-ID'] for m in mail.outbox))
+        self.assertEqual(5, OutgoingMail.objects.filter(status='1', attempts=1).count())
+
+        call_command('drain_outbox', stdout=StringIO())
+        self.assertEqual(5, len(mail.outbox))
+
+    def test_claim(self):
+        """
+        Ensure a claimed mail is not handed to another drain before its lease ends
+        """
+        self.send(1)
+        self.assertEqual(1, len(OutgoingMail.objects.claim(10)))
+        self.assertEqual(0, len(OutgoingMail.objects.claim(10)))
+        OutgoingMail.objects.update(claimed_until=timezone.now())
+        self.assertEqual(1, len(OutgoingMail.objects.claim(10)))
+
+    @override_settings(EMAIL_BACKEND='api.tests.tests_mail.FlakyBackend')
+    def test_retry(self):
+        """
+        Ensure a failed mail is rescheduled with backoff, then given up after max_attempts
+        """
+        FlakyBackend.failures = 1
+        FlakyBackend.sent = []
+        self.send(1)
+        self.send(2)
+        out = StringIO()
+        call_command('drain_outbox', stdout=out)
+        self.assertIn('1 mails sent, 1 failed.', out.getvalue())
+        self.assertEqual(1, len(FlakyBackend.sent))
+        failed = OutgoingMail.objects.get(status='0')
+        self.assertEqual(1, failed.attempts)
+        self.assertIn('Connection lost', failed.last_error)
+        self.assertGreater(failed.next_attempt_on, timezone.now())
+
+        FlakyBackend.failures = 1
+        OutgoingMail.objects.filter(id=failed.id).update(next_attempt_on=timezone.now())
+        call_command('drain_outbox', max_attempts=2, stdout=StringIO())
+        self.assertEqual('2', OutgoingMail.objects.get(id=failed.id).status)
+        self.assertEqual(1, len(FlakyBackend.sent))
+
+    def test_purge_sent(self):
+        """
+        Ensure the drain deletes the mails sent more than keep_days ago, and only them
+        """
+        for i in range(4):
+            self.send(i)
+        call_command('drain_outbox', stdout=StringIO())
+        old = timezone.now() - datetime.timedelta(days=8)
+        OutgoingMail.objects.filter(id__in=OutgoingMail.objects.order_by('id').values_list('id', flat=True)[:2]) \
+                            .update(sent_on=old)
+        self.send(5)
+        OutgoingMail.objects.filter(status='0').update(status='2')
+
+        call_command('drain_outbox', keep_days=7, stdout=StringIO())
+        self.assertEqual(2, OutgoingMail.objects.filter(status='1').count())
+        self.assertEqual(1, OutgoingMail.objects.filter(status='2').count())
+
+
+class StopDrain(BaseException):
+    pass
+
+
+class FailingDrain(drain_outbox.Command):
+    """ Fails once, as with a connection closed by the database, then stops """
+
+    calls = 0
+
+    def send_batch(self, options):
+        self.calls += 1
+        if self.calls == 1:
+            raise OperationalError('MySQL server has gone away')
+        raise StopDrain()
+
+
+class DrainLoopTests(SimpleTestCase):
+
+    def test_loop_survives_errors(self):
+        """
+        Ensure a database error is logged and the loop goes on with the next poll
+        """
+        command = FailingDrain()
+        command.totals, command.lock, command.purged_on = {'sent': 0, 'failed': 0}, threading.Lock(), None
+        with self.assertLogs('core.management.commands.drain_outbox', level='ERROR'):
+            with self.assertRaises(StopDrain):
+                command.work({'loop': True, 'interval': 0, 'workers': 1})
+        self.assertEqual(2, command.calls)
@@ -0,0 +1,240 @@
+import hashlib
+import os
+import shutil
+import tempfile
+
+from django.http import Http404
+from django.test import TestCase
+from django.test.utils import override_settings
+from django.test.client import RequestFactory
+from PIL import Image
+from api.utils import thumbnails
+from api.views.media import MediaViewSet
+
+
+class MediaVariantTests(TestCase):
+
+    def setUp(self):
+        """
+        Make a media directory with a photo and a transparent logo
+        """
+        self.root = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.root, 'profiles', '1'))
+        Image.new('RGB', (800, 600), (200, 10, 10)).save(os.path.join(self.root, 'profiles', '1', 'picture.jpg'))
+        Image.new('RGBA', (300, 100), (0, 0, 0, 0)).save(os.path.join(self.root, 'logo.png'))
+        with open(os.path.join(self.root, 'notes.txt'), 'w') as f:
+            f.write('not an image')
+        thumbnails.index.clear()
+        thumbnails.digests.clear()
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def get(self, path, **extra):
+        request = RequestFactory().get('/api/v1/media/' + path, **extra)
+        return MediaViewSet.get_media(request, path, self.root)
+
+    def test_avatar_variant(self):
+        """
+        Ensure avatars are cropped to squares, and stored once under a content hash name
+        """
+        response = self.get('variants/avatar_64/profiles/1/picture.jpg')
+        self.assertEqual(200, response.status_code)
+        self.assertEqual('image/jpeg', response['Content-Type'])
+        name = thumbnails.get_variant(self.root, 'profiles/1/picture.jpg', 'avatar_64')
+        self.assertTrue(name.startswith('variants/cache/'))
+        self.assertEqual((64, 64), Image.open(os.path.join(self.root, name)).size)
+        self.assertEqual(1, len(os.listdir(os.path.join(self.root, 'variants', 'cache'))))
+
+    def test_banner_variant(self):
+        """
+        Ensure banners are scaled to the width, and never enlarged
+        """
+        name = thumbnails.get_variant(self.root, 'profiles/1/picture.jpg', 'banner_640')
+        self.assertEqual((640, 480), Image.open(os.path.join(self.root, name)).size)
+        name = thumbnails.get_variant(self.root, 'profiles/1/picture.jpg', 'banner_1280')
+        self.assertEqual((800, 600), Image.open(os.path.join(self.root, name)).size)
+
+    def test_transparent_variant(self):
+        """
+        Ensure images with transparency keep it
+        """
+        name = thumbnails.get_variant(self.root, 'logo.png', 'avatar_64')
+        self.assertTrue(name.endswith('.png'))
+        self.assertEqual('RGBA', Image.open(os.path.join(self.root, name)).mode)
+
+    def test_identical_uploads_share_variants(self):
+        """
+        Ensure variants are named after the content of the original
+        """
+        shutil.copy(os.path.join(self.root, 'profiles', '1', 'picture.jpg'), os.path.join(self.root, 'copy.jpg'))
+        self.assertEqual(thumbnails.get_variant(self.root, 'profiles/1/picture.jpg', 'avatar_128'),
+                         thumbnails.get_variant(self.root, 'copy.jpg', 'avatar_128'))
+
+    def test_variant_shares_original_digest(self):
+        """
+        Ensure the digest of an original hashed for its variants is reused to serve it
+        """
+        thumbnails.get_variant(self.root, 'profiles/1/picture.jpg', 'avatar_64')
+        fullpath = os.path.join(self.root, 'profiles', '1', 'picture.jpg')
+        with open(fullpath, 'rb') as f:
+            digest = hashlib.sha1(f.read()).hexdigest()
+        self.assertEqual(digest, thumbnails.digests.get('profiles/1/picture.jpg',
+                                                        thumbnails.file_stamp(os.stat(fullpath))))
+        self.assertEqual('"%s"' % digest, self.get('profiles/1/picture.jpg')['ETag'])
+
+    def test_replaced_original(self):
+        """
+        Ensure a new upload at the same path gets new variants
+        """
+        first = thumbnails.get_variant(self.root, 'profiles/1/picture.jpg', 'avatar_64')
+        Image.new('RGB', (100, 50), (10, 10, 200)).save(os.path.join(self.root, 'profiles', '1', 'picture.jpg'))
+        os.utime(os.path.join(self.root, 'profiles', '1', 'picture.jpg'), (0, 0))
+        second = thumbnails.get_variant(self.root, 'profiles/1/picture.jpg', 'avatar_64')
+        self.assertNotEqual(first, second)
+        self.assertEqual((64, 50), Image.open(os.path.join(self.root, second)).size)
+
+    def test_invalid_variants(self):
+        """
+        Ensure unknown variants, missing originals and other files are not found
+        """
+        for path in ['variants/huge/profiles/1/picture.jpg', 'variants/avatar_64/missing.jpg',
+                     'variants/avatar_64/notes.txt', 'variants/avatar_64/',
+                     'variants/avatar_64/../../etc/passwd', 'variants/cache/x-avatar_64.jpg']:
+            self.assertRaises(Http404, self.get, path)
+
+    def test_traversal_and_special_files(self):
+        """
+        Ensure variants are only made of regular files within the media directory
+        """
+        os.symlink('/dev/zero', os.path.join(self.root, 'zero.jpg'))
+        os.makedirs(os.path.join(self.root, 'directory.jpg'))
+        for path in ['../picture.jpg', '/dev/zero', '//dev/zero', 'zero.jpg', 'directory.jpg']:
+            self.assertRaises(Http404, thumbnails.get_variant, self.root, path, 'avatar_64')
+
+    @override_settings(MEDIA_VARIANT_MAX_PIXELS=800 * 600 - 1)
+    def test_too_large_original(self):
+        """
+        Ensure originals with too many pixels are not decoded
+        """
+        self.assertRaises(Http404, self.get, 'variants/avatar_64/profiles/1/picture.jpg')
+        self.assertFalse(os.path.exists(os.path.join(self.root, 'variants')))
+
+    def test_original(self):
+        """
+        Ensure originals are still served
+        """
+        response = self.get('profiles/1/picture.jpg')
+        self.assertEqual(200, response.status_code)
+
+    def test_variant_paths(self):
+        """
+        Ensure serializers get a path per variant, and none without media
+        """
+        self.assertEqual({'avatar_64': 'variants/avatar_64/profiles/1/picture.jpg',
+                          'avatar_128': 'variants/avatar_128/profiles/1/picture.jpg'},
+                         thumbnails.variant_paths('profiles/1/picture.jpg', thumbnails.AVATAR_VARIANTS))
+        self.assertEqual({}, thumbnails.variant_paths('', thumbnails.AVATAR_VARIANTS))
+
+
+class MediaServingTests(TestCase):
+
+    def setUp(self):
+        """
+        Make a media directory with a file of 1000 bytes
+        """
+        self.root = tempfile.mkdtemp()
+        self.content = bytes(range(250)) * 4
+        with open(os.path.join(self.root, 'file.bin'), 'wb') as f:
+            f.write(self.content)
+        os.makedirs(os.path.join(self.root, 'dir'))
+        thumbnails.digests.clear()
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def get(self, path, **extra):
+        request = RequestFactory().get('/api/v1/media/' + path, **extra)
+        return MediaViewSet.get_media(request, path.split('?')[0], self.root)
+
+    def test_etag_and_cache_headers(self):
+        """
+        Ensure the whole file is streamed with a content hash ETag
+        """
+        response = self.get('file.bin')
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(self.content, b''.join(response.streaming_content))
+        self.assertEqual('1000', response['Content-Length'])
+        self.assertEqual('"%s"' % hashlib.sha1(self.content).hexdigest(), response['ETag'])
+        self.assertEqual('bytes', response['Accept-Ranges'])
+        self.assertEqual('public, max-age=3600', response['Cache-Control'])
+
+    def test_immutable(self):
+        """
+        Ensure URLs holding the content hash are cached for good
+        """
+        digest = hashlib.sha1(self.content).hexdigest()
+        response = self.get('file.bin?v=' + digest)
+        self.assertEqual('public, max-age=31536000, immutable', response['Cache-Control'])
+        response = self.get('file.bin?v=old')
+        self.assertEqual('public, max-age=3600', response['Cache-Control'])
+
+    def test_not_modified(self):
+        """
+        Ensure a matching If-None-Match gets an empty 304
+        """
+        etag = self.get('file.bin')['ETag']
+        response = self.get('file.bin', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(304, response.status_code)
+        self.assertEqual(etag, response['ETag'])
+        response = self.get('file.bin', HTTP_IF_NONE_MATCH='"other"')
+        self.assertEqual(200, response.status_code)
+
+    def test_ranges(self):
+        """
+        Ensure single byte ranges get 206, and unsatisfiable ones 416
+        """
+        for header, first, last in [('bytes=0-99', 0, 99), ('bytes=900-', 900, 999), ('bytes=-10', 990, 999),
+                                    ('bytes=950-5000', 950, 999)]:
+            response = self.get('file.bin', HTTP_RANGE=header)
+            self.assertEqual(206, response.status_code)
+            self.assertEqual('bytes %d-%d/1000' % (first, last), response['Content-Range'])
+            self.assertEqual(str(last - first + 1), response['Content-Length'])
+            self.assertEqual(self.content[first:last + 1], b''.join(response.streaming_content))
+        response = self.get('file.bin', HTTP_RANGE='bytes=1000-')
+        self.assertEqual(416, response.status_code)
+        self.assertEqual('bytes */1000', response['Content-Range'])
+        # Multiple ranges, and ranges of an outdated version, get the whole file
+        response = self.get('file.bin', HTTP_RANGE='bytes=0-1,5-6')
+        self.assertEqual(200, response.status_code)
+        response = self.get('file.bin', HTTP_RANGE='bytes=0-1', HTTP_IF_RANGE='"old"')
+        self.assertEqual(200, response.status_code)
+
+    @override_settings(MEDIA_SENDFILE='X-Accel-Redirect', MEDIA_SENDFILE_PREFIX='/protected-media/')
+    def test_x_accel_redirect(self):
+        """
+        Ensure the body is left to nginx
+        """
+        response = self.get('file.bin')
+        self.assertEqual(200, response.status_code)
+        self.assertEqual('/protected-media/file.bin', response['X-Accel-Redirect'])
+        self.assertEqual(b'', response.content)
+        self.assertTrue('ETag' in response)
+
+    @override_settings(MEDIA_SENDFILE='X-Sendfile')
+    def test_x_sendfile(self):
+        """
+        Ensure the body is left to the web server
+        """
+        response = self.get('file.bin')
+        self.assertEqual(os.path.join(os.path.realpath(self.root), 'file.bin'),
+                         os.path.realpath(response['X-Sendfile']))
+        self.assertEqual(b'', response.content)
+
+    def test_not_found(self):
+        """
+        Ensure directories, missing files and paths outside the media directory are not found
+        """
+        for path in ['dir', 'missing.bin', '../file.bin', '/etc/passwd']:
+            self.assertRaises(Http404, self.get, path)
+
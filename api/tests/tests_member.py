@@ -1,10 +1,13 @@
 from django.contrib.auth.hashers import make_password
 from django.core import mail
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
 from django.contrib.auth.models import User
 import time
 
 from api.tests.api_test_case import CustomAPITestCase
+from api.utils.notifier import Notifier
 from core.models import Member, Community, LocalCommunity, TransportCommunity, Profile, Notification
 
 
@@ -135,6 +138,33 @@ class MemberTests(CustomAPITestCase):
                          '[SmarTribe] Nouveau membre')
         self.assertTrue('fait désormais' in mail.outbox[0].body)
 
+    def test_notify_new_member_many_moderators(self):
+        """
+        Ensure the moderators of a community are notified with a constant number of queries
+        """
+        community = Community.objects.get(id=5)
+        for i in range(20):
+            moderator = self.user_model.objects.create(password=make_password('mod'), email='mod%d@test.com' % i,
+                                                       first_name='mod%d' % i, last_name='User', is_active=True)
+            if i:
+                Profile.objects.create(user=moderator, mail_notification=(i != 1))
+            Member.objects.create(user=moderator, community=community, role='1', status='1')
+        other = self.user_model.objects.get(id=4)
+        small = Member.objects.create(user=other, community=Community.objects.get(id=1), role='2', status='0')
+        large = Member.objects.create(user=other, community=community, role='2', status='0')
+
+        with CaptureQueriesContext(connection) as small_queries:
+            Notifier.notify_new_member(Member.objects.get(id=small.id))
+        with CaptureQueriesContext(connection) as large_queries:
+            Notifier.notify_new_member(Member.objects.get(id=large.id))
+
+        self.assertEqual(len(small_queries), len(large_queries))
+        self.assertEqual(22, Notification.objects.count())
+        # The moderator without profile and the one without mail notification get no mail
+        self.assertEqual(1 + 19, len(mail.outbox))
+        self.assertEqual(set(['user1@test.com'] + ['mod%d@test.com' % i for i in range(2, 20)]),
+                         set(m.to[0] for m in mail.outbox[1:]))
+
     def test_leave_community(self):
         """
         Ensure a member can leave a community
@@ -93,6 +93,24 @@ class MessageTests(CustomAPITestCase):
         data = response.data
         self.assertEqual(3, data['count'])
 
+    def test_list_messages_cursor(self):
+        """
+        Ensure messages can be paged with a cursor, oldest first
+        """
+        url = '/api/v1/messages/?page_size=2&cursor='
+
+        response = self.client.get(url, HTTP_AUTHORIZATION=self.auth('user3'))
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual([1, 2], [message['id'] for message in response.data['results']])
+        self.assertNotIn('count', response.data)
+
+        response = self.client.get(response.data['next'], HTTP_AUTHORIZATION=self.auth('user3'))
+        self.assertEqual([3], [message['id'] for message in response.data['results']])
+        self.assertIsNone(response.data['next'])
+
+        response = self.client.get('/api/v1/messages/?offer__id=1&cursor=', HTTP_AUTHORIZATION=self.auth('user3'))
+        self.assertEqual([1, 2], [message['id'] for message in response.data['results']])
+
     def test_send_message(self):
         url = '/api/v1/messages/'
         data = {
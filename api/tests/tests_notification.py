@@ -0,0 +1,245 @@
+import threading
+import time
+
+from django.contrib.admin.models import LogEntry, CHANGE, DELETION
+from django.contrib.auth.hashers import make_password
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.test.utils import override_settings
+from django.utils.six.moves.urllib.parse import urlparse, parse_qs
+from rest_framework import status
+from api.tests.api_test_case import CustomAPITestCase
+from api.utils import notification_events
+from api.utils.notifier import Notifier
+from core.models import Profile, Notification, UserStats
+
+
+class NotificationTests(CustomAPITestCase):
+
+    def setUp(self):
+        """
+        Make a user with a notification
+        """
+        user1 = self.user_model.objects.create(password=make_password('user1'), email='user1@test.com',
+                                               first_name='1', last_name='User', is_active=True)
+        user2 = self.user_model.objects.create(password=make_password('user2'), email='user2@test.com',
+                                               first_name='2', last_name='User', is_active=True)
+        Profile.objects.create(user=user1, mail_notification=False)
+        Profile.objects.create(user=user2, mail_notification=False)
+        Notification.objects.create(user=user1, title='title', message='message', link='/offers/1/')
+
+    def notify(self, email):
+        Notifier.notify(photo=None, user=self.user_model.objects.get(email=email), title='title',
+                        message='message', link='/offers/1/', mail_subject='subject', mail_body='body')
+
+    def test_unread_count(self):
+        """
+        Ensure the unread counter follows notifications, tags and deletions
+        """
+        url = '/api/v1/notifications/0/unread_count/'
+        response = self.client.get(url, HTTP_AUTHORIZATION=self.auth('user1'))
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(1, response.data['unread_count'])
+
+        self.notify('user1@test.com')
+        self.notify('user1@test.com')
+        self.assertEqual(3, UserStats.objects.get(user__email='user1@test.com').unread_notifications_count)
+
+        response = self.client.post('/api/v1/notifications/1/tag_as_seen/', HTTP_AUTHORIZATION=self.auth('user1'))
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        # Tagging twice counts once
+        response = self.client.post('/api/v1/notifications/1/tag_as_seen/', HTTP_AUTHORIZATION=self.auth('user1'))
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        response = self.client.delete('/api/v1/notifications/2/', HTTP_AUTHORIZATION=self.auth('user1'))
+        self.assertEqual(status.HTTP_204_NO_CONTENT, response.status_code)
+
+        response = self.client.get(url, HTTP_AUTHORIZATION=self.auth('user1'))
+        self.assertEqual(1, response.data['unread_count'])
+        response = self.client.get(url, HTTP_AUTHORIZATION=self.auth('user2'))
+        self.assertEqual(0, response.data['unread_count'])
+
+    def test_unread_count_without_auth(self):
+        """
+        Ensure an unauthenticated user cannot read the counter
+        """
+        response = self.client.get('/api/v1/notifications/0/unread_count/')
+        self.assertEqual(status.HTTP_401_UNAUTHORIZED, response.status_code)
+
+    def test_mark_all_seen(self):
+        """
+        Ensure every unseen notification of the user is tagged in one query
+        """
+        self.notify('user1@test.com')
+        self.notify('user2@test.com')
+        UserStats.objects.get_for_user(self.user_model.objects.get(email='user1@test.com').id)
+
+        url = '/api/v1/notifications/0/mark_all_seen/'
+        response = self.client.post(url, HTTP_AUTHORIZATION=self.auth('user1'))
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(2, response.data['count'])
+        self.assertEqual(0, Notification.objects.filter(user__email='user1@test.com', seen=False).count())
+        self.assertEqual(1, Notification.objects.filter(user__email='user2@test.com', seen=False).count())
+        self.assertEqual(0, UserStats.objects.get(user__email='user1@test.com').unread_notifications_count)
+        self.assertEqual('Tagged 2 as seen: all', LogEntry.objects.latest('id').change_message)
+
+        response = self.client.post(url)
+        self.assertEqual(status.HTTP_401_UNAUTHORIZED, response.status_code)
+
+    def test_wait_returns_newer_notifications(self):
+        """
+        Ensure wait returns at once the notifications newer than 'since'
+        """
+        self.notify('user1@test.com')
+        response = self.client.get('/api/v1/notifications/0/wait/?since=1',
+                                   HTTP_AUTHORIZATION=self.auth('user1'))
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(1, len(response.data['results']))
+        self.assertEqual(2, response.data['results'][0]['id'])
+        self.assertEqual(2, response.data['unread_count'])
+
+    def test_wait_timeout(self):
+        """
+        Ensure wait returns an empty list once the timeout is over
+        """
+        start = time.time()
+        response = self.client.get('/api/v1/notifications/0/wait/?since=1&timeout=0.2',
+                                   HTTP_AUTHORIZATION=self.auth('user1'))
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual([], response.data['results'])
+        self.assertTrue(time.time() - start >= 0.2)
+
+    @override_settings(NOTIFICATION_WAIT_TIMEOUT=0.1)
+    def test_wait_timeout_capped(self):
+        """
+        Ensure the timeout of the client cannot exceed NOTIFICATION_WAIT_TIMEOUT
+        """
+        start = time.time()
+        response = self.client.get('/api/v1/notifications/0/wait/?since=1&timeout=60',
+                                   HTTP_AUTHORIZATION=self.auth('user1'))
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertTrue(time.time() - start < 5)
+
+    @override_settings(NOTIFICATION_MAX_WAITERS=0)
+    def test_wait_waiters_capped(self):
+        """
+        Ensure wait returns at once when the process has as many waiters as allowed
+        """
+        start = time.time()
+        response = self.client.get('/api/v1/notifications/0/wait/?since=1&timeout=10',
+                                   HTTP_AUTHORIZATION=self.auth('user1'))
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual([], response.data['results'])
+        self.assertTrue(time.time() - start < 5)
+
+    def test_wait_invalid_since(self):
+        """
+        Ensure wait requires an integer 'since'
+        """
+        response = self.client.get('/api/v1/notifications/0/wait/', HTTP_AUTHORIZATION=self.auth('user1'))
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+        response = self.client.get('/api/v1/notifications/0/wait/?since=x', HTTP_AUTHORIZATION=self.auth('user1'))
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+
+    def test_wait_invalid_timeout(self):
+        """
+        Ensure wait rejects a timeout which is not a finite positive number
+        """
+        for timeout in ('nan', 'inf', '-1', 'x'):
+            response = self.client.get('/api/v1/notifications/0/wait/?since=1&timeout=' + timeout,
+                                       HTTP_AUTHORIZATION=self.auth('user1'))
+            self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+
+    def test_events_wait_is_woken_up(self):
+        """
+        Ensure a waiter is woken up by a publication, and only for its user
+        """
+        version = notification_events.version(1)
+        timer = threading.Timer(0.1, notification_events.publish, args=([1], ))
+        timer.start()
+        start = time.time()
+        self.assertTrue(notification_events.wait(1, version, 10))
+        self.assertTrue(time.time() - start < 5)
+        self.assertFalse(notification_events.wait(2, notification_events.version(2), 0.1))
+        timer.join()
+
+    @override_settings(NOTIFICATION_MAX_WAITERS=1)
+    def test_events_waiter_slot(self):
+        """
+        Ensure at most NOTIFICATION_MAX_WAITERS requests wait at once, slots being given back
+        """
+        with notification_events.waiter_slot() as first:
+            with notification_events.waiter_slot() as second:
+                self.assertTrue(first)
+                self.assertFalse(second)
+        with notification_events.waiter_slot() as third:
+            self.assertTrue(third)
+
+    def test_bulk_tag_as_seen(self):
+        """
+        Ensure the given notifications of the user are tagged in one UPDATE, with one audit entry
+        """
+        UserStats.objects.get_for_user(self.user_model.objects.get(email='user1@test.com').id)
+        for email in ['user1@test.com', 'user1@test.com', 'user2@test.com']:
+            self.notify(email)
+        url = '/api/v1/notifications/0/bulk_tag_as_seen/'
+        data = {'ids': [1, 2, 4]}
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(url, data, HTTP_AUTHORIZATION=self.auth('user1'), format='json')
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        # The notification of user2 is not tagged
+        self.assertEqual(2, response.data['count'])
+        self.assertEqual([3], list(Notification.objects.filter(seen=False, user__email='user1@test.com')
+                                   .values_list('id', flat=True)))
+        self.assertEqual(1, Notification.objects.filter(id=4, seen=False).count())
+        self.assertEqual(1, UserStats.objects.get(user__email='user1@test.com').unread_notifications_count)
+        self.assertEqual(1, len([q for q in queries.captured_queries
+                                 if 'UPDATE "core_notification"' in q['sql']]))
+        entry = LogEntry.objects.get(action_flag=CHANGE)
+        self.assertEqual('Tagged 2 as seen: ids 1, 2, 4', entry.change_message)
+
+    def test_bulk_tag_as_seen_before_cursor(self):
+        """
+        Ensure the notifications up to a cursor of the list are tagged
+        """
+        for i in range(3):
+            self.notify('user1@test.com')
+        response = self.client.get('/api/v1/notifications/?cursor=&page_size=2', HTTP_AUTHORIZATION=self.auth('user1'))
+        before = parse_qs(urlparse(response.data['next']).query)['cursor'][0]
+        response = self.client.post('/api/v1/notifications/0/bulk_tag_as_seen/', {'before': before},
+                                    HTTP_AUTHORIZATION=self.auth('user1'), format='json')
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(2, response.data['count'])
+        self.assertEqual([3, 4], list(Notification.objects.filter(seen=False).values_list('id', flat=True)))
+
+    def test_bulk_delete(self):
+        """
+        Ensure the given notifications of the user are deleted in one DELETE, with one audit entry
+        """
+        UserStats.objects.get_for_user(self.user_model.objects.get(email='user1@test.com').id)
+        for email in ['user1@test.com', 'user1@test.com', 'user2@test.com']:
+            self.notify(email)
+        self.client.post('/api/v1/notifications/2/tag_as_seen/', HTTP_AUTHORIZATION=self.auth('user1'))
+        url = '/api/v1/notifications/0/bulk_delete/'
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(url, {'ids': [1, 2, 4]}, HTTP_AUTHORIZATION=self.auth('user1'), format='json')
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(2, response.data['count'])
+        self.assertEqual([3, 4], list(Notification.objects.values_list('id', flat=True).order_by('id')))
+        # Only the unseen deleted notification is uncounted
+        self.assertEqual(1, UserStats.objects.get(user__email='user1@test.com').unread_notifications_count)
+        self.assertEqual(1, len([q for q in queries.captured_queries
+                                 if 'DELETE FROM "core_notification"' in q['sql']]))
+        self.assertEqual(1, LogEntry.objects.filter(action_flag=DELETION).count())
+
+    def test_bulk_invalid_input(self):
+        """
+        Ensure bulk actions require valid ids or cursor, and an authenticated user
+        """
+        url = '/api/v1/notifications/0/bulk_delete/'
+        for data in [{}, {'ids': 'abc'}, {'ids': ['x']}, {'before': 'abc'}]:
+            response = self.client.post(url, data, HTTP_AUTHORIZATION=self.auth('user1'), format='json')
+            self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+        response = self.client.post(url, {'ids': [1]}, format='json')
+        self.assertEqual(status.HTTP_401_UNAUTHORIZED, response.status_code)
+        self.assertEqual(1, Notification.objects.count())
+
@@ -1,11 +1,13 @@
 from django.contrib.auth.hashers import make_password
 from django.core import mail
 from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
 import time
 
 from api.tests.api_test_case import CustomAPITestCase
-from core.models import Community, Member, SkillCategory, Request, Offer, Profile
+from core.models import Community, Member, SkillCategory, Request, Offer, Profile, Evaluation
 from core.models.notification import Notification
 import core.utils
 
@@ -147,3 +149,23 @@ class OfferTests(CustomAPITestCase):
         offers = Offer.objects.filter(request__id=1)
         for offer in offers:
             self.assertTrue(offer.closed)
+
+    def test_list_offers_constant_queries(self):
+        """
+        Ensure listing offers does not run queries per offer
+        """
+        url = '/api/v1/offers/'
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, HTTP_AUTHORIZATION=self.auth('user1'))
+        count = response.data['count']
+        self.assertFalse(response.data['results'][0]['is_evaluated'])
+
+        offer = Offer.objects.filter(request__user__email='user1@test.com')[0]
+        Evaluation.objects.create(offer=offer, mark=Evaluation.GOOD, comment='good')
+        Offer.objects.create(request=offer.request, user=offer.user, detail='offer again')
+        with CaptureQueriesContext(connection) as more_queries:
+            response = self.client.get(url, HTTP_AUTHORIZATION=self.auth('user1'))
+        self.assertEqual(count + 1, response.data['count'])
+        evaluated = dict((result['id'], result['is_evaluated']) for result in response.data['results'])
+        self.assertTrue(evaluated[offer.id])
+        self.assertEqual(len(queries), len(more_queries))
@@ -1,9 +1,13 @@
 from django.contrib.auth import get_user_model
 from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils.six import StringIO
 from rest_framework import status
 
 from api.tests.api_test_case import CustomAPITestCase
-from core.models import Profile
+from core.models import Profile, UserStats, SkillCategory, Skill, Request
 from core.models.donation import Donation
 
 
@@ -180,3 +184,54 @@ class ProfileTests(CustomAPITestCase):
         self.assertEqual(1, data['count'])
         self.assertEqual(2, Profile.objects.all().count())
 
+    def test_profile_level_follows_activity(self):
+        """
+        Ensure the level is read from the materialized user stats and follows user activity
+        """
+        url = '/api/v1/profiles/1/'
+        response = self.client.get(url, HTTP_AUTHORIZATION=self.auth('user1'))
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        level = response.data['level']
+
+        user1 = self.user_model.objects.get(id=1)
+        category = SkillCategory.objects.create(name='cat', detail='desc')
+        Request.objects.create(user=user1, category=category, title='help', detail='det help')
+        Skill.objects.create(user=user1, category=category, title='skill')
+        stats = UserStats.objects.get(user=user1)
+        self.assertEqual(1, stats.requests_count)
+        self.assertEqual(1, stats.skills_count)
+
+        response = self.client.get(url, HTTP_AUTHORIZATION=self.auth('user1'))
+        self.assertAlmostEqual(level + 0.35, response.data['level'], places=2)
+
+    def test_rebuild_user_stats(self):
+        """
+        Ensure the rebuild command recomputes the stats of every user
+        """
+        user2 = self.user_model.objects.get(id=2)
+        category = SkillCategory.objects.create(name='cat', detail='desc')
+        Request.objects.create(user=user2, category=category, title='help', detail='det help')
+        Request.objects.create(user=user2, category=category, title='help', detail='det help')
+        self.assertFalse(UserStats.objects.exists())
+
+        call_command('rebuild_user_stats', stdout=StringIO())
+        self.assertEqual(2, UserStats.objects.count())
+        self.assertEqual(0, UserStats.objects.get(user=1).requests_count)
+        self.assertEqual(2, UserStats.objects.get(user=2).requests_count)
+
+    def test_user_stats_created_before_computed(self):
+        """
+        Ensure the stats row exists before the counters are computed, so that concurrent increments apply
+        """
+        user2 = self.user_model.objects.get(id=2)
+        category = SkillCategory.objects.create(name='cat', detail='desc')
+        Request.objects.create(user=user2, category=category, title='help', detail='det help')
+
+        with CaptureQueriesContext(connection) as queries:
+            stats = UserStats.objects.get_for_user(user2.id)
+        statements = [query['sql'] for query in queries.captured_queries]
+        insert = [i for i, sql in enumerate(statements) if 'INSERT INTO "core_userstats"' in sql][0]
+        count = [i for i, sql in enumerate(statements) if 'COUNT(' in sql][0]
+        self.assertTrue(insert < count)
+        self.assertEqual(1, stats.requests_count)
+        self.assertEqual(1, UserStats.objects.get(user=user2).requests_count)
@@ -1,9 +1,14 @@
 from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils.six import StringIO
 from rest_framework import status
 
 from api.tests.api_test_case import CustomAPITestCase
-from core.models import Community, Member, SkillCategory, Request, Skill, Profile
+from core.models import Community, Member, SkillCategory, Request, Skill, Profile, Offer, CoMembership
+from core.models.donation import Donation
 import core.utils
 
 
@@ -128,6 +133,34 @@ class RequestTests(CustomAPITestCase):
         data = response.data
         self.assertEqual(2, data['count'])
 
+    def test_list_my_requests_cursor(self):
+        """
+        Ensure a cursor walks through every request once, newest first, without counting them
+        """
+        user1 = self.user_model.objects.get(email='user1@test.com')
+        category = SkillCategory.objects.get(name='cat1')
+        for i in range(5):
+            Request.objects.create(user=user1, category=category, title='more' + str(i), detail='det')
+        url = '/api/v1/requests/0/list_my_requests/?page_size=3&cursor='
+
+        ids = []
+        pages = 0
+        while url:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url, HTTP_AUTHORIZATION=self.auth('user1'))
+            self.assertEqual(status.HTTP_200_OK, response.status_code)
+            self.assertFalse(any('COUNT(*)' in query['sql'] and 'core_offer' not in query['sql']
+                                 for query in queries.captured_queries))
+            ids.extend(result['id'] for result in response.data['results'])
+            url = response.data['next']
+            pages += 1
+        self.assertEqual(3, pages)
+        self.assertEqual(sorted(Request.objects.filter(user=user1).values_list('id', flat=True), reverse=True), ids)
+
+        response = self.client.get('/api/v1/requests/0/list_my_requests/?cursor=bad',
+                                   HTTP_AUTHORIZATION=self.auth('user1'))
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+
     def test_list_my_requests_user5(self):
         """
 
@@ -258,3 +291,100 @@ class RequestTests(CustomAPITestCase):
         self.assertEqual(1, data['results'][0]['id'])
         self.assertEqual(3, data['results'][1]['id'])
         self.assertEqual(4, data['results'][2]['id'])
+
+    def test_list_request_constant_queries(self):
+        """
+        Ensure listing requests does not run queries per request
+        """
+        url = '/api/v1/requests/'
+        user1 = self.user_model.objects.get(email='user1@test.com')
+        user2 = self.user_model.objects.get(email='user2@test.com')
+        Offer.objects.create(request=Request.objects.get(title='help3'), user=user1, detail='offer')
+        Offer.objects.create(request=Request.objects.get(title='help3'), user=user1, detail='offer 2')
+        Donation.objects.create(user=user2, amount=10)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, HTTP_AUTHORIZATION=self.auth('user1'))
+        results = dict((result['title'], result) for result in response.data['results'])
+        self.assertEqual(2, results['help3']['offers_count'])
+        self.assertEqual(0, results['help1']['offers_count'])
+        self.assertTrue(results['help3']['user_is_donor'])
+        self.assertFalse(results['help1']['user_is_donor'])
+        self.assertEqual('profiles/user1.jpg', results['help3']['user_photo'])
+
+        category = SkillCategory.objects.get(name='cat1')
+        for i in range(5):
+            Request.objects.create(user=user2, category=category, title='more' + str(i), detail='det')
+        with CaptureQueriesContext(connection) as more_queries:
+            response = self.client.get(url, HTTP_AUTHORIZATION=self.auth('user1'))
+        self.assertEqual(10, response.data['count'])
+        self.assertEqual(len(queries), len(more_queries))
+
+    def test_list_request_follows_memberships(self):
+        """
+        Ensure the visible requests follow membership changes
+        """
+        url = '/api/v1/requests/'
+        user3 = self.user_model.objects.get(email='user3@test.com')
+        community1 = Community.objects.get(name='com1')
+
+        Member.objects.get(user=user3, community=community1).delete()
+        self.assertEqual(4, self.client.get(url, HTTP_AUTHORIZATION=self.auth('user1')).data['count'])
+        self.assertEqual(0, self.client.get(url, HTTP_AUTHORIZATION=self.auth('user3')).data['count'])
+
+        member = Member.objects.create(user=user3, community=community1, role='2', status='0')
+        self.assertEqual(5, self.client.get(url, HTTP_AUTHORIZATION=self.auth('user1')).data['count'])
+        self.assertEqual(0, self.client.get(url, HTTP_AUTHORIZATION=self.auth('user3')).data['count'])
+
+        member.status = '1'
+        member.save()
+        self.assertEqual(3, self.client.get(url, HTTP_AUTHORIZATION=self.auth('user3')).data['count'])
+
+    def test_refresh_co_memberships_writes_difference(self):
+        """
+        Ensure a membership change only writes the pairs which changed
+        """
+        user3 = self.user_model.objects.get(email='user3@test.com')
+        member = Member.objects.get(user=user3, community=Community.objects.get(name='com1'))
+        before = dict(((user_id, peer_id), pk) for pk, user_id, peer_id
+                      in CoMembership.objects.values_list('id', 'user', 'peer'))
+        member.status = '0'
+        member.save()
+        after = dict(((user_id, peer_id), pk) for pk, user_id, peer_id
+                     in CoMembership.objects.values_list('id', 'user', 'peer'))
+        self.assertNotEqual(set(before), set(after))
+        for pair in set(before) & set(after):
+            self.assertEqual(before[pair], after[pair])
+        self.assertEqual(set(CoMembership.objects.compute()), set(after))
+
+    def test_refresh_co_memberships_follows_memberships(self):
+        """
+        Ensure the stored pairs match the memberships after each change, pairs linked by another
+        community being kept
+        """
+        user1 = self.user_model.objects.get(email='user1@test.com')
+        user3 = self.user_model.objects.get(email='user3@test.com')
+        community1 = Community.objects.get(name='com1')
+        community2 = Community.objects.get(name='com2')
+        Member.objects.filter(user=user1).delete()
+        Member.objects.filter(user=user3).delete()
+        changes = [
+            lambda: Member.objects.create(user=user1, community=community1, role='2', status='1'),
+            lambda: Member.objects.create(user=user1, community=community2, role='2', status='1'),
+            lambda: Member.objects.create(user=user3, community=community1, role='2', status='0'),
+            lambda: Member.objects.create(user=user3, community=community2, role='2', status='1'),
+            lambda: Member.objects.get(user=user1, community=community1).delete(),
+            lambda: Member.objects.filter(user=user3, community=community2).get().delete(),
+            lambda: Member.objects.get(user=user3, community=community1).delete(),
+        ]
+        for change in changes:
+            change()
+            self.assertEqual(CoMembership.objects.compute(), set(CoMembership.objects.values_list('user', 'peer')))
+
+    def test_rebuild_co_memberships(self):
+        """
+        Ensure the co-membership index can be rebuilt from memberships
+        """
+        pairs = set(CoMembership.objects.values_list('user', 'peer'))
+        CoMembership.objects.all().delete()
+        call_command('rebuild_co_memberships', stdout=StringIO())
+        self.assertEqual(pairs, set(CoMembership.objects.values_list('user', 'peer')))
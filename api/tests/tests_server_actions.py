@@ -6,12 +6,14 @@ from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import User
 from django.core import mail
 from django.core.cache import cache
+from django.core.management import call_command
 from django.utils import timezone
+from django.utils.six import StringIO
 from rest_framework import status
 
 from api.tests.api_test_case import CustomAPITestCase
-from core.models import SkillCategory, Request, Inappropriate, PasswordRecovery
-import core.utils
+from core.models import SkillCategory, Request, Offer, Inappropriate, PasswordRecovery, ActivationToken, \
+    ReportedContent
 from smartribe import settings
 
 
@@ -43,6 +45,11 @@ class AutoCloseTests(CustomAPITestCase):
         request5 = Request.objects.create(user=user1, category=skill_cat, title='help5', detail='det help5',
                            expected_end_date=yesterday-datetime.timedelta(days=1), auto_close=True)
 
+        Offer.objects.create(request=request1, user=user1, detail='offer1')
+        Offer.objects.create(request=request1, user=user1, detail='offer2', closed=True)
+        Offer.objects.create(request=request2, user=user1, detail='offer3')
+        Offer.objects.create(request=request5, user=user1, detail='offer4')
+
     def test_auto_close_requests(self):
         """
 
@@ -56,6 +63,32 @@ class AutoCloseTests(CustomAPITestCase):
         self.assertFalse(Request.objects.get(id=3).closed)
         self.assertFalse(Request.objects.get(id=4).closed)
         self.assertTrue(Request.objects.get(id=5).closed)
+        self.assertEqual(datetime.date.today(), Request.objects.get(id=1).end_date)
+        self.assertEqual(2, response.data['requests'])
+        self.assertEqual(2, response.data['offers'])
+
+    def test_auto_close_requests_closes_offers(self):
+        """
+        Ensure the open offers of auto closed requests are closed, by id ranges
+        """
+        # Bounds, then per range: savepoint, offers, requests, release
+        with self.assertNumQueries(1 + 4 * 3):
+            stats = Request.objects.auto_close(batch_size=2)
+        self.assertEqual(2, stats['requests'])
+        self.assertEqual(2, stats['offers'])
+        self.assertEqual([1, 2, 4], list(Offer.objects.filter(closed=True).values_list('id', flat=True)
+                                                                            .order_by('id')))
+        self.assertEqual({'requests': 0, 'offers': 0}, {k: v for k, v in Request.objects.auto_close().items()
+                                                       if k != 'elapsed'})
+
+    def test_auto_close_requests_command(self):
+        """
+
+        """
+        out = StringIO()
+        call_command('auto_close_requests', batch_size=10, stdout=out)
+        self.assertIn('2 requests and 2 offers closed', out.getvalue())
+        self.assertEqual(2, Request.objects.filter(closed=True).count())
 
     def test_auto_close_requests_twice(self):
         """
@@ -92,14 +125,14 @@ class CleanPrtTests(CustomAPITestCase):
         user4 = self.user_model.objects.create(password=make_password('user4'), email='user4@test.com',
                                                first_name='4', last_name='User', is_active=True)
 
-        prt1 = PasswordRecovery.objects.create(user=user1, token=core.utils.gen_temporary_token(),
-                                               ip_address='192.168.0.1')
-        prt2 = PasswordRecovery.objects.create(user=user2, token=core.utils.gen_temporary_token(),
-                                               ip_address='192.168.0.2')
-        prt3 = PasswordRecovery.objects.create(user=user3, token=core.utils.gen_temporary_token(),
-                                               ip_address='192.168.0.3')
-        prt4 = PasswordRecovery.objects.create(user=user4, token=core.utils.gen_temporary_token(),
-                                               ip_address='192.168.0.4')
+        prt1 = PasswordRecovery.objects.issue(user=user1,
+                                              ip_address='192.168.0.1')
+        prt2 = PasswordRecovery.objects.issue(user=user2,
+                                              ip_address='192.168.0.2')
+        prt3 = PasswordRecovery.objects.issue(user=user3,
+                                              ip_address='192.168.0.3')
+        prt4 = PasswordRecovery.objects.issue(user=user4,
+                                              ip_address='192.168.0.4')
 
         prt1.request_datetime = timezone.now() - datetime.timedelta(hours=settings.PRT_VALIDITY, minutes=1)
         prt2.request_datetime = timezone.now() - datetime.timedelta(hours=settings.PRT_VALIDITY, minutes=40)
@@ -125,6 +158,65 @@ class CleanPrtTests(CustomAPITestCase):
         self.assertFalse(PasswordRecovery.objects.filter(id=2).exists())
         self.assertTrue(PasswordRecovery.objects.filter(id=3).exists())
         self.assertTrue(PasswordRecovery.objects.filter(id=4).exists())
+        self.assertEqual({'passwordrecovery': 2, 'activationtoken': 0}, response.data)
+
+    def test_clean_dry_run(self):
+        """
+        """
+        url = '/api/v1/server_actions/clean_password_recovery_tokens/'
+        response = self.client.post(url, {'dry_run': True}, format='json')
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual({'passwordrecovery': 2, 'activationtoken': 0}, response.data)
+        self.assertEqual(4, PasswordRecovery.objects.all().count())
+
+    def test_clean_dry_run_false(self):
+        """
+        Ensure 'dry_run' given as a false string deletes the tokens
+        """
+        url = '/api/v1/server_actions/clean_password_recovery_tokens/'
+        response = self.client.post(url, {'dry_run': 'false'})
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(2, PasswordRecovery.objects.all().count())
+
+        # Throttled once a day
+        cache.clear()
+        response = self.client.post(url, {'dry_run': '0'})
+        self.assertEqual({'passwordrecovery': 0, 'activationtoken': 0}, response.data)
+
+    def test_tokens_of_user(self):
+        """
+        Ensure tokens are reachable from their user, with their expiry
+        """
+        user = PasswordRecovery.objects.get(id=1).user
+        ActivationToken.objects.issue(user=user)
+        self.assertEqual(1, user.activationtoken_set.all().count())
+        self.assertEqual(0, user.activationtoken_set.expired().count())
+        self.assertEqual(list(PasswordRecovery.objects.expired().filter(user=user).order_by('id')),
+                         list(user.passwordrecovery_set.expired().order_by('id')))
+
+    def test_clean_command(self):
+        """
+        Ensure expired tokens of both models are deleted by chunks
+        """
+        for user in self.user_model.objects.all():
+            token = ActivationToken.objects.issue(user=user)
+            if user.id != 4:
+                token.request_datetime = timezone.now() - datetime.timedelta(hours=settings.ACTIVATION_TOKEN_VALIDITY,
+                                                                             minutes=1)
+                token.save()
+
+        out = StringIO()
+        call_command('reap_expired_tokens', dry_run=True, stdout=out)
+        self.assertIn('activationtoken: 3 tokens to delete.', out.getvalue())
+        self.assertIn('passwordrecovery: 2 tokens to delete.', out.getvalue())
+        self.assertEqual(4, ActivationToken.objects.count())
+
+        out = StringIO()
+        call_command('reap_expired_tokens', batch_size=2, stdout=out)
+        self.assertIn('activationtoken: 3 tokens deleted.', out.getvalue())
+        self.assertIn('passwordrecovery: 2 tokens deleted.', out.getvalue())
+        self.assertEqual([4], list(ActivationToken.objects.values_list('user', flat=True)))
+        self.assertEqual(2, PasswordRecovery.objects.count())
 
 
 class ManageReportedObjectsTests(CustomAPITestCase):
@@ -165,7 +257,9 @@ class ManageReportedObjectsTests(CustomAPITestCase):
         time.sleep(0.5)
         self.assertEqual(1, len(mail.outbox))
         self.assertEqual(mail.outbox[0].subject,
-                         '[SmarTribe] Inappropriate content warning : tests0')
+                         '[SmarTribe] Inappropriate content warning : 1 contents')
+        self.assertIn('tests0 (6 reports)', mail.outbox[0].body)
+        self.assertEqual({'reported': 3, 'alerts': 1}, response.data)
 
     def test_manage2(self):
         """
@@ -179,11 +273,38 @@ class ManageReportedObjectsTests(CustomAPITestCase):
         response = self.client.post(url, REMOTE_ADDR='192.168.161.12')
         self.assertEqual(status.HTTP_200_OK, response.status_code)
         time.sleep(0.5)
-        self.assertEqual(2, len(mail.outbox))
+        self.assertEqual(1, len(mail.outbox))
         self.assertEqual(mail.outbox[0].subject,
-                         '[SmarTribe] Inappropriate content warning : tests0')
+                         '[SmarTribe] Inappropriate content warning : 2 contents')
+        self.assertIn('tests0 (6 reports)', mail.outbox[0].body)
+        self.assertIn('tests1 (6 reports)', mail.outbox[0].body)
+
+    def test_manage_incremental(self):
+        """
+        Ensure a run only counts the new reports, and alerts once per object
+        """
+        url = '/api/v1/server_actions/manage_reported_objects/'
+        self.client.post(url)
+        self.assertEqual(1, len(mail.outbox))
+
+        user = self.user_model.objects.get(id=1)
+        for identifier in ['tests0', 'tests2', 'tests2', 'tests2']:
+            Inappropriate.objects.create(user=user, content_identifier=identifier, detail='details')
+        cache.clear()
+        # Mark, new reports, one update per reported object, alerts, alerted mark and 2 savepoints
+        with self.assertNumQueries(10):
+            response = self.client.post(url)
+        self.assertEqual({'reported': 2, 'alerts': 1}, response.data)
+        self.assertEqual(2, len(mail.outbox))
         self.assertEqual(mail.outbox[1].subject,
-                         '[SmarTribe] Inappropriate content warning : tests1')
+                         '[SmarTribe] Inappropriate content warning : 1 contents')
+        self.assertIn('tests2 (6 reports)', mail.outbox[1].body)
+        self.assertEqual(7, ReportedContent.objects.get(content_identifier='tests0').total)
+
+        cache.clear()
+        response = self.client.post(url)
+        self.assertEqual({'reported': 0, 'alerts': 0}, response.data)
+        self.assertEqual(2, len(mail.outbox))
 
     def test_manage_twice(self):
         """  """
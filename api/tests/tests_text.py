@@ -3,6 +3,7 @@ from django.contrib.auth.hashers import make_password
 from django.core.cache import cache
 from rest_framework import status
 from api.tests.api_test_case import CustomAPITestCase
+from administration.models import ProxyText
 from core.models.text import Text
 
 
@@ -56,4 +57,23 @@ class TextTests(CustomAPITestCase):
         self.assertEqual(status.HTTP_200_OK, response.status_code)
 
         data = response.data
-        self.assertEqual("Text 2", data['content'])
\ No newline at end of file
+        self.assertEqual("Text 2", data['content'])
+
+    def test_get_text_cached_until_changed(self):
+        """
+        Ensure a text is served from the cache, until changed from the administration
+        """
+        url = "/api/v1/texts/TEXT1/"
+
+        etag = self.client.get(url, format='json')['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(url, format='json')
+        self.assertEqual("Text 1", response.data['content'])
+        self.assertEqual(etag, response['ETag'])
+
+        text = ProxyText.objects.get(tag="TEXT1")
+        text.content = "Text 1 changed"
+        text.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag, format='json')
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual("Text 1 changed", response.data['content'])
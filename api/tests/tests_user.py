@@ -1,12 +1,20 @@
+import datetime
+import re
+
 from django.contrib.auth.hashers import check_password, make_password
 from django.contrib.auth import get_user_model
+from django.core import mail
 from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from rest_framework import status
 
+from api.authenticate import user_cache
 from api.tests.api_test_case import CustomAPITestCase
 from core.models import PasswordRecovery, Profile
 from core.models.activation_token import ActivationToken
-from core.utils import gen_temporary_token
+from core.utils import gen_temporary_token, hash_token
 
 
 class UserTests(CustomAPITestCase):
@@ -34,8 +42,8 @@ class UserTests(CustomAPITestCase):
         profile4 = Profile.objects.create(user=user4)
         profile5 = Profile.objects.create(user=user5)
 
-        act_token1 = ActivationToken.objects.create(user=user2, token=gen_temporary_token())
-        act_token2 = ActivationToken.objects.create(user=user5, token=gen_temporary_token())
+        self.act_token1 = ActivationToken.objects.issue(user=user2)
+        act_token2 = ActivationToken.objects.issue(user=user5)
 
     def test_setup(self):
         self.assertEqual(5, self.model.objects.all().count())
@@ -99,8 +107,7 @@ class UserTests(CustomAPITestCase):
         """
         Ensure a user can activate his account
         """
-        token = ActivationToken.objects.get(id=1)
-        url = '/api/v1/users/'+token.token+'/confirm_registration/'
+        url = '/api/v1/users/'+self.act_token1.token+'/confirm_registration/'
 
         response = self.client.post(url, format='json')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -109,6 +116,30 @@ class UserTests(CustomAPITestCase):
         self.assertTrue(user.is_active)
         self.assertFalse(ActivationToken.objects.filter(id=1).exists())
 
+        response = self.client.post(url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_activate_account_expired_token(self):
+        """
+        Ensure an expired activation token is refused
+        """
+        ActivationToken.objects.filter(id=1).update(request_datetime=timezone.now() - datetime.timedelta(days=31))
+        url = '/api/v1/users/'+self.act_token1.token+'/confirm_registration/'
+
+        response = self.client.post(url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(self.model.objects.get(email='user2@test.com').is_active)
+
+    def test_tokens(self):
+        """
+        Ensure tokens are random, and only their digest is stored
+        """
+        tokens = set(gen_temporary_token() for _ in range(100))
+        self.assertEqual(100, len(tokens))
+        self.assertTrue(all(re.match('^[a-z0-9]{64}$', token) for token in tokens))
+        self.assertEqual(hash_token(self.act_token1.token), ActivationToken.objects.get(id=1).token_hash)
+        self.assertFalse(ActivationToken.objects.filter(token_hash=self.act_token1.token).exists())
+
     def test_recover_password(self):
         """
         Ensure a user can reset his password.
@@ -119,7 +150,8 @@ class UserTests(CustomAPITestCase):
         response = self.client.post(url, data, format='json')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
-        token = PasswordRecovery.objects.get(user=self.model.objects.get(email='user1@test.com')).token
+        token = re.search('/password/([a-z0-9]+)/edition', mail.outbox[0].body).group(1)
+        self.assertEqual(hash_token(token), PasswordRecovery.objects.get().token_hash)
         url = '/api/v1/users/'+token+'/set_new_password/'
         data = {'password': 'gloup'}
 
@@ -333,3 +365,40 @@ class UserTests(CustomAPITestCase):
 
         user = self.model.objects.get(id=1)
         self.assertTrue(check_password('newuser1', user.password))
+
+    def test_single_user_lookup_per_request(self):
+        """
+        Ensure authentication and permission checks share one user lookup
+        """
+        url = '/api/v1/users/1/'
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(url, {'last_name': 'Use'}, HTTP_AUTHORIZATION=self.auth('user1'),
+                                         format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        lookups = [q for q in queries.captured_queries
+                   if '"%s"."is_active" = %%s' % self.model._meta.db_table in q['sql']]
+        self.assertEqual(1, len(lookups))
+
+    def test_cached_user_lookup(self):
+        """
+        Ensure cached users are reused until they are saved
+        """
+        url = '/api/v1/users/0/get_my_user/'
+        token = self.auth('user1')
+        user_cache.ttl = 30
+        try:
+            self.client.get(url, HTTP_AUTHORIZATION=token, format='json')
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url, HTTP_AUTHORIZATION=token, format='json')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            lookups = [q for q in queries.captured_queries
+                       if '"%s"."is_active" = %%s' % self.model._meta.db_table in q['sql']]
+            self.assertEqual(0, len(lookups))
+
+            self.model.objects.filter(email='user1@test.com').update(last_name='Use')
+            self.model.objects.get(email='user1@test.com').save()
+            response = self.client.get(url, HTTP_AUTHORIZATION=token, format='json')
+            self.assertEqual('Use', response.data['last_name'])
+        finally:
+            user_cache.ttl = 0
+            user_cache.clear()
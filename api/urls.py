@@ -73,6 +73,9 @@ urlpatterns += patterns('',
                         ),
                         url(r'^v1/server_actions/manage_reported_objects/',
                             server_action.manage_reported_objects
+                        ),
+                        url(r'^v1/server_actions/database_pool_stats/',
+                            server_action.database_pool_stats
                         )
 )
 
@@ -1,23 +1,263 @@
-from django.core.mail import EmailMultiAlternatives
+import atexit
+import logging
+import os
+import queue
 import threading
+import time
 
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
 
-class EmailThread(threading.Thread):
-    def __init__(self, subject, body, from_email, recipient_list, fail_silently, html):
-        self.subject = subject
-        self.body = body
-        self.recipient_list = recipient_list
-        self.from_email = from_email
-        self.fail_silently = fail_silently
-        self.html = html
-        threading.Thread.__init__(self)
 
-    def run(self):
-        msg = EmailMultiAlternatives(self.subject, self.body, self.from_email, self.recipient_list)
-        if self.html:
-            msg.attach_alternative(self.html, "text/html")
-        msg.send(self.fail_silently)
+logger = logging.getLogger(__name__)
+
+# Backends without network I/O: nothing to offload, mails are sent inline (mail.outbox is filled by tests)
+INLINE_BACKENDS = (
+    'django.core.mail.backends.locmem.EmailBackend',
+    'django.core.mail.backends.console.EmailBackend',
+    'django.core.mail.backends.dummy.EmailBackend',
+)
+
+
+# Queued by stop(), one per worker
+_STOP = object()
+
+
+class MailDispatcher():
+    """
+    Sends mails from a bounded queue with a fixed pool of worker threads.
+
+    Each worker keeps its SMTP connection open while the queue is busy and sends
+    whatever is waiting (up to batch_size mails) over it, closing it after
+    idle_timeout seconds without mail.
+    A failed mail is retried max_retries times, waiting retry_backoff * 2 ** attempt seconds.
+    When the queue is full, the caller waits up to enqueue_timeout seconds, then sends the mail himself.
+    """
+
+    def __init__(self, workers=2, queue_size=500, batch_size=20, max_retries=3, retry_backoff=1.0,
+                 enqueue_timeout=5.0, idle_timeout=30.0, backend=None, connection_kwargs=None):
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.enqueue_timeout = enqueue_timeout
+        self.idle_timeout = idle_timeout
+        self.backend = backend
+        self.connection_kwargs = connection_kwargs or {}
+        self.queue = queue.Queue(maxsize=queue_size)
+        self._threads = []
+        self._pid = None
+        self._lock = threading.Lock()
+        self._metrics = {'queued': 0, 'sent': 0, 'sent_inline': 0, 'failed': 0, 'retries': 0,
+                         'connections': 0, 'latency_total': 0.0, 'latency_max': 0.0}
+
+    @classmethod
+    def from_settings(cls):
+        options = getattr(settings, 'MAIL_DISPATCHER', {})
+        return cls(workers=options.get('WORKERS', 2),
+                   queue_size=options.get('QUEUE_SIZE', 500),
+                   batch_size=options.get('BATCH_SIZE', 20),
+                   max_retries=options.get('MAX_RETRIES', 3),
+                   retry_backoff=options.get('RETRY_BACKOFF', 1.0),
+                   enqueue_timeout=options.get('ENQUEUE_TIMEOUT', 5.0),
+                   idle_timeout=options.get('IDLE_TIMEOUT', 30.0))
+
+    def submit(self, message, fail_silently=False):
+        """ Queues an EmailMessage """
+        self._ensure_workers()
+        try:
+            self.queue.put((message, fail_silently, time.time()), timeout=self.enqueue_timeout)
+        except queue.Full:
+            # Backpressure: the producer pays for the mail
+            logger.warning('Mail queue full, sending inline: %s', message.subject)
+            connection = self._send(None, message, fail_silently, time.time())
+            if connection is not None:
+                connection.close()
+                self._count('sent_inline')
+            return
+        self._count('queued')
+
+    def flush(self, timeout=None):
+        """
+        Waits until every queued mail is handled. Returns False on timeout.
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        while self.queue.unfinished_tasks:
+            if deadline is not None and time.time() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def stop(self, timeout=None):
+        """
+        Sends the queued mails, then stops the workers, closing their connections.
+        Returns False if a worker is still running after timeout. The next submit starts new workers.
+        """
+        with self._lock:
+            threads, self._threads = self._threads, []
+            self._pid = None
+        for _ in threads:
+            self.queue.put(_STOP)
+        deadline = None if timeout is None else time.time() + timeout
+        for thread in threads:
+            thread.join(None if deadline is None else max(deadline - time.time(), 0))
+        return not any(thread.is_alive() for thread in threads)
+
+    def metrics(self):
+        """
+        Returns the counters of the dispatcher, the queue depth and the send latencies (seconds,
+        from submission to delivery).
+        """
+        with self._lock:
+            metrics = dict(self._metrics)
+        delivered = metrics['sent']
+        metrics['latency_avg'] = metrics['latency_total'] / delivered if delivered else 0.0
+        metrics['queue_depth'] = self.queue.qsize()
+        return metrics
+
+    # Workers
+
+    def _ensure_workers(self):
+        # Threads do not survive a fork (gunicorn preload): they are started in the process using them
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._threads = []
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, name='mail-dispatcher-%d' % i)
+                thread.daemon = True
+                thread.start()
+                self._threads.append(thread)
+            self._pid = os.getpid()
+
+    def _work(self):
+        connection = None
+        stopping = False
+        while not stopping:
+            try:
+                batch = [self.queue.get(timeout=self.idle_timeout)]
+            except queue.Empty:
+                if connection is not None:
+                    connection.close()
+                    connection = None
+                continue
+            while len(batch) < self.batch_size and batch[-1] is not _STOP:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            if batch[-1] is _STOP:
+                batch.pop()
+                stopping = True
+                self.queue.task_done()
+            for message, fail_silently, queued_on in batch:
+                try:
+                    connection = self._send(connection, message, fail_silently, queued_on)
+                except Exception:
+                    logger.exception('Mail dispatcher error')
+                finally:
+                    self.queue.task_done()
+        if connection is not None:
+            connection.close()
+
+    def _open_connection(self):
+        connection = get_connection(self.backend, fail_silently=False, **self.connection_kwargs)
+        connection.open()
+        self._count('connections')
+        return connection
+
+    def _send(self, connection, message, fail_silently, queued_on):
+        """
+        Sends a message, retrying on a new connection.
+        Returns the connection to reuse for the next message, or None.
+        """
+        attempt = 0
+        while True:
+            try:
+                if connection is None:
+                    connection = self._open_connection()
+                connection.send_messages([message])
+            except Exception:
+                if connection is not None:
+                    try:
+                        connection.close()
+                    except Exception:
+                        pass
+                    connection = None
+                if attempt >= self.max_retries:
+                    self._count('failed')
+                    log = logger.warning if fail_silently else logger.error
+                    log('Mail dropped after %d attempts: %s', attempt + 1, message.subject, exc_info=True)
+                    return None
+                time.sleep(self.retry_backoff * 2 ** attempt)
+                attempt += 1
+                self._count('retries')
+                continue
+            latency = time.time() - queued_on
+            with self._lock:
+                self._metrics['sent'] += 1
+                self._metrics['latency_total'] += latency
+                self._metrics['latency_max'] = max(self._metrics['latency_max'], latency)
+            return connection
+
+    def _count(self, metric):
+        with self._lock:
+            self._metrics[metric] += 1
+
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_dispatcher():
+    """ Returns the dispatcher of the process, configured by settings.MAIL_DISPATCHER """
+    global _dispatcher
+    if _dispatcher is None:
+        with _dispatcher_lock:
+            if _dispatcher is None:
+                _dispatcher = MailDispatcher.from_settings()
+                atexit.register(_dispatcher.flush, 10)
+    return _dispatcher
 
 
 def send_mail(subject, body, from_email, recipient_list, fail_silently=False, html=None, *args, **kwargs):
-    EmailThread(subject, body, from_email, recipient_list, fail_silently, html).start()
+    if getattr(settings, 'MAIL_OUTBOX', False):
+        # Committed along with the caller's transaction, sent by the drain_outbox command
+        from core.models import OutgoingMail
+        OutgoingMail.objects.enqueue(subject, body, from_email, recipient_list, html)
+        return
+    msg = EmailMultiAlternatives(subject, body, from_email, recipient_list)
+    if html:
+        msg.attach_alternative(html, "text/html")
+    if settings.EMAIL_BACKEND in INLINE_BACKENDS:
+        msg.send(fail_silently)
+        return
+    get_dispatcher().submit(msg, fail_silently)
+
+
+def send_mass_mail(datatuple, fail_silently=False, html=None):
+    """
+    Sends mails given as (subject, body, from_email, recipient_list), as one batch:
+    one query in the outbox, one connection for inline backends, no wait on the dispatcher.
+    """
+    datatuple = list(datatuple)
+    if not datatuple:
+        return
+    if getattr(settings, 'MAIL_OUTBOX', False):
+        from core.models import OutgoingMail
+        OutgoingMail.objects.enqueue_many(datatuple, html)
+        return
+    messages = []
+    for subject, body, from_email, recipient_list in datatuple:
+        msg = EmailMultiAlternatives(subject, body, from_email, recipient_list)
+        if html:
+            msg.attach_alternative(html, "text/html")
+        messages.append(msg)
+    if settings.EMAIL_BACKEND in INLINE_BACKENDS:
+        get_connection(fail_silently=fail_silently).send_messages(messages)
+        return
+    dispatcher = get_dispatcher()
+    for msg in messages:
+        dispatcher.submit(msg, fail_silently)
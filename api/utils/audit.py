@@ -0,0 +1,206 @@
+import atexit
+from contextlib import contextmanager
+import logging
+import os
+import threading
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.admin.models import LogEntry
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+
+
+class AuditEntry():
+    """
+    A LogEntry to write, captured without any query.
+    Its object representation is built from the instance fields (primary and foreign keys) when written.
+    """
+
+    __slots__ = ('user_id', 'model', 'object_name', 'object_id', 'foreign_keys', 'action_flag', 'change_message')
+
+    def __init__(self, user_id, model, obj, action_flag, object_id=None, change_message=""):
+        self.user_id = user_id
+        self.model = model
+        self.object_name = obj._meta.object_name
+        self.object_id = obj.pk if object_id is None else object_id
+        # Ids only: reading the related objects would query them
+        self.foreign_keys = tuple((field.name, getattr(obj, field.attname))
+                                  for field in obj._meta.concrete_fields if field.rel is not None)
+        self.action_flag = action_flag
+        self.change_message = change_message
+
+    def object_repr(self):
+        """ 'Member 12 (user 4, community 1)' """
+        text = '%s %s' % (self.object_name, self.object_id)
+        if self.foreign_keys:
+            text += ' (%s)' % ', '.join('%s %s' % (name, value) for name, value in self.foreign_keys)
+        return text[:200]
+
+    def to_log_entry(self):
+        return LogEntry(user_id=self.user_id,
+                        content_type_id=ContentType.objects.get_for_model(self.model).pk,
+                        object_id=str(self.object_id),
+                        object_repr=self.object_repr(),
+                        action_flag=self.action_flag,
+                        change_message=self.change_message)
+
+
+def log_action(user_id, model, obj, action_flag, object_id=None, change_message=""):
+    """
+    Records an action on obj. Within atomic(), entries are kept until the transaction commits, and
+    dropped if it rolls back. Within a request handled by AuditLogMiddleware, entries are kept in memory
+    and written at the end of the request ; they are written at once otherwise.
+    """
+    entry = AuditEntry(user_id, model, obj, action_flag, object_id, change_message)
+    _append([entry])
+
+
+def _append(entries):
+    transactions = getattr(_local, 'transactions', None)
+    buffer = transactions[-1] if transactions else getattr(_local, 'buffer', None)
+    if buffer is None:
+        write(entries)
+    else:
+        buffer.extend(entries)
+
+
+@contextmanager
+def atomic(using=None):
+    """
+    transaction.atomic() keeping the audit entries of the block only if it commits: buffered entries,
+    written after the block, would otherwise record changes that were rolled back.
+    Usable as a decorator: @audit.atomic()
+    """
+    if not hasattr(_local, 'transactions'):
+        _local.transactions = []
+    entries = []
+    _local.transactions.append(entries)
+    try:
+        with transaction.atomic(using):
+            yield
+            rolled_back = transaction.get_rollback(using)
+    finally:
+        _local.transactions.pop()
+    if not rolled_back:
+        _append(entries)
+
+
+def write(entries):
+    """ Writes audit entries in one query """
+    if not entries:
+        return
+    _load_content_types()
+    LogEntry.objects.bulk_create([entry.to_log_entry() for entry in entries])
+
+
+_content_types_loaded = False
+
+
+def _load_content_types():
+    # One query fills the ContentType cache for every model, instead of one query per model
+    global _content_types_loaded
+    if not _content_types_loaded:
+        ContentType.objects.get_for_models(*apps.get_models())
+        _content_types_loaded = True
+
+
+class AuditLogFlusher():
+    """
+    Writes the audit entries of the process from a background thread, every 'interval' seconds
+    or as soon as batch_size entries are waiting.
+    """
+
+    def __init__(self, interval=5.0, batch_size=100):
+        self.interval = interval
+        self.batch_size = batch_size
+        self._entries = []
+        self._condition = threading.Condition()
+        self._pid = None
+
+    def submit(self, entries):
+        self._ensure_thread()
+        with self._condition:
+            self._entries.extend(entries)
+            if len(self._entries) >= self.batch_size:
+                self._condition.notify()
+
+    def flush(self):
+        """ Writes the waiting entries from the calling thread """
+        with self._condition:
+            entries, self._entries = self._entries, []
+        write(entries)
+
+    def _ensure_thread(self):
+        # Threads do not survive a fork (gunicorn preload): the thread is started in the process using it
+        if self._pid == os.getpid():
+            return
+        with self._condition:
+            if self._pid == os.getpid():
+                return
+            thread = threading.Thread(target=self._work, name='audit-log-flusher')
+            thread.daemon = True
+            thread.start()
+            self._pid = os.getpid()
+
+    def _work(self):
+        while True:
+            with self._condition:
+                if len(self._entries) < self.batch_size:
+                    self._condition.wait(self.interval)
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Audit log flush error')
+
+
+_flusher = None
+_flusher_lock = threading.Lock()
+
+
+def get_flusher():
+    """ Returns the flusher of the process, configured by settings.AUDIT_LOG """
+    global _flusher
+    if _flusher is None:
+        with _flusher_lock:
+            if _flusher is None:
+                options = getattr(settings, 'AUDIT_LOG', {})
+                _flusher = AuditLogFlusher(interval=options.get('FLUSH_INTERVAL', 5.0),
+                                           batch_size=options.get('BATCH_SIZE', 100))
+                atexit.register(_flusher.flush)
+    return _flusher
+
+
+class AuditLogMiddleware(object):
+    """
+    Keeps the audit entries of a request in memory, and writes them at its end in one query,
+    or hands them to the background flusher when settings.AUDIT_LOG['BACKGROUND'] is set.
+    Views writing within a transaction use atomic(), whose entries are dropped on rollback.
+    """
+
+    def process_request(self, request):
+        _local.buffer = []
+
+    def process_exception(self, request, exception):
+        # Without ATOMIC_REQUESTS, the writes made before the exception are kept: so are their entries
+        self._end()
+
+    def process_response(self, request, response):
+        self._end()
+        return response
+
+    @staticmethod
+    def _end():
+        entries = getattr(_local, 'buffer', None)
+        _local.buffer = None
+        if not entries:
+            return
+        if getattr(settings, 'AUDIT_LOG', {}).get('BACKGROUND', False):
+            get_flusher().submit(entries)
+        else:
+            write(entries)
@@ -0,0 +1,71 @@
+"""
+Cache of rendered responses of nearly static content (FAQ, texts), in the default cache.
+
+Entries are keyed by a version per namespace: changing the content (core.signals.content_cache)
+increments the version, so that every former entry is left unused until it expires. The default
+cache must be shared by the processes (memcached) for the invalidation to reach all of them;
+otherwise other processes keep serving the former content for CONTENT_CACHE_TIMEOUT seconds.
+"""
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.response import Response
+
+
+def timeout():
+    return getattr(settings, 'CONTENT_CACHE_TIMEOUT', 300)
+
+
+def _version_key(namespace):
+    return 'content:%s:version' % namespace
+
+
+def version(namespace):
+    """ Current version of namespace, set on first use """
+    key = _version_key(namespace)
+    value = cache.get(key)
+    if value is None:
+        # From the clock: not a version of entries made before the key was evicted
+        cache.add(key, int(time.time() * 1000), None)
+        value = cache.get(key)
+    return value
+
+
+def invalidate(namespace):
+    """ Leaves the entries of namespace unused """
+    try:
+        cache.incr(_version_key(namespace))
+    except ValueError:
+        # Not set yet, or evicted
+        version(namespace)
+
+
+def key(namespace, *parts):
+    """ Cache key of an entry of namespace, for the current version """
+    digest = hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()
+    return 'content:%s:%s:%s' % (namespace, version(namespace), digest)
+
+
+class PrecomputedResponse(Response):
+    """ Response of already rendered JSON bytes: nothing is serialized nor rendered again """
+
+    def __init__(self, content, status=None, headers=None):
+        self.precomputed_content = content
+        super().__init__(status=status, headers=headers)
+
+    @property
+    def data(self):
+        # Decoded on access only (tests, debugging)
+        return json.loads(self.precomputed_content.decode('utf-8'))
+
+    @data.setter
+    def data(self, value):
+        pass
+
+    @property
+    def rendered_content(self):
+        self['Content-Type'] = 'application/json'
+        return self.precomputed_content
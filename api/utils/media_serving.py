@@ -0,0 +1,108 @@
+import mimetypes
+import re
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils.http import http_date, quote_etag, parse_etags, urlquote
+from api.utils.thumbnails import file_digest, resolve
+
+
+CHUNK_SIZE = 64 * 1024
+
+# A year: the longest value caches are asked to honor
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def parse_range(header, size):
+    """
+    (first, last) byte positions of a single range header, None for a missing or multiple range
+    (the whole file is then sent). Raises ValueError for an unsatisfiable range.
+    """
+    match = RANGE_RE.match(header or '')
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first:
+        if not last:
+            return None
+        # Suffix range: the last bytes
+        first, last = max(size - int(last), 0), size - 1
+    else:
+        first, last = int(first), min(int(last), size - 1) if last else size - 1
+    if first >= size or first > last:
+        raise ValueError(header)
+    return first, last
+
+
+def read_file(fullpath, first, last):
+    with open(fullpath, 'rb') as f:
+        f.seek(first)
+        remaining = last - first + 1
+        while remaining > 0:
+            chunk = f.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def serve(request, path, document_root):
+    """
+    Serves the file at path, relative to document_root, with a content hash ETag, conditional
+    requests, single byte ranges, and cache headers: 'max-age=MEDIA_CACHE_MAX_AGE', or a year
+    with 'immutable' when the URL holds the content hash (the ETag value, as 'v' parameter).
+    With MEDIA_SENDFILE ('X-Accel-Redirect' or 'X-Sendfile'), the body is sent by the web server,
+    which also handles the ranges; it is streamed in chunks otherwise.
+    """
+    fullpath, st = resolve(document_root, path)
+    digest = file_digest(path, fullpath, st)
+    etag = quote_etag(digest)
+    immutable = request.GET.get('v') == digest
+
+    headers = {
+        'ETag': etag,
+        'Last-Modified': http_date(st.st_mtime),
+        'Cache-Control': 'public, max-age=%d%s' % ((IMMUTABLE_MAX_AGE, ', immutable') if immutable
+                                                   else (settings.MEDIA_CACHE_MAX_AGE, '')),
+    }
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match and (if_none_match.strip() == '*' or digest in parse_etags(if_none_match)):
+        response = HttpResponseNotModified()
+        for name, value in headers.items():
+            response[name] = value
+        return response
+
+    content_type, encoding = mimetypes.guess_type(fullpath)
+    content_type = content_type or 'application/octet-stream'
+    sendfile = getattr(settings, 'MEDIA_SENDFILE', None)
+    if sendfile:
+        response = HttpResponse(content_type=content_type)
+        if sendfile == 'X-Accel-Redirect':
+            response['X-Accel-Redirect'] = settings.MEDIA_SENDFILE_PREFIX + urlquote(path)
+        else:
+            response['X-Sendfile'] = fullpath
+    else:
+        size = st.st_size
+        byte_range = None
+        if_range = request.META.get('HTTP_IF_RANGE')
+        if not if_range or if_range.strip() == etag:
+            try:
+                byte_range = parse_range(request.META.get('HTTP_RANGE'), size)
+            except ValueError:
+                response = HttpResponse(status=416)
+                response['Content-Range'] = 'bytes */%d' % size
+                return response
+        first, last = byte_range or (0, size - 1)
+        response = StreamingHttpResponse(read_file(fullpath, first, last), content_type=content_type)
+        response['Content-Length'] = str(last - first + 1)
+        if byte_range is not None:
+            response.status_code = 206
+            response['Content-Range'] = 'bytes %d-%d/%d' % (first, last, size)
+    response['Accept-Ranges'] = 'bytes'
+    if encoding:
+        response['Content-Encoding'] = encoding
+    for name, value in headers.items():
+        response[name] = value
+    return response
@@ -0,0 +1,77 @@
+import itertools
+
+from core.models import Member
+
+
+# Any membership mutation bumps the generation (core.signals.memberships), so that resolvers loaded
+# before it reload on next access.
+_generations = itertools.count(1)
+_generation = 0
+
+
+def invalidate():
+    """ Leaves the loaded memberships unused: resolvers reload them on next access """
+    global _generation
+    _generation = next(_generations)
+
+
+class MembershipResolver():
+    """
+    Loads the (community id -> (role, status)) map of a user once,
+    and answers the community permission checks from memory.
+    """
+
+    def __init__(self, user):
+        self.user = user
+        self._memberships = None
+        self._generation = None
+
+    @property
+    def memberships(self):
+        if self._memberships is None or self._generation != _generation:
+            self._generation = _generation
+            self._memberships = dict((community, (role, status)) for community, role, status in
+                                     Member.objects.filter(user=self.user)
+                                                   .values_list('community', 'role', 'status'))
+        return self._memberships
+
+    def get(self, community):
+        """
+        Returns the (role, status) of the user in community, or None if he is not a member.
+        """
+        community = getattr(community, 'pk', community)
+        try:
+            return self.memberships.get(int(community))
+        except (TypeError, ValueError):
+            return None
+
+    def is_member(self, community):
+        membership = self.get(community)
+        return membership is not None and membership[1] == '1'
+
+    def is_moderator(self, community):
+        membership = self.get(community)
+        return membership is not None and membership[1] == '1' and membership[0] in ('0', '1')
+
+    def is_owner(self, community):
+        membership = self.get(community)
+        return membership is not None and membership[1] == '1' and membership[0] == '0'
+
+    def is_registered(self, community):
+        """
+        True whatever the membership status (pending, accepted or banned).
+        """
+        return self.get(community) is not None
+
+
+def get_memberships(request, user):
+    """
+    Returns the membership resolver of user, shared by every permission check of the request.
+    """
+    # Stored on the underlying HttpRequest, seen by both permission classes and views
+    http_request = getattr(request, '_request', request)
+    resolver = getattr(http_request, '_membership_resolver', None)
+    if resolver is None or resolver.user.pk != user.pk:
+        resolver = MembershipResolver(user)
+        http_request._membership_resolver = resolver
+    return resolver
@@ -0,0 +1,62 @@
+from contextlib import contextmanager
+import threading
+import time
+
+from django.conf import settings
+
+
+# In-process stand-in for a pub/sub channel: a version per user, bumped when he is notified.
+# Waiters of other processes are not woken up: they see the new notifications at their next poll.
+POLL_INTERVAL = 2.0
+
+_condition = threading.Condition()
+_versions = {}
+_waiters = 0
+
+
+def version(user_id):
+    """ Returns the current notification version of a user, to be given to wait() """
+    with _condition:
+        return _versions.get(user_id, 0)
+
+
+def publish(user_ids):
+    """ Wakes up the requests of this process waiting for the notifications of user_ids """
+    with _condition:
+        for user_id in user_ids:
+            _versions[user_id] = _versions.get(user_id, 0) + 1
+        _condition.notify_all()
+
+
+def wait(user_id, since_version, timeout):
+    """
+    Blocks until the version of user_id differs from since_version, or for at most timeout seconds.
+    Returns True if a notification was published meanwhile.
+    """
+    deadline = time.time() + timeout
+    with _condition:
+        while _versions.get(user_id, 0) == since_version:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return False
+            _condition.wait(remaining)
+        return True
+
+
+@contextmanager
+def waiter_slot():
+    """
+    Yields whether the request may wait, at most NOTIFICATION_MAX_WAITERS of the process waiting at once:
+    each of them holds a worker thread.
+    """
+    global _waiters
+    with _condition:
+        acquired = _waiters < settings.NOTIFICATION_MAX_WAITERS
+        if acquired:
+            _waiters += 1
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            with _condition:
+                _waiters -= 1
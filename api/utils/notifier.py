@@ -1,10 +1,13 @@
 from django.contrib.auth import get_user_model
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
 from api.mail_templates.member import new_member_notification_message
 from api.mail_templates.message import new_message_notification_message
 from api.mail_templates.offer import new_offer_notification_message
 from api.mail_templates.meeting import new_meeting_notification_message
-from api.utils.asyncronous_mail import send_mail
-from core.models import Profile, Member
+from api.utils import notification_events
+from api.utils.asyncronous_mail import send_mail, send_mass_mail
+from core.models import Profile, Member, UserStats
 from core.models.notification import Notification
 
 
@@ -14,23 +17,52 @@ class Notifier():
     @staticmethod
     def notify(photo, user, title, message, link, mail_subject, mail_body):
         """
-        Create Notification object
-        Send mail
+        Create Notification object and count it as unread
+        Send mail (stored in the outbox, in the same transaction, when MAIL_OUTBOX is set)
         """
         profile = Profile.objects.get(user=user)
-        n = Notification(photo=photo,
-                         user=user,
-                         title=title,
-                         message=message,
-                         link=link)
-        n.save()
-        if not profile.mail_notification:
-            return
-        send_mail(subject=mail_subject,
-                  body=mail_body,
-                  from_email='notifications@smartribe.fr',
-                  recipient_list=[user.email],
-                  fail_silently=False)
+        with transaction.atomic():
+            n = Notification(photo=photo,
+                             user=user,
+                             title=title,
+                             message=message,
+                             link=link)
+            n.save()
+            UserStats.objects.increment([user.id], 'unread_notifications_count')
+            if profile.mail_notification:
+                send_mail(subject=mail_subject,
+                          body=mail_body,
+                          from_email='notifications@smartribe.fr',
+                          recipient_list=[user.email],
+                          fail_silently=False)
+        notification_events.publish([user.id])
+
+    @staticmethod
+    def notify_all(photo, users, title, message, link, mail):
+        """
+        Create the Notification objects of several users in one query, and count them as unread
+        Send their mails as one batch, 'mail' returning the (subject, body) of a recipient
+        Recipients and their mail preferences are loaded in one query
+        """
+        users = list(users.select_related('profile'))
+        with transaction.atomic():
+            Notification.objects.bulk_create([Notification(photo=photo,
+                                                           user=user,
+                                                           title=title,
+                                                           message=message,
+                                                           link=link) for user in users])
+            UserStats.objects.increment([user.id for user in users], 'unread_notifications_count')
+            mails = []
+            for user in users:
+                try:
+                    if not user.profile.mail_notification:
+                        continue
+                except ObjectDoesNotExist:
+                    continue
+                subject, body = mail(user)
+                mails.append((subject, body, 'notifications@smartribe.fr', [user.email]))
+            send_mass_mail(mails, fail_silently=False)
+        notification_events.publish([user.id for user in users])
 
     @staticmethod
     def notify_new_offer(offer):
@@ -93,12 +125,13 @@ class Notifier():
             m = 'Nouveau membre : %s %s' % (author.first_name, author.last_name)
         else:
             m = 'Nouveau membre : %s %s (à confirmer)' % (author.first_name, author.last_name)
-        for moderator in moderators:
-            s, b = new_member_notification_message(community, author, moderator)
-            Notifier.notify(photo=author.profile.photo,
-                            user=moderator,
+        try:
+            photo = author.profile.photo
+        except ObjectDoesNotExist:
+            photo = None
+        Notifier.notify_all(photo=photo,
+                            users=moderators,
                             title=community.name,
                             message=m,
                             link='/communities/' + str(community.id) + '/',
-                            mail_subject=s,
-                            mail_body=b)
\ No newline at end of file
+                            mail=lambda moderator: new_member_notification_message(community, author, moderator))
\ No newline at end of file
@@ -0,0 +1,195 @@
+import hashlib
+import os
+import stat
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.http import Http404
+from django.utils._os import safe_join
+from PIL import Image, ImageOps
+
+
+# Variants are served at 'variants/<variant>/<original path>', and stored, once generated, at
+# 'variants/cache/<content hash>-<variant>.<ext>': identical uploads share their variants,
+# and a new upload at the same path gets new ones.
+VARIANTS_PREFIX = 'variants/'
+
+CACHE_DIR = 'variants/cache'
+
+AVATAR_VARIANTS = ('avatar_64', 'avatar_128')
+
+BANNER_VARIANTS = ('banner_640', 'banner_1280')
+
+JPEG_QUALITY = 85
+
+WEBP_QUALITY = 80
+
+# Read size of the originals when hashing them
+HASH_CHUNK_SIZE = 64 * 1024
+
+
+def webp_supported():
+    Image.init()
+    return 'WEBP' in Image.SAVE
+
+
+def variant_path(path, variant):
+    """ Media path of a variant of the media at path (no I/O) """
+    return '%s%s/%s' % (VARIANTS_PREFIX, variant, path)
+
+
+def variant_paths(path, variants):
+    """ {variant: media path} of the media at path, empty without media """
+    if not path:
+        return {}
+    return dict((variant, variant_path(path, variant)) for variant in variants)
+
+
+def parse_variant_path(path):
+    """ (variant, original path) of a variant media path, or None for an original """
+    if not path.startswith(VARIANTS_PREFIX):
+        return None
+    variant, _, original = path[len(VARIANTS_PREFIX):].partition('/')
+    if variant not in settings.MEDIA_VARIANTS or not original:
+        raise Http404('Unknown variant')
+    return variant, original
+
+
+class FileStatCache():
+    """
+    Thread safe LRU of values computed from files, e.g. the generated variant names, keyed by
+    original path, variant and format. An entry is valid as long as the stamp (size and modification
+    time) of its file is unchanged, so that the file is read and hashed only once.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, stamp):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != stamp:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, stamp, value):
+        with self._lock:
+            self._entries[key] = (stamp, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+index = FileStatCache(1000)
+
+
+def file_stamp(st):
+    return st.st_size, st.st_mtime
+
+
+digests = FileStatCache(5000)
+
+
+def resolve(document_root, path):
+    """ Absolute path and stat of the file at path, raising Http404 outside document_root """
+    try:
+        fullpath = safe_join(document_root, path)
+        st = os.stat(fullpath)
+    except (ValueError, OSError):
+        raise Http404('"%s" does not exist' % path)
+    if not stat.S_ISREG(st.st_mode):
+        raise Http404('"%s" does not exist' % path)
+    return fullpath, st
+
+
+def file_digest(path, fullpath, st):
+    """
+    SHA-1 of a file content, read by chunks, computed once per file version.
+    Generated variants are named after their content: their name is used instead.
+    """
+    if path.startswith(CACHE_DIR + '/'):
+        return os.path.basename(path)
+    stamp = file_stamp(st)
+    digest = digests.get(path, stamp)
+    if digest is None:
+        sha1 = hashlib.sha1()
+        with open(fullpath, 'rb') as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+                sha1.update(chunk)
+        digest = sha1.hexdigest()
+        digests.set(path, stamp, digest)
+    return digest
+
+
+def get_variant(document_root, path, variant, webp=False):
+    """
+    Returns the path, relative to document_root, of the variant of the image at path,
+    generated on first request. WebP is only used when webp is set and Pillow supports it.
+    Raises Http404 when the original is missing, is not a regular file, is not an image
+    or has more pixels than MEDIA_VARIANT_MAX_PIXELS.
+    """
+    original, st = resolve(document_root, path)
+    webp = webp and webp_supported()
+    key = (path, variant, webp)
+    stamp = file_stamp(st)
+    name = index.get(key, stamp)
+    if name is not None and os.path.exists(os.path.join(document_root, name)):
+        return name
+
+    digest = file_digest(path, original, st)
+    try:
+        image = Image.open(original)
+        # Before decoding: the header alone tells the size of the decoded image
+        width, height = image.size
+        if width * height > settings.MEDIA_VARIANT_MAX_PIXELS:
+            raise Http404('"%s" is too large' % path)
+        image.load()
+    except (IOError, ValueError):
+        raise Http404('"%s" is not an image' % path)
+    if webp:
+        image_format, ext = 'WEBP', 'webp'
+    elif has_alpha(image):
+        image_format, ext = 'PNG', 'png'
+    else:
+        image_format, ext = 'JPEG', 'jpg'
+    name = '%s/%s-%s.%s' % (CACHE_DIR, digest, variant, ext)
+    target = os.path.join(document_root, name)
+    if not os.path.exists(target):
+        write_variant(image, settings.MEDIA_VARIANTS[variant], image_format, target)
+    index.set(key, stamp, name)
+    return name
+
+
+def has_alpha(image):
+    return image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+
+
+def write_variant(image, size, image_format, target):
+    """
+    Resizes image to size, (width, height): cropped to fill both dimensions,
+    or scaled to the width when height is None. Images are never enlarged.
+    """
+    width, height = size
+    image = image.convert('RGBA' if has_alpha(image) and image_format != 'JPEG' else 'RGB')
+    if height is None:
+        image.thumbnail((width, image.size[1]), Image.ANTIALIAS)
+    elif image.size[0] > width or image.size[1] > height:
+        image = ImageOps.fit(image, (min(width, image.size[0]), min(height, image.size[1])), Image.ANTIALIAS)
+    options = {}
+    if image_format == 'JPEG':
+        options = {'quality': JPEG_QUALITY, 'optimize': True, 'progressive': True}
+    elif image_format == 'WEBP':
+        options = {'quality': WEBP_QUALITY}
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    # Written aside, then renamed: concurrent requests never serve a partial file
+    temporary = '%s.%d.%d.tmp' % (target, os.getpid(), threading.get_ident())
+    image.save(temporary, image_format, **options)
+    os.replace(temporary, target)
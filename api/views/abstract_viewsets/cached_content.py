@@ -0,0 +1,68 @@
+from hashlib import sha1
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.utils import translation
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from api.utils import content_cache
+from core.db_router import use_primary
+
+
+class CachedContentMixin(object):
+    """
+    Serves list and retrieve from api.utils.content_cache: the JSON rendered once per visibility
+    (anonymous or authenticated), lookup, filter and pagination parameters and language, with an ETag.
+    Clients revalidate with If-None-Match, answered 304 without a body.
+    Other query parameters are not part of the key: they do not change the response, and would let
+    clients fill the cache with copies of it.
+    """
+
+    cache_namespace = None
+
+    def cache_query_params(self):
+        """ Names of the query parameters the responses depend on """
+        params = list(getattr(self, 'filter_fields', None) or ())
+        params.append(self.page_kwarg)
+        if self.paginate_by_param:
+            params.append(self.paginate_by_param)
+        return params
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
+
+    def cached_response(self, build, request, *args, **kwargs):
+        if not content_cache.timeout():
+            return build(request, *args, **kwargs)
+        private = not isinstance(request.user, AnonymousUser)
+        params = [(name, request.QUERY_PARAMS.getlist(name)) for name in self.cache_query_params()
+                  if name in request.QUERY_PARAMS]
+        key = content_cache.key(self.cache_namespace, private, self.action, sorted(kwargs.items()),
+                                params, translation.get_language())
+        entry = cache.get(key)
+        if entry is None:
+            # From the primary: a replica may not have the change invalidating the former entry yet
+            with use_primary():
+                response = build(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            content = JSONRenderer().render(response.data)
+            entry = (content, quote_etag(sha1(content).hexdigest()))
+            cache.set(key, entry, content_cache.timeout())
+        content, etag = entry
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if if_none_match and (if_none_match.strip() == '*' or etag.strip('"') in parse_etags(if_none_match)):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = content_cache.PrecomputedResponse(content)
+        response['ETag'] = etag
+        response['Cache-Control'] = 'no-cache'
+        patch_vary_headers(response, ('Authorization',))
+        return response
@@ -0,0 +1,75 @@
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.templatetags.rest_framework import replace_query_param
+
+
+class CursorPaginationMixin(object):
+    """
+    Keyset pagination on cursor_ordering, e.g. ('-created_on', '-id'): the last field must be unique.
+
+    Used when the client sends a 'cursor' query parameter, empty for the first page. Responses hold
+    'results' and 'next', the URL of the following page (None on the last page): no COUNT query,
+    and no OFFSET, so that every page costs the same whatever its depth.
+    Without 'cursor', the offset pagination of the viewset is kept.
+    """
+
+    cursor_ordering = None
+
+    cursor_param = 'cursor'
+
+    def uses_cursor(self):
+        return self.cursor_ordering is not None and self.cursor_param in self.request.QUERY_PARAMS
+
+    def list(self, request, *args, **kwargs):
+        if not self.uses_cursor():
+            return super().list(request, *args, **kwargs)
+        return self.get_cursor_response(self.filter_queryset(self.get_queryset()))
+
+    def cursor_fields(self):
+        """ [(field name, descending)] of cursor_ordering """
+        return [(name.lstrip('-'), name.startswith('-')) for name in self.cursor_ordering]
+
+    def get_cursor_response(self, queryset):
+        """ Returns the page of queryset following the cursor of the request """
+        fields = self.cursor_fields()
+        queryset = queryset.order_by(*self.cursor_ordering)
+        token = self.request.QUERY_PARAMS[self.cursor_param]
+        if token:
+            try:
+                values = self.decode_cursor(token, fields)
+            except (ValueError, TypeError, ValidationError):
+                return Response({'detail': 'Invalid cursor.'}, status=status.HTTP_400_BAD_REQUEST)
+            queryset = queryset.filter(self.after_cursor(fields, values))
+        page_size = self.get_paginate_by() or 30
+        page = list(queryset[:page_size + 1])
+        next_url = None
+        if len(page) > page_size:
+            page = page[:page_size]
+            next_url = replace_query_param(self.request.build_absolute_uri(), self.cursor_param,
+                                           self.encode_cursor(page[-1], fields))
+        serializer = self.get_serializer(page, many=True)
+        return Response({'next': next_url, 'results': serializer.data}, status=status.HTTP_200_OK)
+
+    @staticmethod
+    def after_cursor(fields, values):
+        """ (a, b) > (x, y) written as a > x OR (a = x AND b > y), which databases match on indexes """
+        condition = None
+        for (name, descending), value in reversed(list(zip(fields, values))):
+            after = Q(**{name + ('__lt' if descending else '__gt'): value})
+            condition = after if condition is None else after | (Q(**{name: value}) & condition)
+        return condition
+
+    def encode_cursor(self, obj, fields):
+        values = [self.model._meta.get_field(name).value_to_string(obj) for name, _ in fields]
+        return base64.urlsafe_b64encode(json.dumps(values).encode('utf-8')).decode('ascii')
+
+    def decode_cursor(self, token, fields):
+        values = json.loads(base64.urlsafe_b64decode(token.encode('ascii')).decode('utf-8'))
+        if not isinstance(values, list) or len(values) != len(fields):
+            raise ValueError(token)
+        return [self.model._meta.get_field(name).to_python(value) for (name, _), value in zip(fields, values)]
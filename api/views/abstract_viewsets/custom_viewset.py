@@ -1,11 +1,13 @@
-from django.contrib.admin.models import LogEntry, ADDITION, CHANGE, DELETION
-from django.contrib.contenttypes.models import ContentType
+from django.contrib.admin.models import ADDITION, CHANGE, DELETION
 from rest_framework import mixins
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.viewsets import GenericViewSet
 from rest_framework.viewsets import ModelViewSet
 
+from api.utils import audit
+from api.views.abstract_viewsets.primary_permissions import PrimaryPermissionsMixin
+
 
 class LoggingComponent(object):
 
@@ -21,17 +23,10 @@ class LoggingComponent(object):
         self.former_id = obj.id
 
     def post_delete(self, view, obj):
-        self.log(obj, DELETION, self.former_id)
+        self.log(view, obj, DELETION, self.former_id)
 
     def log(self, view, obj, flag, id=None, change_message=""):
-        if id is None:
-            id = obj.id
-        LogEntry.objects.log_action(user_id=view.request.user.id,
-                                    content_type_id=ContentType.objects.get_for_model(view.model).pk,
-                                    object_id=id,
-                                    object_repr=str(obj),
-                                    action_flag=flag,
-                                    change_message=change_message)
+        audit.log_action(view.request.user.id, view.model, obj, flag, id, change_message)
 
 
 class CreationComponent(object):
@@ -44,7 +39,7 @@ class CreateOnlyGenericViewSet(mixins.CreateModelMixin, GenericViewSet):
     """ Not intended to be used directly """
 
 
-class CreateOnlyViewSet(CreateOnlyGenericViewSet):
+class CreateOnlyViewSet(PrimaryPermissionsMixin, CreateOnlyGenericViewSet):
 
     _logging = LoggingComponent()
     _creation = CreationComponent()
@@ -65,7 +60,7 @@ class CreateAndReadOnlyGenericViewSet(mixins.CreateModelMixin, mixins.RetrieveMo
     """ Not intended to be used directly """
 
 
-class CreateAndReadOnlyViewSet(CreateAndReadOnlyGenericViewSet):
+class CreateAndReadOnlyViewSet(PrimaryPermissionsMixin, CreateAndReadOnlyGenericViewSet):
 
     _logging = LoggingComponent()
     _creation = CreationComponent()
@@ -94,7 +89,7 @@ class ReadAndDestroyGenericViewSet(mixins.RetrieveModelMixin, mixins.DestroyMode
     """ Not intended to be used directly """
 
 
-class ReadAndDestroyViewSet(ReadAndDestroyGenericViewSet):
+class ReadAndDestroyViewSet(PrimaryPermissionsMixin, ReadAndDestroyGenericViewSet):
 
     _logging = LoggingComponent()
 
@@ -114,7 +109,7 @@ class ReadAndDestroyViewSet(ReadAndDestroyGenericViewSet):
         self._logging.log(self, obj, flag, id, change_message)
 
 
-class CustomViewSet(ModelViewSet):
+class CustomViewSet(PrimaryPermissionsMixin, ModelViewSet):
     """ """
 
     create_serializer_class = None
@@ -177,14 +172,7 @@ class CustomViewSet(ModelViewSet):
         self.log(obj, DELETION, self.former_id)
 
     def log(self, obj, flag, id=None, change_message=""):
-        if id is None:
-            id = obj.id
-        LogEntry.objects.log_action(user_id=self.request.user.id,
-                                    content_type_id=ContentType.objects.get_for_model(self.model).pk,
-                                    object_id=id,
-                                    object_repr=str(obj),
-                                    action_flag=flag,
-                                    change_message=change_message)
+        audit.log_action(self.request.user.id, self.model, obj, flag, id, change_message)
 
     class Meta:
         abstract = True
\ No newline at end of file
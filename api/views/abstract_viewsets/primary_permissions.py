@@ -0,0 +1,16 @@
+from core.db_router import use_primary
+
+
+class PrimaryPermissionsMixin(object):
+    """
+    Permission checks read the primary database, even when the request reads a replica (core.db_router):
+    a membership, a ban or an ownership just written must be seen at once.
+    """
+
+    def check_permissions(self, request):
+        with use_primary():
+            super().check_permissions(request)
+
+    def check_object_permissions(self, request, obj):
+        with use_primary():
+            super().check_object_permissions(request, obj)
@@ -9,7 +9,9 @@ from api.permissions.common import IsJWTAuthenticated
 from api.permissions.community import IsCommunityOwner, IsCommunityModerator
 from api.serializers import MemberSerializer, MyMembersSerializer, ListCommunityMembersSerializer
 from api.serializers.location import LocationSerializer, LocationCreateSerializer
+from api.utils import audit
 from api.utils.asyncronous_mail import send_mail
+from api.utils.memberships import get_memberships
 from api.utils.notifier import Notifier
 from api.views.abstract_viewsets.custom_viewset import CustomViewSet
 from core.models import Community, Member, Location, Offer
@@ -70,7 +72,11 @@ class CommunityViewSet(CustomViewSet):
             owner = Member.objects.create(user=self.request.user, community=obj, role="0", status="1")
 
     def get_queryset(self):
-        return self.model.objects.all().order_by('name')
+        queryset = self.model.objects.all().order_by('name')
+        if self.model is Community:
+            # Joins the child tables read by CommunitySerializer.type
+            queryset = queryset.select_related('localcommunity', 'transportcommunity')
+        return queryset
 
     @link(permission_classes=[IsJWTAuthenticated])
     def get_members_count(self, request, pk=None):
@@ -87,6 +93,7 @@ class CommunityViewSet(CustomViewSet):
     ## Simple user actions
 
     @action(methods=['POST', ], permission_classes=[IsJWTAuthenticated()])
+    @audit.atomic()
     def join_community(self, request, pk=None):
         """
         Become a new member of a community.
@@ -157,7 +164,8 @@ class CommunityViewSet(CustomViewSet):
                 |       None
 
         """
-        my_members = Member.objects.filter(user=self.request.user)
+        my_members = Member.objects.filter(user=self.request.user) \
+                                   .select_related('community__localcommunity', 'community__transportcommunity')
         page = self.paginate_queryset(my_members)
         if page is not None:
             serializer = self.get_custom_pagination_serializer(page, MyMembersSerializer)
@@ -166,6 +174,7 @@ class CommunityViewSet(CustomViewSet):
         return Response(serializer.data, status=status.HTTP_200_OK)
 
     @action(methods=['POST', ], permission_classes=[IsJWTAuthenticated()])
+    @audit.atomic()
     def leave_community(self, request, pk=None):
         """
         Leave a community.
@@ -223,7 +232,7 @@ class CommunityViewSet(CustomViewSet):
         community, response = self.validate_object(request, pk)
         if not community:
             return response
-        is_member = Member.objects.filter(user=self.request.user, community=community).exists()
+        is_member = get_memberships(request, self.request.user).is_registered(community)
         return Response({'is_member': is_member}, status=status.HTTP_200_OK)
 
     @link()
@@ -290,6 +299,7 @@ class CommunityViewSet(CustomViewSet):
         return Response(serializer.data, status=status.HTTP_200_OK)
 
     @action(methods=['POST', ], permission_classes=[IsCommunityModerator])
+    @audit.atomic()
     def accept_member(self, request, pk=None):
         """
         Accept a membership request (can also be used to change member status from 'banned' back to 'accepted').
@@ -337,6 +347,7 @@ class CommunityViewSet(CustomViewSet):
         return Response(serializer.data, status=status.HTTP_200_OK)
 
     @action(methods=['POST', ], permission_classes=[IsCommunityModerator])
+    @audit.atomic()
     def ban_member(self, request, pk=None):
         """
         Ban a member from community.
@@ -384,6 +395,7 @@ class CommunityViewSet(CustomViewSet):
         return Response(serializer.data, status=status.HTTP_200_OK)
 
     @action(methods=['POST', ], permission_classes=[IsCommunityModerator])
+    @audit.atomic()
     def unban_member(self, request, pk=None):
         """ """
         member, response = self.validate_external_object(Member, 'id', request)
@@ -740,31 +752,15 @@ class CommunityViewSet(CustomViewSet):
         """
         if not user:
             return False
-        elif Member.objects.filter(
-                user=user,
-                community=community,
-                status="1"
-        ).exists():
-            return True
-        else:
-            return False
+        return get_memberships(self.request, user).is_member(community)
 
     def check_moderator_permission(self, user, community):
         """
         Verifies that user has moderator's rights on the community
         """
-        # user, response = AuthUser().authenticate(self.request)
         if not user:
             return False
-        elif Member.objects.filter(
-                Q(user=user),
-                Q(community=community),
-                Q(status="1"),
-                Q(role="1") | Q(role="0")
-        ).exists():
-            return True
-        else:
-            return False
+        return get_memberships(self.request, user).is_moderator(community)
 
     def check_owner_permission(self, user, community):
         """
@@ -772,15 +768,7 @@ class CommunityViewSet(CustomViewSet):
         """
         if not user:
             return False
-        elif Member.objects.filter(
-                user=user,
-                community=community,
-                status="1",
-                role="0"
-        ).exists():
-            return True
-        else:
-            return False
+        return get_memberships(self.request, user).is_owner(community)
 
     def check_upper_permission(self, user, member):
         """
@@ -788,10 +776,10 @@ class CommunityViewSet(CustomViewSet):
         """
         if not user:
             return False
-        if not Member.objects.filter(user=user, community=member.community).exists():
+        membership = get_memberships(self.request, user).get(member.community_id)
+        if membership is None:
             return False
-        m_user = Member.objects.get(user=user, community=member.community)
-        if int(m_user.role) < int(member.role):
+        if int(membership[0]) < int(member.role):
             return True
         return False
 
@@ -1,11 +1,12 @@
 from django.contrib.auth.models import AnonymousUser
 from rest_framework import viewsets
 from rest_framework.permissions import AllowAny
+from api.views.abstract_viewsets.cached_content import CachedContentMixin
 from api.serializers.faq import FaqSerializer
 from core.models import Faq
 
 
-class FaqViewSet(viewsets.ReadOnlyModelViewSet):
+class FaqViewSet(CachedContentMixin, viewsets.ReadOnlyModelViewSet):
     """
     Inherits standard characteristics from ReadOnlyModelViewSet:
 
@@ -14,12 +15,14 @@ class FaqViewSet(viewsets.ReadOnlyModelViewSet):
             | **Permissions**:
             |       - AllowAny : Public questions
             |       - IsJWTAuthenticated : All questions
+            | **Caching**: responses are cached until the content changes (CachedContentMixin), with an ETag
 
 
     """
     model = Faq
     serializer_class = FaqSerializer
     permission_classes = [AllowAny]
+    cache_namespace = 'faq'
 
     def get_queryset(self):
         if isinstance(self.request.user, AnonymousUser):
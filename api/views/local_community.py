@@ -1,5 +1,7 @@
+from math import isfinite
+
+from django.conf import settings
 from django.utils.translation import ugettext as _
-from math import cos, radians
 from rest_framework.decorators import link
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
@@ -8,6 +10,7 @@ from api.permissions.common import IsJWTAuthenticated
 from api.permissions.community import IsCommunityOwner, IsCommunityModerator
 from api.serializers import LocalCommunitySerializer
 from api.views.community import CommunityViewSet
+from core.geo import is_valid_point
 from core.models import LocalCommunity
 
 
@@ -59,19 +62,24 @@ class LocalCommunityViewSet(CommunityViewSet):
 
     @link()
     def list_communities_around_me(self, request, pk=None):
-        """ List communities around a central GPS point with a radius (km) given as parameter """
+        """ List communities around a central GPS point with a radius (km) given as parameter, closest first """
         data = request.QUERY_PARAMS
         if not 'gps_x' in data or not 'gps_y' in data or not 'radius' in data:
-            Response({_('detail'): _('Missing GPS coordinates or search radius.')}, status=status.HTTP_400_BAD_REQUEST)
-        gps_x = float(data['gps_x'])
-        gps_y = float(data['gps_y'])
-        radius = float(data['radius'])
-        delta_y = radius / 111
-        delta_x = radius / (111 * cos(radians(gps_y)))
-        communities = LocalCommunity.objects.filter(gps_x__gt=gps_x-delta_x,
-                                                    gps_x__lt=gps_x+delta_x,
-                                                    gps_y__gt=gps_y-delta_y,
-                                                    gps_y__lt=gps_y+delta_y)
+            return Response({_('detail'): _('Missing GPS coordinates or search radius.')},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            gps_x = float(data['gps_x'])
+            gps_y = float(data['gps_y'])
+            radius = float(data['radius'])
+        except ValueError:
+            return Response({_('detail'): _('Invalid GPS coordinates or search radius.')},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if not is_valid_point(gps_x, gps_y) or not isfinite(radius) or radius < 0:
+            return Response({_('detail'): _('Invalid GPS coordinates or search radius.')},
+                            status=status.HTTP_400_BAD_REQUEST)
+        radius = min(radius, settings.GEO_MAX_RADIUS)
+        # Closest first, prefiltered on the indexed geohash cells
+        communities = LocalCommunity.objects.around(gps_x, gps_y, radius)
         page = self.paginate_queryset(communities)
         if page is not None:
             serializer = self.get_pagination_serializer(page)
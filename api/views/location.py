@@ -7,10 +7,11 @@ from rest_framework.viewsets import ReadOnlyModelViewSet
 
 from api.permissions.common import IsJWTAuthenticated
 from api.serializers.location import LocationSerializer, LocationCreateSerializer, TransportLocationCreateSerializer
+from api.views.abstract_viewsets.primary_permissions import PrimaryPermissionsMixin
 from core.models import Member, Location, Community, TransportCommunity
 
 
-class LocationViewSet(ReadOnlyModelViewSet):
+class LocationViewSet(PrimaryPermissionsMixin, ReadOnlyModelViewSet):
     """
 
     Inherits standard characteristics from ModelViewSet:
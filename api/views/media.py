@@ -1,7 +1,9 @@
 from rest_framework import viewsets
 from rest_framework.decorators import action
 from rest_framework.permissions import AllowAny
-from django.views.static import serve
+from django.utils.cache import patch_vary_headers
+from api.utils import thumbnails
+from api.utils.media_serving import serve
 
 
 class MediaViewSet(viewsets.ViewSet):
@@ -13,11 +15,14 @@ class MediaViewSet(viewsets.ViewSet):
         """ Get media:
 
                 | **permission**: authenticated
-                | **endpoint**: /media/path/
+                | **endpoint**: /media/path/ or /media/variants/variant/path/ (see MEDIA_VARIANTS)
                 | **method**: GET
                 | **http return**:
                 |       - 200 OK
+                |       - 206 Partial content (Range)
+                |       - 304 Not modified (If-None-Match)
                 |       - 404 Not allowed
+                |       - 416 Range not satisfiable
                 | **data return**:
                 |       - bytecode
 
@@ -26,4 +31,12 @@ class MediaViewSet(viewsets.ViewSet):
         #image = Image.open(path)
         #image.save(response, 'PNG')
         #return response
-        return serve(request, path, document_root)
+        variant = thumbnails.parse_variant_path(path)
+        if variant is None:
+            return serve(request, path, document_root)
+        variant, path = variant
+        webp = 'image/webp' in request.META.get('HTTP_ACCEPT', '')
+        response = serve(request, thumbnails.get_variant(document_root, path, variant, webp), document_root)
+        if thumbnails.webp_supported():
+            patch_vary_headers(response, ['Accept'])
+        return response
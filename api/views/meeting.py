@@ -7,6 +7,7 @@ from rest_framework.response import Response
 from api.permissions.common import IsJWTAuthenticated
 from api.permissions.meeting import IsConcernedByMeeting
 from api.serializers import MeetingSerializer, MeetingCreateSerializer
+from api.utils import audit
 from api.utils.notifier import Notifier
 from api.views.abstract_viewsets.custom_viewset import CustomViewSet
 from core.models import Meeting
@@ -39,6 +40,11 @@ class MeetingViewSet(CustomViewSet):
     def get_queryset(self):
         return self.model.objects.filter(Q(offer__user=self.request.user) | Q(offer__request__user=self.request.user))
 
+    @audit.atomic()
+    def create(self, request, *args, **kwargs):
+        # The notification and its mail are committed with the object
+        return super().create(request, *args, **kwargs)
+
     def pre_save(self, obj):
         super().pre_save(obj)
         self.set_auto_user(obj)
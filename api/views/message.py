@@ -3,12 +3,14 @@ from django.db.models import Q
 from api.permissions.common import IsJWTAuthenticated
 from api.permissions.message import IsConcernedByOffer
 from api.serializers.message import MessageSerializer, MessageCreateSerializer
+from api.utils import audit
 from api.utils.notifier import Notifier
+from api.views.abstract_viewsets.cursor_pagination import CursorPaginationMixin
 from api.views.abstract_viewsets.custom_viewset import CreateAndReadOnlyViewSet
 from core.models import Message
 
 
-class MessageViewSet(CreateAndReadOnlyViewSet):
+class MessageViewSet(CursorPaginationMixin, CreateAndReadOnlyViewSet):
     """
 
     Inherits standard characteristics from ModelViewSet for Create, List and Retrieve actions:
@@ -19,11 +21,13 @@ class MessageViewSet(CreateAndReadOnlyViewSet):
             |       - Default : IsConcernedByMeeting
             | **Notes**:
             |       - GET response restricted to 'MeetingMessage' objects linked with user
+            |       - GET with a 'cursor' parameter: cursor pagination (see CursorPaginationMixin)
 
     """
     model = Message
     serializer_class = MessageSerializer
     filter_fields = ('user__id', 'offer__id')
+    cursor_ordering = ('creation_date', 'id')
 
     def get_permissions(self):
         if self.request.method == 'GET':
@@ -36,6 +40,11 @@ class MessageViewSet(CreateAndReadOnlyViewSet):
             serializer_class = MessageCreateSerializer
         return serializer_class
 
+    @audit.atomic()
+    def create(self, request, *args, **kwargs):
+        # The notification and its mail are committed with the object
+        return super().create(request, *args, **kwargs)
+
     def pre_save(self, obj):
         super().pre_save(obj)
         self.set_auto_user(obj)
@@ -46,5 +55,5 @@ class MessageViewSet(CreateAndReadOnlyViewSet):
             Notifier.notify_new_message(obj)
 
     def get_queryset(self):
-        return self.model.objects.filter( Q(offer__user=self.request.user) |
+        return self.model.objects.feed().filter(Q(offer__user=self.request.user) |
                                           Q(offer__request__user=self.request.user)).order_by('creation_date')
@@ -1,38 +1,186 @@
-from django.contrib.admin.models import CHANGE
+from math import isfinite
+import time
+
+from django.conf import settings
+from django.contrib.admin.models import CHANGE, DELETION
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
 from django.utils import timezone
 from rest_framework import status
-from rest_framework.decorators import action
+from rest_framework.decorators import action, link
 from rest_framework.response import Response
 from api.permissions.common import IsJWTAuthenticated, IsJWTOwner
 from api.serializers.notification import NotificationSerializer
+from api.utils import notification_events
+from api.views.abstract_viewsets.cursor_pagination import CursorPaginationMixin
 from api.views.abstract_viewsets.custom_viewset import ReadAndDestroyViewSet
+from core.models import UserStats
 from core.models.notification import Notification
 
 
-class NotificationViewSet(ReadAndDestroyViewSet):
+class NotificationViewSet(CursorPaginationMixin, ReadAndDestroyViewSet):
     """ """
     model = Notification
     serializer_class = NotificationSerializer
+    cursor_ordering = ('created_on', 'id')
+
+    # POST actions on every notification of the user, rather than on one notification
+    user_actions = ('mark_all_seen', 'bulk_tag_as_seen', 'bulk_delete')
+
+    # Maximum number of ids given to a bulk action
+    bulk_max_ids = 1000
 
     def get_permissions(self):
         if self.request.method == 'GET':
             return [IsJWTAuthenticated()]
+        elif self.action in self.user_actions:
+            return [IsJWTAuthenticated()]
         return [IsJWTOwner()]
 
     def get_queryset(self):
         return self.model.objects.filter(user=self.request.user).order_by('created_on')
 
+    def post_delete(self, obj):
+        super().post_delete(obj)
+        if not obj.seen:
+            UserStats.objects.increment([obj.user_id], 'unread_notifications_count', -1)
+
     @action()
     def tag_as_seen(self, request, pk=None):
         """ """
         if pk is None:
             return Response({'detail': 'Missing object index.'}, status=status.HTTP_400_BAD_REQUEST)
-        if not self.model.objects.filter(id=pk).exists():
+        try:
+            n = self.model.objects.get(id=pk)
+        except self.model.DoesNotExist:
             return Response({'detail': 'This object does not exist'}, status=status.HTTP_400_BAD_REQUEST)
-        n = self.model.objects.get(id=pk)
-        n.seen = True
-        n.seen_on = timezone.now()
-        n.save()
+        if not n.seen:
+            n.seen = True
+            n.seen_on = timezone.now()
+            # Conditional update: concurrent calls must not both decrement the unread counter
+            if self.model.objects.filter(id=n.id, seen=False).update(seen=True, seen_on=n.seen_on):
+                UserStats.objects.increment([n.user_id], 'unread_notifications_count', -1)
         serializer = self.serializer_class(n, many=False)
         self.log(n, CHANGE, None, "Tagged as seen")
-        return Response(serializer.data, status=status.HTTP_200_OK)
\ No newline at end of file
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    @action()
+    def mark_all_seen(self, request, pk=None):
+        """ Tags every unseen notification of the user as seen, in one query """
+        with transaction.atomic():
+            count = self.model.objects.filter(user=request.user, seen=False) \
+                                      .update(seen=True, seen_on=timezone.now())
+            if count:
+                UserStats.objects.increment([request.user.id], 'unread_notifications_count', -count)
+        self.log(self.model(user=request.user), CHANGE, 0, "Tagged %d as seen: all" % count)
+        return Response({'count': count}, status=status.HTTP_200_OK)
+
+    @link()
+    def unread_count(self, request, pk=None):
+        """ Number of unseen notifications of the user, read from his stats """
+        stats = UserStats.objects.get_for_user(request.user.id)
+        return Response({'unread_count': stats.unread_notifications_count}, status=status.HTTP_200_OK)
+
+    @link()
+    def wait(self, request, pk=None):
+        """
+        Long polling: returns the notifications of the user newer than 'since' (a notification id),
+        as soon as there are some, or an empty list after 'timeout' seconds (NOTIFICATION_WAIT_TIMEOUT at most).
+        Returns at once when NOTIFICATION_MAX_WAITERS requests of the process are already waiting.
+        """
+        try:
+            since = int(request.QUERY_PARAMS['since'])
+        except (KeyError, ValueError):
+            return Response({'detail': "An integer 'since' parameter is required."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            timeout = float(request.QUERY_PARAMS.get('timeout', settings.NOTIFICATION_WAIT_TIMEOUT))
+        except ValueError:
+            timeout = None
+        if timeout is None or not isfinite(timeout) or timeout < 0:
+            return Response({'detail': "'timeout' must be a positive number of seconds."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        timeout = min(timeout, settings.NOTIFICATION_WAIT_TIMEOUT)
+        deadline = time.time() + timeout
+        with notification_events.waiter_slot() as may_wait:
+            while True:
+                # Read before the query: a notification published after it changes the version
+                version = notification_events.version(request.user.id)
+                notifications = list(self.get_queryset().filter(id__gt=since)[:self.get_paginate_by() or 30])
+                remaining = deadline - time.time()
+                if notifications or remaining <= 0 or not may_wait:
+                    break
+                # Not held while waiting: given back to the pool, or opened again by the next query
+                if not connection.in_atomic_block:
+                    connection.close()
+                # Bounded: notifications committed later, or created by another process, are not published here
+                notification_events.wait(request.user.id, version,
+                                         min(remaining, notification_events.POLL_INTERVAL))
+        stats = UserStats.objects.get_for_user(request.user.id)
+        serializer = self.get_serializer(notifications, many=True)
+        return Response({'unread_count': stats.unread_notifications_count, 'results': serializer.data},
+                        status=status.HTTP_200_OK)
+
+    def get_bulk_queryset(self, request):
+        """
+        Returns the notifications of the user selected by a bulk action, and their description,
+        from either 'ids', a list of notification ids, or 'before', a cursor of the list: every
+        notification up to the last one of the page it follows.
+        Returns an error response instead of the queryset on invalid input.
+        """
+        queryset = self.model.objects.filter(user=request.user)
+        if 'ids' in request.DATA:
+            ids = request.DATA.getlist('ids') if hasattr(request.DATA, 'getlist') else request.DATA['ids']
+            try:
+                if not isinstance(ids, list):
+                    raise TypeError(ids)
+                ids = sorted(set(int(i) for i in ids))
+            except (TypeError, ValueError):
+                return None, None, Response({'detail': "'ids' must be a list of integers."},
+                                            status=status.HTTP_400_BAD_REQUEST)
+            if len(ids) > self.bulk_max_ids:
+                return None, None, Response({'detail': 'At most %d ids are accepted.' % self.bulk_max_ids},
+                                            status=status.HTTP_400_BAD_REQUEST)
+            return queryset.filter(id__in=ids), 'ids ' + ', '.join(str(i) for i in ids), None
+        if 'before' in request.DATA:
+            fields = self.cursor_fields()
+            try:
+                values = self.decode_cursor(request.DATA['before'], fields)
+            except (ValueError, TypeError, AttributeError, ValidationError):
+                return None, None, Response({'detail': 'Invalid cursor.'}, status=status.HTTP_400_BAD_REQUEST)
+            return queryset.exclude(self.after_cursor(fields, values)), \
+                'up to %s' % ', '.join(str(value) for value in values), None
+        return None, None, Response({'detail': "Either 'ids' or 'before' is required."},
+                                    status=status.HTTP_400_BAD_REQUEST)
+
+    @action()
+    def bulk_tag_as_seen(self, request, pk=None):
+        """ Tags the selected notifications of the user as seen, in one query """
+        queryset, description, error = self.get_bulk_queryset(request)
+        if error is not None:
+            return error
+        with transaction.atomic():
+            count = queryset.filter(seen=False).update(seen=True, seen_on=timezone.now())
+            if count:
+                UserStats.objects.increment([request.user.id], 'unread_notifications_count', -count)
+        self.log(self.model(user=request.user), CHANGE, 0, ("Tagged %d as seen: %s" % (count, description))[:1000])
+        return Response({'count': count}, status=status.HTTP_200_OK)
+
+    @action()
+    def bulk_delete(self, request, pk=None):
+        """ Deletes the selected notifications of the user, in one query """
+        queryset, description, error = self.get_bulk_queryset(request)
+        if error is not None:
+            return error
+        with transaction.atomic():
+            # Locked before counting: a concurrent tag as seen of the same rows waits, and decrements
+            # the unread counter only for rows still there
+            rows = list(queryset.select_for_update().values_list('id', 'seen'))
+            # Notifications have no dependent rows nor delete receivers: a single DELETE, without loading them
+            self.model.objects.filter(id__in=[row_id for row_id, seen in rows]).delete()
+            unseen = sum(1 for row_id, seen in rows if not seen)
+            if unseen:
+                UserStats.objects.increment([request.user.id], 'unread_notifications_count', -unseen)
+        count = len(rows)
+        self.log(self.model(user=request.user), DELETION, 0, ("Deleted %d: %s" % (count, description))[:1000])
+        return Response({'count': count}, status=status.HTTP_200_OK)
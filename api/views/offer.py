@@ -3,6 +3,7 @@ from django.db.models import Q
 from api.permissions.common import IsJWTAuthenticated, IsJWTOwner
 from api.permissions.offer import IsJWTConcernedByOffer
 from api.serializers import OfferSerializer, OfferCreateSerializer
+from api.utils import audit
 from api.utils.notifier import Notifier
 from api.views.abstract_viewsets.custom_viewset import CustomViewSet
 from core.models import Offer
@@ -33,6 +34,11 @@ class OfferViewSet(CustomViewSet):
             return [IsJWTConcernedByOffer()]
         return [IsJWTOwner()]
 
+    @audit.atomic()
+    def create(self, request, *args, **kwargs):
+        # The notification and its mail are committed with the object
+        return super().create(request, *args, **kwargs)
+
     def pre_save(self, obj):
         super().pre_save(obj)
         self.set_auto_user(obj)
@@ -43,4 +49,4 @@ class OfferViewSet(CustomViewSet):
             Notifier.notify_new_offer(obj)
 
     def get_queryset(self):
-        return Offer.objects.filter(Q(user=self.request.user) | Q(request__user=self.request.user))
+        return Offer.objects.feed().filter(Q(user=self.request.user) | Q(request__user=self.request.user))
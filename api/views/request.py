@@ -1,5 +1,4 @@
 from django.contrib.admin.models import CHANGE
-from django.contrib.auth import get_user_model
 from django.db.models import Q
 from rest_framework.decorators import link, action
 from rest_framework.response import Response
@@ -7,11 +6,12 @@ from rest_framework import status
 
 from api.permissions.common import IsJWTAuthenticated, IsJWTOwner
 from api.serializers import RequestSerializer, RequestCreateSerializer
+from api.views.abstract_viewsets.cursor_pagination import CursorPaginationMixin
 from api.views.abstract_viewsets.custom_viewset import CustomViewSet
 from core.models import Request, Member, Skill, Offer, Community
 
 
-class RequestViewSet(CustomViewSet):
+class RequestViewSet(CursorPaginationMixin, CustomViewSet):
     """
 
     Inherits standard characteristics from ModelViewSet:
@@ -24,12 +24,14 @@ class RequestViewSet(CustomViewSet):
             |       - POST : IsJWTSelf
             | **Notes**:
             |       - GET response restricted to 'Requests' objects linked with user and not closed
+            |       - GET with a 'cursor' parameter: cursor pagination (see CursorPaginationMixin)
 
     """
     model = Request
     create_serializer_class = RequestCreateSerializer
     serializer_class = RequestSerializer
     filter_fields = ['user__id', 'category__id', 'closed']
+    cursor_ordering = ('-created_on', '-id')
 
     def get_permissions(self):
         if self.request.method in ['GET', 'POST']:
@@ -41,10 +43,10 @@ class RequestViewSet(CustomViewSet):
         self.set_auto_user(obj)
 
     def get_queryset(self):
+        # Authors sharing a community with the user are read from the CoMembership index
         my_communities = Member.objects.filter(user=self.request.user, status="1").values('community')
-        linked_users = Member.objects.filter(community__in=my_communities).values('user')
-        return self.model.objects.filter(Q(user__in=linked_users),
-                                         Q(community=None) | Q(community__in=my_communities))
+        return self.model.objects.feed().filter(Q(user__peer_of__user=self.request.user),
+                                                Q(community=None) | Q(community__in=my_communities))
 
     @link()
     def list_my_requests(self, request, pk=None):
@@ -76,7 +78,9 @@ class RequestViewSet(CustomViewSet):
                 |       None
 
         """
-        requests = self.model.objects.filter(user=self.request.user).order_by('-created_on')
+        requests = self.model.objects.feed().filter(user=self.request.user).order_by('-created_on')
+        if self.uses_cursor():
+            return self.get_cursor_response(requests)
         serializer = self.get_paginated_serializer(requests)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
@@ -89,9 +93,10 @@ class RequestViewSet(CustomViewSet):
             return Response({'detail': 'This community does not exist'}, status=status.HTTP_400_BAD_REQUEST)
         community = Community.objects.get(id=request.QUERY_PARAMS['community'])
         members = Member.objects.filter(community=community, status='1').values('user')
-        users = get_user_model().objects.filter(id__in=members)
         requests = self.get_queryset().filter(Q(community=community)
-                                              | (Q(community=None) & Q(user__in=users)))
+                                              | (Q(community=None) & Q(user__in=members)))
+        if self.uses_cursor():
+            return self.get_cursor_response(requests)
         serializer = self.get_paginated_serializer(requests.order_by('-created_on'))
         return Response(serializer.data, status=status.HTTP_200_OK)
 
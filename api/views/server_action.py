@@ -1,8 +1,5 @@
-import datetime
-
 from django.conf import settings
-from django.db.models import Count
-from django.utils import timezone
+from django.db import transaction
 
 from rest_framework.decorators import api_view, permission_classes, throttle_classes
 from rest_framework.response import Response
@@ -11,8 +8,9 @@ from rest_framework.throttling import AnonRateThrottle
 from api.permissions.server_actions import HasAllowedIp
 
 from api.utils.asyncronous_mail import send_mail
-from core.models import Request, Inappropriate
-from core.models.password_recovery import PasswordRecovery
+from core.db_pool import pool_stats
+from core.models import Request, ReportedContent
+from core.models.expiring_token import reap_expired_tokens
 
 
 
@@ -21,14 +19,10 @@ from core.models.password_recovery import PasswordRecovery
 @throttle_classes([AnonRateThrottle])
 def auto_close_requests(request):
     """
-
+    Close the auto_close requests which expected end date is over, and their open offers.
+    Returns the numbers of closed requests and offers, and the elapsed time.
     """
-    requests = Request.objects.filter(auto_close=True, closed=False, expected_end_date__lt=datetime.date.today())
-    for r in requests:
-        r.closed = True
-        r.end_date = datetime.date.today()
-        r.save()
-    return Response(status.HTTP_200_OK)
+    return Response(Request.objects.auto_close(), status=status.HTTP_200_OK)
 
 
 @api_view(['POST'])
@@ -36,14 +30,13 @@ def auto_close_requests(request):
 @throttle_classes([AnonRateThrottle])
 def clean_password_recovery_tokens(request):
     """
-    Delete automatically password recovery tokens which lifetime exceeds
-    the PRT_VALIDITY setting.
+    Delete automatically password recovery and activation tokens which lifetime exceeds
+    the PRT_VALIDITY and ACTIVATION_TOKEN_VALIDITY settings.
+    With 'dry_run', only count them.
+    Returns the number of tokens per model.
     """
-    limit = timezone.now() - datetime.timedelta(hours=settings.PRT_VALIDITY)
-    tokens = PasswordRecovery.objects.filter(request_datetime__lt=limit)
-    for t in tokens:
-        t.delete()
-    return Response(status.HTTP_200_OK)
+    dry_run = request.DATA.get('dry_run', False) in (True, 'true', 'True', '1')
+    return Response(reap_expired_tokens(dry_run=dry_run), status=status.HTTP_200_OK)
 
 
 @api_view(['POST'])
@@ -51,19 +44,32 @@ def clean_password_recovery_tokens(request):
 @throttle_classes([AnonRateThrottle])
 def manage_reported_objects(request):
     """
-    Analyses if a single object is reported more than five time.
-    If yes, it warns service administrators.
+    Counts the reports created since the last run, per reported object.
+    Objects reported more than INAP_LIMIT times are sent to the service administrators,
+    once per object, in a single digest mail.
     """
-    qs = Inappropriate.objects.values('content_identifier').annotate(total=Count('content_identifier'))
-    #qs = qs.order_by('content_identifier')
-    for obj in qs:
-        if obj['total'] > settings.INAP_LIMIT:
-            message = 'Content URL :\n' + obj['content_identifier'] \
-                + '\n\nThis content has been reported as inappropriate more than ' + str(settings.INAP_LIMIT) + ' times.' \
+    with transaction.atomic():
+        identifiers = ReportedContent.objects.fold_new_reports()
+        alerts = ReportedContent.objects.new_alerts(identifiers, settings.INAP_LIMIT)
+        if alerts:
+            message = 'These contents have been reported as inappropriate more than ' + str(settings.INAP_LIMIT) \
+                + ' times :\n\n' \
+                + '\n'.join(alert.content_identifier + ' (' + str(alert.total) + ' reports)' for alert in alerts) \
                 + '\n\nPlease, specific attention required !'
-
-            send_mail('[SmarTribe] Inappropriate content warning : ' + obj['content_identifier'],
+            send_mail('[SmarTribe] Inappropriate content warning : ' + str(len(alerts)) + ' contents',
                       message,
                       'noreply@smartribe.fr',
                       ['contact@smartribe.fr'])
-    return Response(status.HTTP_200_OK)
+    return Response({'reported': len(identifiers), 'alerts': len(alerts)}, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes((HasAllowedIp,))
+@throttle_classes([AnonRateThrottle])
+def database_pool_stats(request):
+    """
+    Statistics of the database connection pools (core.db_pool) of the worker process answering:
+    checkouts, connections created and closed, health check failures, timeouts, and checkout wait times.
+    """
+    return Response(pool_stats(), status=status.HTTP_200_OK)
+
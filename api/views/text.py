@@ -1,11 +1,12 @@
 from django.contrib.auth.models import AnonymousUser
 from rest_framework import viewsets
 from rest_framework.permissions import AllowAny
+from api.views.abstract_viewsets.cached_content import CachedContentMixin
 from api.serializers.text import TextSerializer
 from core.models.text import Text
 
 
-class TextViewSet(viewsets.ReadOnlyModelViewSet):
+class TextViewSet(CachedContentMixin, viewsets.ReadOnlyModelViewSet):
     """
     Inherits standard characteristics from ReadOnlyModelViewSet:
 
@@ -14,11 +15,13 @@ class TextViewSet(viewsets.ReadOnlyModelViewSet):
             | **Permissions**:
             |       - AllowAny : Public texts
             |       - IsJWTAuthenticated : All texts
+            | **Caching**: responses are cached until the content changes (CachedContentMixin), with an ETag
 
     """
     model = Text
     serializer_class = TextSerializer
     permission_classes = [AllowAny]
+    cache_namespace = 'text'
 
     filter_fields = ('tag', )
     lookup_field = "tag"
@@ -17,6 +17,7 @@ from api.mail_templates.user import registration_message, recovery_password_mess
 from api.permissions.common import IsJWTAuthenticated, IsJWTMe
 from api.serializers import UserCreateSerializer, UserPublicSerializer, UserSerializer
 from api.utils.asyncronous_mail import send_mail
+from api.views.abstract_viewsets.primary_permissions import PrimaryPermissionsMixin
 from core.models import ActivationToken, PasswordRecovery, Evaluation, Profile, Member, LocalCommunity
 import core.utils
 
@@ -32,7 +33,7 @@ class UserFilter(django_filters.FilterSet):
         fields = ['email', ]
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(PrimaryPermissionsMixin, viewsets.ModelViewSet):
     """
     Inherits standard characteristics from ModelViewSet:
 
@@ -81,9 +82,7 @@ class UserViewSet(viewsets.ModelViewSet):
             create = True
             profile = Profile(user=obj)
             profile.save()
-            token = ActivationToken(user=obj,
-                                    token=core.utils.gen_temporary_token())
-            token.save()
+            token = ActivationToken.objects.issue(user=obj)
             subject, message = registration_message(token)
             send_mail(subject,
                       message,
@@ -137,12 +136,12 @@ class UserViewSet(viewsets.ModelViewSet):
         token = pk
         if token is None:
             return Response({"detail": "Missing token"}, status=status.HTTP_400_BAD_REQUEST)
-        if not ActivationToken.objects.filter(token=token).exists():
+        activation = ActivationToken.objects.consume(token)
+        if activation is None:
             return Response({"detail": "Activation error"}, status=status.HTTP_400_BAD_REQUEST)
-        user = ActivationToken.objects.get(token=token).user
+        user = activation.user
         user.is_active = True
         user.save()
-        ActivationToken.objects.get(token=token).delete()
         LogEntry.objects.log_action(user_id=user.id,
                                     content_type_id=ContentType.objects.get_for_model(self.model).pk,
                                     object_id=user.id,
@@ -184,9 +183,7 @@ class UserViewSet(viewsets.ModelViewSet):
             delta = datetime.now(tz=fr) - last_pr.request_datetime
             if delta < timedelta(minutes=5):
                 return Response({"detail": "Try again after 5 min"}, status=status.HTTP_401_UNAUTHORIZED)
-        token = core.utils.gen_temporary_token()
-        pr = PasswordRecovery(user=user, token=token, ip_address=ip)
-        pr.save()
+        pr = PasswordRecovery.objects.issue(user=user, ip_address=ip)
         subject, message = recovery_password_message(pr)
         send_mail(subject,
                   message,
@@ -225,9 +222,10 @@ class UserViewSet(viewsets.ModelViewSet):
             return Response({"detail": "Token required"}, status=status.HTTP_400_BAD_REQUEST)
         if not 'password' in data:
             return Response({"detail": "Password required"}, status=status.HTTP_400_BAD_REQUEST)
-        if not PasswordRecovery.objects.filter(token=token).exists():
+        recovery = PasswordRecovery.objects.consume(token)
+        if recovery is None:
             return Response({"detail": "No password renewal request"}, status=status.HTTP_400_BAD_REQUEST)
-        user = PasswordRecovery.objects.get(token=token).user
+        user = recovery.user
         user.password = make_password(data['password'])
         user.save()
         PasswordRecovery.objects.filter(user=user).delete()
@@ -0,0 +1,224 @@
+"""
+Database backends keeping the connections of a process in a pool:
+'core.db_pool.mysql' and 'core.db_pool.sqlite3', configured by the 'POOL' entry of a database:
+
+    'POOL': {
+        'MAX_SIZE': 10,         # Connections open at once in the process, None for no bound
+        'MIN_SIZE': 2,          # Connections opened by warm_up()
+        'TIMEOUT': 10,          # Seconds waited for a connection when MAX_SIZE are in use
+        'CHECK_AFTER': 30,      # Connections idle for longer are checked (SELECT 1) before reuse
+        'MAX_LIFETIME': 3600,   # Connections older are closed instead of reused
+    }
+
+Django closes the connection of a thread at the end of each request (CONN_MAX_AGE = 0): it is given
+back to the pool instead, and reused by the next request of any thread of the process.
+"""
+import os
+import threading
+import time
+
+from django.db import connections
+from django.db.utils import OperationalError
+
+
+DEFAULTS = {
+    'MAX_SIZE': None,
+    'MIN_SIZE': 0,
+    'TIMEOUT': 10,
+    'CHECK_AFTER': 30,
+    'MAX_LIFETIME': 3600,
+}
+
+
+class PoolTimeout(OperationalError):
+    pass
+
+
+class ConnectionPool():
+    """
+    Thread safe pool of the raw connections of a process, with checkout statistics.
+    Idle connections are reused last in, first out: the most recently used are the most likely alive.
+    """
+
+    def __init__(self, options=None):
+        self.options = dict(DEFAULTS, **(options or {}))
+        self._lock = threading.Condition()
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        # [(connection, last_used)], and the creation time of every open connection
+        self._idle = []
+        self._created_on = {}
+        self._in_use = 0
+        self.metrics = {'checkouts': 0, 'created': 0, 'closed': 0, 'health_check_failures': 0, 'timeouts': 0,
+                        'wait_total': 0.0, 'wait_max': 0.0}
+
+    def acquire(self, connect, check):
+        """
+        Returns an idle connection, checked with check(connection) if idle for long, or a new one
+        from connect(). Waits TIMEOUT seconds at most when MAX_SIZE connections are in use.
+        """
+        start = time.time()
+        with self._lock:
+            if self._pid != os.getpid():
+                # Forked: the connections belong to the parent process
+                self._reset()
+            max_size = self.options['MAX_SIZE']
+            while max_size is not None and self._in_use >= max_size:
+                remaining = start + self.options['TIMEOUT'] - time.time()
+                if remaining <= 0:
+                    self.metrics['timeouts'] += 1
+                    raise PoolTimeout('No database connection available after %ss' % self.options['TIMEOUT'])
+                self._lock.wait(remaining)
+            self._in_use += 1
+            waited = time.time() - start
+            self.metrics['checkouts'] += 1
+            self.metrics['wait_total'] += waited
+            self.metrics['wait_max'] = max(self.metrics['wait_max'], waited)
+        try:
+            while True:
+                with self._lock:
+                    if not self._idle:
+                        break
+                    connection, last_used = self._idle.pop()
+                if self._expired(connection):
+                    self._discard(connection)
+                elif time.time() - last_used > self.options['CHECK_AFTER'] and not check(connection):
+                    with self._lock:
+                        self.metrics['health_check_failures'] += 1
+                    self._discard(connection)
+                else:
+                    return connection
+            connection = connect()
+            with self._lock:
+                self._created_on[id(connection)] = time.time()
+                self.metrics['created'] += 1
+            return connection
+        except BaseException:
+            with self._lock:
+                self._in_use -= 1
+                self._lock.notify()
+            raise
+
+    def release(self, connection, reusable=True):
+        """ Gives back a connection obtained from acquire(), closed unless reusable """
+        if not reusable or self._expired(connection):
+            self._discard(connection)
+        with self._lock:
+            if reusable and id(connection) in self._created_on:
+                self._idle.append((connection, time.time()))
+            self._in_use -= 1
+            self._lock.notify()
+
+    def _expired(self, connection):
+        created = self._created_on.get(id(connection))
+        return created is None or time.time() - created > self.options['MAX_LIFETIME']
+
+    def _discard(self, connection):
+        with self._lock:
+            self._created_on.pop(id(connection), None)
+            self.metrics['closed'] += 1
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.metrics, idle=len(self._idle), in_use=self._in_use,
+                         max_size=self.options['MAX_SIZE'])
+        stats['wait_average'] = stats['wait_total'] / stats['checkouts'] if stats['checkouts'] else 0.0
+        return stats
+
+    def close_idle(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection, _ in idle:
+            self._discard(connection)
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias, options):
+    with _pools_lock:
+        if alias not in _pools:
+            _pools[alias] = ConnectionPool(options)
+        return _pools[alias]
+
+
+class PooledDatabaseWrapperMixin(object):
+    """ DatabaseWrapper taking its connections from the pool of its alias """
+
+    @property
+    def pool(self):
+        return get_pool(self.alias, self.settings_dict.get('POOL'))
+
+    def get_new_connection(self, conn_params):
+        return self.pool.acquire(lambda: self.open_raw_connection(conn_params), self.check_raw_connection)
+
+    def open_raw_connection(self, conn_params):
+        return super(PooledDatabaseWrapperMixin, self).get_new_connection(conn_params)
+
+    @staticmethod
+    def check_raw_connection(connection):
+        try:
+            cursor = connection.cursor()
+            try:
+                cursor.execute('SELECT 1')
+                cursor.fetchall()
+            finally:
+                cursor.close()
+            return True
+        except Exception:
+            return False
+
+    def _close(self):
+        if self.connection is None:
+            return
+        # Closed within an atomic block, the connection stays referenced until the block exits: not reusable
+        reusable = not self.in_atomic_block
+        try:
+            # Nothing of a request may leak to the next one
+            if reusable and not self.get_autocommit():
+                self.connection.rollback()
+            if reusable and self.errors_occurred:
+                reusable = self.check_raw_connection(self.connection)
+        except Exception:
+            reusable = False
+        self.pool.release(self.connection, reusable)
+
+
+def warm_up(handler=connections):
+    """
+    Opens MIN_SIZE connections in the pool of each pooled database, to be called
+    in each worker process before its first request (see smartribe/gunicorn_conf.py).
+    Returns {alias: number of connections opened}.
+    """
+    opened = {}
+    for alias in handler:
+        wrapper = handler[alias]
+        if not isinstance(wrapper, PooledDatabaseWrapperMixin):
+            continue
+        pool = wrapper.pool
+        stats = pool.stats()
+        open_count = stats['idle'] + stats['in_use']
+        count = max(pool.options['MIN_SIZE'] - open_count, 0)
+        if pool.options['MAX_SIZE'] is not None:
+            count = max(min(count, pool.options['MAX_SIZE'] - open_count), 0)
+        params = wrapper.get_connection_params()
+        raw_connections = [pool.acquire(lambda: wrapper.open_raw_connection(params), wrapper.check_raw_connection)
+                           for _ in range(count)]
+        for connection in raw_connections:
+            pool.release(connection)
+        opened[alias] = count
+    return opened
+
+
+def pool_stats():
+    """ Statistics of the pools of this process, by database alias """
+    with _pools_lock:
+        pools = list(_pools.items())
+    return dict((alias, pool.stats()) for alias, pool in pools)
@@ -0,0 +1,8 @@
+from django.db.backends.mysql import base
+from django.db.backends.mysql.base import *  # NOQA
+
+from core.db_pool import PooledDatabaseWrapperMixin
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, base.DatabaseWrapper):
+    """ MySQL backend with pooled connections (see core.db_pool) """
@@ -0,0 +1,8 @@
+from django.db.backends.sqlite3 import base
+from django.db.backends.sqlite3.base import *  # NOQA
+
+from core.db_pool import PooledDatabaseWrapperMixin
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, base.DatabaseWrapper):
+    """ SQLite backend with pooled connections (see core.db_pool), mostly for tests """
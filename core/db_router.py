@@ -0,0 +1,129 @@
+"""
+Read replicas: reads of GET and HEAD requests are sent to one of DATABASE_REPLICAS, everything else
+to 'default' (the primary), with:
+
+    DATABASE_ROUTERS = ['core.db_router.ReplicaRouter']
+    # After ReplicaRoutingMiddleware, which decides per request
+    MIDDLEWARE_CLASSES += ('core.db_router.ReplicaRoutingMiddleware',)
+
+Read your writes: once a client sent a POST, PUT, PATCH or DELETE, its reads stay on the primary
+for DATABASE_REPLICA_STICKY_SECONDS, the longest replication lag expected. The response to the write
+sets a signed cookie, valid for the window, which holds whichever process serves the next request.
+Clients that do not keep cookies are also recognized by user (JWT) and by IP address, in the default
+cache: for them the window only holds across processes when the cache is shared (memcached).
+
+Reads that must see fresh data run within use_primary() (permission checks of the viewsets, see
+api/views/abstract_viewsets/primary_permissions.py), and reads within a transaction of the primary
+stay on it. post_save hooks only run for writing requests, whose reads are on the primary.
+"""
+from contextlib import contextmanager
+import random
+import threading
+
+import jwt
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from rest_framework.authentication import get_authorization_header
+from rest_framework_jwt.authentication import jwt_decode_handler
+from rest_framework_jwt.settings import api_settings
+
+import core.utils
+
+
+SAFE_METHODS = ('GET', 'HEAD')
+
+_local = threading.local()
+
+
+def replicas():
+    return tuple(getattr(settings, 'DATABASE_REPLICAS', ()))
+
+
+def reads_on_replica():
+    """ Whether reads of the current thread may go to a replica """
+    return getattr(_local, 'replica', False) and bool(replicas())
+
+
+@contextmanager
+def use_replica(enabled=True):
+    """ Reads of the block go to a replica when enabled (as for GET requests), to the primary otherwise """
+    previous = getattr(_local, 'replica', False)
+    _local.replica = enabled
+    try:
+        yield
+    finally:
+        _local.replica = previous
+
+
+def use_primary():
+    """ Reads of the block go to the primary, for data that must be fresh """
+    return use_replica(False)
+
+
+class ReplicaRouter(object):
+    """ Database router sending reads to a random replica when allowed for the thread """
+
+    def db_for_read(self, model, **hints):
+        if not reads_on_replica() or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas())
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, model):
+        # Replicas get the schema from the primary
+        return db not in replicas()
+
+
+STICKY_COOKIE = 'db_primary'
+
+
+def sticky_window():
+    return getattr(settings, 'DATABASE_REPLICA_STICKY_SECONDS', 5)
+
+
+def client_keys(request):
+    """ Cache keys of the client of a request: its IP address, and its user when it sends a JWT """
+    keys = ['db-primary:ip:%s' % core.utils.get_client_ip(request)]
+    auth = get_authorization_header(request).split()
+    if len(auth) == 2 and auth[0].lower() == api_settings.JWT_AUTH_HEADER_PREFIX.lower().encode():
+        try:
+            keys.append('db-primary:user:%s' % jwt_decode_handler(auth[1])['user_id'])
+        except (jwt.ExpiredSignature, jwt.DecodeError, KeyError):
+            pass
+    return keys
+
+
+def stick_to_primary(request, response):
+    """ Sends the reads of the client of request to the primary for DATABASE_REPLICA_STICKY_SECONDS """
+    window = sticky_window()
+    if window <= 0:
+        return
+    response.set_signed_cookie(STICKY_COOKIE, '1', salt=STICKY_COOKIE, max_age=window, httponly=True)
+    cache.set_many(dict((key, True) for key in client_keys(request)), window)
+
+
+def is_sticky(request):
+    if request.get_signed_cookie(STICKY_COOKIE, default=None, salt=STICKY_COOKIE, max_age=sticky_window()):
+        return True
+    return bool(cache.get_many(client_keys(request)))
+
+
+class ReplicaRoutingMiddleware(object):
+    """ Allows replica reads for GET and HEAD requests of clients that did not write recently """
+
+    def process_request(self, request):
+        _local.replica = (bool(replicas()) and request.method in SAFE_METHODS
+                          and not is_sticky(request))
+
+    def process_response(self, request, response):
+        _local.replica = False
+        if replicas() and request.method not in SAFE_METHODS:
+            stick_to_primary(request, response)
+        return response
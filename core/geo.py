@@ -0,0 +1,103 @@
+from math import asin, cos, floor, isfinite, radians, sin, sqrt
+
+
+# Geohash cells, used to prefilter GPS points on an indexed column.
+# gps_x is the longitude, gps_y the latitude, as in LocalCommunity and Location.
+
+GEOHASH_PRECISION = 8
+
+GEOHASH_ALPHABET = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+EARTH_RADIUS = 6371.0
+
+
+def _cell_size(precision):
+    """ Returns the (longitude, latitude) size in degrees of the cells of a precision """
+    bits = 5 * precision
+    return 360.0 / 2 ** ((bits + 1) // 2), 180.0 / 2 ** (bits // 2)
+
+
+def geohash_encode(gps_x, gps_y, precision=GEOHASH_PRECISION):
+    """ """
+    lon_range, lat_range = [-180.0, 180.0], [-90.0, 90.0]
+    chars = []
+    bit, char, even = 0, 0, True
+    while len(chars) < precision:
+        interval, value = (lon_range, gps_x) if even else (lat_range, gps_y)
+        middle = (interval[0] + interval[1]) / 2
+        char <<= 1
+        if value >= middle:
+            char |= 1
+            interval[0] = middle
+        else:
+            interval[1] = middle
+        even = not even
+        bit += 1
+        if bit == 5:
+            chars.append(GEOHASH_ALPHABET[char])
+            bit, char = 0, 0
+    return ''.join(chars)
+
+
+def is_valid_point(gps_x, gps_y):
+    """ Whether a GPS point is finite, with its longitude within [-180, 180] and its latitude within [-90, 90] """
+    return isfinite(gps_x) and isfinite(gps_y) and -180 <= gps_x <= 180 and -90 <= gps_y <= 90
+
+
+def geohash_cover(gps_x, gps_y, radius, max_cells=16):
+    """
+    Returns the geohash prefixes covering a circle (radius in km),
+    with the longest prefixes for which at most max_cells are needed.
+    Returns None when the circle cannot be covered (around the poles or the antimeridian).
+    Raises ValueError for an invalid point or radius.
+    """
+    if not is_valid_point(gps_x, gps_y) or not isfinite(radius) or radius < 0:
+        raise ValueError('Invalid GPS point or radius')
+    delta_y = radius / 111.0
+    if abs(gps_y) + delta_y >= 90:
+        return None
+    delta_x = radius / (111.0 * cos(radians(gps_y)))
+    if abs(gps_x) + delta_x >= 180:
+        return None
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        width, height = _cell_size(precision)
+        first_x, last_x = floor((gps_x - delta_x + 180) / width), floor((gps_x + delta_x + 180) / width)
+        first_y, last_y = floor((gps_y - delta_y + 90) / height), floor((gps_y + delta_y + 90) / height)
+        if (last_x - first_x + 1) * (last_y - first_y + 1) > max_cells:
+            continue
+        return sorted(set(geohash_encode((x + 0.5) * width - 180, (y + 0.5) * height - 90, precision)
+                          for x in range(int(first_x), int(last_x) + 1)
+                          for y in range(int(first_y), int(last_y) + 1)))
+    return None
+
+
+def haversine(gps_x1, gps_y1, gps_x2, gps_y2):
+    """ Great circle distance in km """
+    d_x = radians(gps_x2 - gps_x1)
+    d_y = radians(gps_y2 - gps_y1)
+    a = sin(d_y / 2) ** 2 + cos(radians(gps_y1)) * cos(radians(gps_y2)) * sin(d_x / 2) ** 2
+    return 2 * EARTH_RADIUS * asin(min(1.0, sqrt(a)))
+
+
+def around(queryset, gps_x, gps_y, radius):
+    """
+    Returns the objects of queryset within radius (km) of a GPS point, closest first.
+    Candidates are prefiltered on their geohash cell, then each gets its exact 'distance' (km).
+    """
+    from django.db.models import Q
+    cells = geohash_cover(gps_x, gps_y, radius)
+    if cells is not None:
+        prefilter = Q()
+        for cell in cells:
+            prefilter |= Q(geohash__startswith=cell)
+        queryset = queryset.filter(prefilter)
+    distances = {}
+    for pk, obj_x, obj_y in queryset.values_list('pk', 'gps_x', 'gps_y'):
+        distance = haversine(gps_x, gps_y, obj_x, obj_y)
+        if distance <= radius:
+            distances[pk] = distance
+    results = list(queryset.in_bulk(list(distances)).values())
+    for obj in results:
+        obj.distance = distances[obj.pk]
+    results.sort(key=lambda obj: (obj.distance, obj.pk))
+    return results
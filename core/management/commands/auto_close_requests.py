@@ -0,0 +1,19 @@
+from optparse import make_option
+
+from django.core.management.base import BaseCommand
+
+from core.models import Request
+
+
+class Command(BaseCommand):
+    help = 'Closes the auto_close requests which expected end date is over, and their open offers.'
+
+    option_list = BaseCommand.option_list + (
+        make_option('--batch-size', action='store', dest='batch_size', type='int', default=1000,
+                    help='Number of requests closed per transaction.'),
+    )
+
+    def handle(self, *args, **options):
+        stats = Request.objects.auto_close(options['batch_size'])
+        self.stdout.write('%d requests and %d offers closed in %.3fs.'
+                          % (stats['requests'], stats['offers'], stats['elapsed']))
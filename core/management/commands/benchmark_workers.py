@@ -0,0 +1,124 @@
+from optparse import make_option
+import http.client
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+import core.utils
+
+
+def run_load(host, port, paths, total, concurrency, headers=None):
+    """
+    Sends 'total' GET requests over 'concurrency' connections, cycling through paths.
+    Returns {'requests', 'errors', 'elapsed', 'throughput', 'p50', 'p95'}, latencies in seconds.
+    """
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    counter = iter(range(total))
+
+    def work():
+        connection = http.client.HTTPConnection(host, port, timeout=60)
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                break
+            start = time.time()
+            try:
+                connection.request('GET', paths[i % len(paths)], headers=headers or {})
+                response = connection.getresponse()
+                response.read()
+                failed = response.status >= 400
+            except (OSError, http.client.HTTPException):
+                failed = True
+                connection.close()
+                connection = http.client.HTTPConnection(host, port, timeout=60)
+            with lock:
+                if failed:
+                    errors[0] += 1
+                else:
+                    latencies.append(time.time() - start)
+        connection.close()
+
+    start = time.time()
+    threads = [threading.Thread(target=work) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.time() - start
+    latencies.sort()
+
+    def percentile(p):
+        return latencies[min(int(len(latencies) * p), len(latencies) - 1)] if latencies else 0.0
+
+    return {'requests': len(latencies), 'errors': errors[0], 'elapsed': elapsed,
+            'throughput': len(latencies) / elapsed if elapsed else 0.0,
+            'p50': percentile(0.5), 'p95': percentile(0.95)}
+
+
+class Command(BaseCommand):
+    help = 'Compares the throughput of the gunicorn worker profiles (smartribe/gunicorn_conf.py) under load.'
+
+    option_list = BaseCommand.option_list + (
+        make_option('--profiles', action='store', dest='profiles', default='sync,threaded',
+                    help='Comma separated GUNICORN_PROFILE values to compare.'),
+        make_option('--path', action='append', dest='paths', default=None,
+                    help='Path requested (repeatable), /api/v1/faq/ by default.'),
+        make_option('--auth-email', action='store', dest='auth_email', default=None,
+                    help='Requests are authenticated as this user.'),
+        make_option('--requests', action='store', dest='requests', type='int', default=500,
+                    help='Number of requests per profile.'),
+        make_option('--concurrency', action='store', dest='concurrency', type='int', default=32,
+                    help='Number of concurrent clients.'),
+        make_option('--workers', action='store', dest='workers', type='int', default=2,
+                    help='Number of gunicorn workers (GUNICORN_WORKERS).'),
+        make_option('--port', action='store', dest='port', type='int', default=7790,
+                    help='Local port of the benchmarked server.'),
+    )
+
+    def handle(self, *args, **options):
+        headers = {}
+        if options['auth_email']:
+            user = get_user_model().objects.get(email=options['auth_email'])
+            headers['Authorization'] = 'JWT %s' % core.utils.gen_auth_token(user)
+        paths = options['paths'] or ['/api/v1/faq/']
+        for profile in options['profiles'].split(','):
+            server = self.start_server(profile, options)
+            try:
+                stats = run_load('127.0.0.1', options['port'], paths, options['requests'],
+                                 options['concurrency'], headers)
+            finally:
+                server.terminate()
+                server.wait()
+            self.stdout.write('%-10s %8.1f req/s   p50 %7.1f ms   p95 %7.1f ms   %d errors'
+                              % (profile, stats['throughput'], stats['p50'] * 1000, stats['p95'] * 1000,
+                                 stats['errors']))
+
+    @staticmethod
+    def start_server(profile, options):
+        environ = dict(os.environ, GUNICORN_PROFILE=profile, GUNICORN_WORKERS=str(options['workers']),
+                       GUNICORN_BIND='127.0.0.1:%d' % options['port'],
+                       DJANGO_SETTINGS_MODULE=os.environ.get('DJANGO_SETTINGS_MODULE', 'smartribe.settings'))
+        config = os.path.join(settings.BASE_DIR, 'smartribe', 'gunicorn_conf.py')
+        server = subprocess.Popen([sys.executable, '-m', 'gunicorn.app.wsgiapp', '-c', config,
+                                   'smartribe.wsgi:application'], cwd=settings.BASE_DIR, env=environ)
+        deadline = time.time() + 30
+        while time.time() < deadline:
+            if server.poll() is not None:
+                raise CommandError('gunicorn exited with the "%s" profile' % profile)
+            try:
+                socket.create_connection(('127.0.0.1', options['port']), timeout=1).close()
+                return server
+            except OSError:
+                time.sleep(0.2)
+        server.terminate()
+        raise CommandError('gunicorn did not start with the "%s" profile' % profile)
@@ -0,0 +1,121 @@
+from optparse import make_option
+import logging
+import threading
+import time
+
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection as db_connection
+
+from core.models import OutgoingMail
+
+
+logger = logging.getLogger(__name__)
+
+# Minimum delay (seconds) between two purges of the sent mails, with --loop
+PURGE_INTERVAL = 3600
+
+
+class Command(BaseCommand):
+    help = 'Sends the mails stored in the outbox (settings.MAIL_OUTBOX), in batches over one SMTP connection.'
+
+    option_list = BaseCommand.option_list + (
+        make_option('--batch-size', action='store', dest='batch_size', type='int', default=50,
+                    help='Number of mails sent per connection.'),
+        make_option('--workers', action='store', dest='workers', type='int', default=1,
+                    help='Number of batches sent concurrently.'),
+        make_option('--max-attempts', action='store', dest='max_attempts', type='int', default=5,
+                    help='Number of attempts before a mail is marked as failed.'),
+        make_option('--backoff', action='store', dest='backoff', type='int', default=60,
+                    help='Delay (seconds) before the first retry, doubled on each attempt.'),
+        make_option('--lease', action='store', dest='lease', type='int', default=300,
+                    help='Time (seconds) a claimed batch is reserved to a worker.'),
+        make_option('--loop', action='store_true', dest='loop', default=False,
+                    help='Keep polling the outbox instead of exiting once it is drained.'),
+        make_option('--interval', action='store', dest='interval', type='int', default=5,
+                    help='Delay (seconds) between two polls of an empty outbox, with --loop.'),
+        make_option('--keep-days', action='store', dest='keep_days', type='int', default=7,
+                    help='Sent mails older than this (days) are deleted once the outbox is drained.'),
+    )
+
+    def handle(self, *args, **options):
+        self.totals = {'sent': 0, 'failed': 0}
+        self.lock = threading.Lock()
+        self.purged_on = None
+        if options['workers'] <= 1:
+            self.work(options)
+        else:
+            threads = [threading.Thread(target=self.work, args=(options, )) for _ in range(options['workers'])]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.stdout.write('%d mails sent, %d failed.' % (self.totals['sent'], self.totals['failed']))
+
+    def work(self, options):
+        try:
+            while True:
+                try:
+                    handled = self.send_batch(options)
+                    if not handled:
+                        self.purge(options)
+                except Exception:
+                    if not options['loop']:
+                        raise
+                    # e.g. the database closed an idle connection: a new one is opened by the next poll
+                    logger.exception('Outbox drain failed')
+                    db_connection.close()
+                    handled = 0
+                # Closes the connection when broken or older than CONN_MAX_AGE
+                close_old_connections()
+                if handled:
+                    continue
+                if not options['loop']:
+                    return
+                time.sleep(options['interval'])
+        finally:
+            if options['workers'] > 1:
+                db_connection.close()
+
+    def purge(self, options):
+        """ Deletes the old sent mails, at most once per PURGE_INTERVAL """
+        with self.lock:
+            if self.purged_on is not None and time.time() - self.purged_on < PURGE_INTERVAL:
+                return
+            self.purged_on = time.time()
+        deleted = OutgoingMail.objects.purge_sent(options['keep_days'])
+        if deleted:
+            logger.info('%d sent mails purged from the outbox', deleted)
+
+    def send_batch(self, options):
+        """
+        Sends a batch of due mails. Returns the number of mails handled.
+        """
+        mails = OutgoingMail.objects.claim(options['batch_size'], options['lease'])
+        connection = None
+        sent, failed = 0, 0
+        for mail in mails:
+            try:
+                if connection is None:
+                    connection = get_connection(fail_silently=False)
+                    connection.open()
+                connection.send_messages([mail.to_message()])
+            except Exception as ex:
+                mail.mark_failed(repr(ex), options['max_attempts'], options['backoff'])
+                failed += 1
+                # A new connection for the next mail
+                if connection is not None:
+                    try:
+                        connection.close()
+                    except Exception:
+                        pass
+                    connection = None
+                continue
+            mail.mark_sent()
+            sent += 1
+        if connection is not None:
+            connection.close()
+        with self.lock:
+            self.totals['sent'] += sent
+            self.totals['failed'] += failed
+        return len(mails)
@@ -0,0 +1,22 @@
+from optparse import make_option
+
+from django.core.management.base import BaseCommand
+
+from core.models.expiring_token import reap_expired_tokens
+
+
+class Command(BaseCommand):
+    help = 'Deletes the expired password recovery and activation tokens.'
+
+    option_list = BaseCommand.option_list + (
+        make_option('--batch-size', action='store', dest='batch_size', type='int', default=1000,
+                    help='Number of tokens deleted per query.'),
+        make_option('--dry-run', action='store_true', dest='dry_run', default=False,
+                    help='Only count the expired tokens.'),
+    )
+
+    def handle(self, *args, **options):
+        stats = reap_expired_tokens(options['batch_size'], options['dry_run'])
+        verb = 'to delete' if options['dry_run'] else 'deleted'
+        for model_name, count in sorted(stats.items()):
+            self.stdout.write('%s: %d tokens %s.' % (model_name, count, verb))
@@ -0,0 +1,18 @@
+from optparse import make_option
+
+from django.core.management.base import BaseCommand
+
+from core.models import CoMembership
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the co-membership index used to filter the requests visible to each user.'
+
+    option_list = BaseCommand.option_list + (
+        make_option('--batch-size', action='store', dest='batch_size', type='int', default=500,
+                    help='Number of rows inserted per query.'),
+    )
+
+    def handle(self, *args, **options):
+        count = CoMembership.objects.rebuild(batch_size=options['batch_size'])
+        self.stdout.write('%d co-memberships rebuilt.' % count)
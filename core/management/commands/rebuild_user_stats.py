@@ -0,0 +1,18 @@
+from optparse import make_option
+
+from django.core.management.base import BaseCommand
+
+from core.models import UserStats
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the materialized user stats (levels and titles) of every user.'
+
+    option_list = BaseCommand.option_list + (
+        make_option('--batch-size', action='store', dest='batch_size', type='int', default=500,
+                    help='Number of rows inserted per query.'),
+    )
+
+    def handle(self, *args, **options):
+        count = UserStats.objects.rebuild(batch_size=options['batch_size'])
+        self.stdout.write('%d user stats rebuilt.' % count)
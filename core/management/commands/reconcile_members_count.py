@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from core.models import Community
+
+
+class Command(BaseCommand):
+    help = 'Fixes the stored member counters of communities which drifted from the Member table.'
+
+    def handle(self, *args, **options):
+        fixed = Community.objects.reconcile_members_count()
+        self.stdout.write('%d communities fixed.' % fixed)
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+from django.conf import settings
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_auto_20150415_2253'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserStats',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', primary_key=True, serialize=False, auto_created=True)),
+                ('skills_count', models.IntegerField(default=0)),
+                ('requests_count', models.IntegerField(default=0)),
+                ('offers_count', models.IntegerField(default=0)),
+                ('messages_count', models.IntegerField(default=0)),
+                ('meetings_count', models.IntegerField(default=0)),
+                ('evaluations_by_me_count', models.IntegerField(default=0)),
+                ('evaluations_for_me_count', models.IntegerField(default=0)),
+                ('owns_big_community', models.BooleanField(default=False)),
+                ('moderates_big_community', models.BooleanField(default=False)),
+                ('last_update', models.DateTimeField(auto_now=True)),
+                ('user', models.OneToOneField(related_name='stats', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'user stats',
+                'verbose_name_plural': 'user stats',
+            },
+            bases=(models.Model,),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+from django.db.models import Count
+
+
+def count_members(apps, schema_editor):
+    Community = apps.get_model('core', 'Community')
+    Member = apps.get_model('core', 'Member')
+    rows = Member.objects.filter(status__in=['0', '1']) \
+                         .values('community', 'status').annotate(total=Count('id')).order_by()
+    for row in rows:
+        field = 'accepted_members_count' if row['status'] == '1' else 'pending_members_count'
+        Community.objects.filter(id=row['community']).update(**{field: row['total']})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_userstats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='community',
+            name='accepted_members_count',
+            field=models.IntegerField(default=0),
+            preserve_default=True,
+        ),
+        migrations.AddField(
+            model_name='community',
+            name='pending_members_count',
+            field=models.IntegerField(default=0),
+            preserve_default=True,
+        ),
+        migrations.RunPython(count_members),
+    ]
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from collections import defaultdict
+
+from django.db import models, migrations
+from django.conf import settings
+
+
+def index_co_memberships(apps, schema_editor):
+    CoMembership = apps.get_model('core', 'CoMembership')
+    Member = apps.get_model('core', 'Member')
+    accepted = defaultdict(set)
+    members = defaultdict(set)
+    for user_id, community_id, status in Member.objects.values_list('user', 'community', 'status'):
+        members[community_id].add(user_id)
+        if status == '1':
+            accepted[community_id].add(user_id)
+    pairs = set()
+    for community_id, users in accepted.items():
+        for user_id in users:
+            for peer_id in members[community_id]:
+                pairs.add((user_id, peer_id))
+    CoMembership.objects.bulk_create([CoMembership(user_id=user_id, peer_id=peer_id) for user_id, peer_id in pairs],
+                                     batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_community_members_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CoMembership',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', primary_key=True, serialize=False, auto_created=True)),
+                ('peer', models.ForeignKey(related_name='peer_of', to=settings.AUTH_USER_MODEL)),
+                ('user', models.ForeignKey(related_name='co_memberships', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'co-membership',
+                'verbose_name_plural': 'co-memberships',
+            },
+            bases=(models.Model,),
+        ),
+        migrations.AlterUniqueTogether(
+            name='comembership',
+            unique_together=set([('user', 'peer')]),
+        ),
+        migrations.RunPython(index_co_memberships),
+    ]
@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+
+from core.geo import geohash_encode
+
+
+def compute_geohashes(apps, schema_editor):
+    for model_name in ['LocalCommunity', 'Location']:
+        model = apps.get_model('core', model_name)
+        for obj in model.objects.only('gps_x', 'gps_y'):
+            model.objects.filter(pk=obj.pk).update(geohash=geohash_encode(obj.gps_x, obj.gps_y))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_comembership'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='localcommunity',
+            name='geohash',
+            field=models.CharField(max_length=12, blank=True, db_index=True, editable=False),
+            preserve_default=True,
+        ),
+        migrations.AddField(
+            model_name='location',
+            name='geohash',
+            field=models.CharField(max_length=12, blank=True, db_index=True, editable=False),
+            preserve_default=True,
+        ),
+        migrations.RunPython(compute_geohashes),
+    ]
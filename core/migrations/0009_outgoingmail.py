@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_geohash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutgoingMail',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', primary_key=True, serialize=False, auto_created=True)),
+                ('subject', models.CharField(max_length=255)),
+                ('body', models.TextField()),
+                ('html', models.TextField(blank=True, null=True)),
+                ('from_email', models.CharField(max_length=255)),
+                ('recipients', models.TextField()),
+                ('message_id', models.CharField(max_length=255, unique=True)),
+                ('status', models.CharField(max_length=1, default='0', choices=[('0', 'En attente'), ('1', 'Sent'), ('2', 'Failed')])),
+                ('attempts', models.IntegerField(default=0)),
+                ('next_attempt_on', models.DateTimeField(default=django.utils.timezone.now)),
+                ('claimed_by', models.CharField(max_length=32, blank=True, null=True, db_index=True)),
+                ('claimed_until', models.DateTimeField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_on', models.DateTimeField(auto_now_add=True)),
+                ('sent_on', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'outgoing mail',
+                'verbose_name_plural': 'outgoing mails',
+            },
+            bases=(models.Model,),
+        ),
+        migrations.AlterIndexTogether(
+            name='outgoingmail',
+            index_together=set([('status', 'next_attempt_on')]),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_outgoingmail'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='activationtoken',
+            name='request_datetime',
+            field=models.DateTimeField(db_index=True, auto_now_add=True),
+            preserve_default=True,
+        ),
+        migrations.AlterField(
+            model_name='passwordrecovery',
+            name='request_datetime',
+            field=models.DateTimeField(db_index=True, auto_now_add=True),
+            preserve_default=True,
+        ),
+    ]
@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_token_request_datetime_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportedContent',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', primary_key=True, serialize=False, auto_created=True)),
+                ('content_identifier', models.CharField(max_length=255, unique=True)),
+                ('total', models.IntegerField(default=0)),
+                ('last_report_id', models.IntegerField(db_index=True, default=0)),
+                ('alerted_on', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'reported content',
+                'verbose_name_plural': 'reported contents',
+            },
+            bases=(models.Model,),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import hashlib
+
+from django.db import models, migrations
+
+
+def hash_tokens(apps, schema_editor):
+    # Links already sent keep working: the clear tokens are replaced by their digest
+    for model_name in ('PasswordRecovery', 'ActivationToken'):
+        model = apps.get_model('core', model_name)
+        for pk, token in model.objects.values_list('pk', 'token_hash'):
+            model.objects.filter(pk=pk).update(token_hash=hashlib.sha256(token.encode('utf-8')).hexdigest())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_reportedcontent'),
+    ]
+
+    operations = [
+        migrations.RenameField(
+            model_name='activationtoken',
+            old_name='token',
+            new_name='token_hash',
+        ),
+        migrations.RenameField(
+            model_name='passwordrecovery',
+            old_name='token',
+            new_name='token_hash',
+        ),
+        migrations.RunPython(hash_tokens),
+        migrations.AlterField(
+            model_name='activationtoken',
+            name='token_hash',
+            field=models.CharField(max_length=64, unique=True),
+            preserve_default=True,
+        ),
+        migrations.AlterField(
+            model_name='passwordrecovery',
+            name='token_hash',
+            field=models.CharField(max_length=64, unique=True),
+            preserve_default=True,
+        ),
+    ]
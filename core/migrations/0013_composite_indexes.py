@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_hashed_tokens'),
+    ]
+
+    operations = [
+        migrations.AlterIndexTogether(
+            name='member',
+            index_together=set([('user', 'community'), ('community', 'status', 'role')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='message',
+            index_together=set([('offer', 'creation_date')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='notification',
+            index_together=set([('user', 'seen', 'created_on')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='offer',
+            index_together=set([('request', 'closed')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='request',
+            index_together=set([('community', 'closed'), ('user', 'created_on')]),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userstats',
+            name='unread_notifications_count',
+            field=models.IntegerField(default=0),
+            preserve_default=True,
+        ),
+    ]
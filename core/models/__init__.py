@@ -11,6 +11,7 @@ from core.models.activation_token import ActivationToken
 
 ## Profile
 from core.models.profile import Profile
+from core.models.user_stats import UserStats
 
 ## User
 
@@ -25,6 +26,7 @@ from core.models.community_transport import TransportCommunity
 
 ## Member
 from core.models.member import Member
+from core.models.co_membership import CoMembership
 
 ## Location
 from core.models.location import Location
@@ -47,5 +49,7 @@ from core.models.faq_section import FaqSection
 from core.models.faq import Faq
 from core.models.suggestion import Suggestion
 from core.models.inappropriate import Inappropriate
+from core.models.reported_content import ReportedContent
 
 from core.models.notification import Notification
+from core.models.outgoing_mail import OutgoingMail
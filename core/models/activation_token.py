@@ -2,14 +2,25 @@ from django.conf import settings
 from django.utils.translation import ugettext as _
 from django.db import models
 
+from core.models.expiring_token import ExpiringTokenManager
+
+
+class ActivationTokenManager(ExpiringTokenManager):
+    """ """
+
+    validity_setting = 'ACTIVATION_TOKEN_VALIDITY'
+
 
 class ActivationToken(models.Model):
 
     user = models.ForeignKey(settings.AUTH_USER_MODEL)
 
-    token = models.CharField(max_length=64)
+    # SHA-256 of the token sent to the user
+    token_hash = models.CharField(max_length=64, unique=True)
+
+    request_datetime = models.DateTimeField(auto_now_add=True, db_index=True)
 
-    request_datetime = models.DateTimeField(auto_now_add=True)
+    objects = ActivationTokenManager()
 
     class Meta:
         verbose_name = _('activation token')
@@ -0,0 +1,96 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import models, transaction
+from django.utils.translation import ugettext as _
+
+
+class CoMembershipManager(models.Manager):
+    """ """
+
+    def compute(self):
+        """
+        Returns every (user, peer) pair.
+        """
+        from core.models import Member
+        accepted = defaultdict(set)
+        members = defaultdict(set)
+        for user_id, community_id, status in Member.objects.values_list('user', 'community', 'status'):
+            members[community_id].add(user_id)
+            if status == '1':
+                accepted[community_id].add(user_id)
+        pairs = set()
+        for community_id, users in accepted.items():
+            for user_id in users:
+                for peer_id in members[community_id]:
+                    pairs.add((user_id, peer_id))
+        return pairs
+
+    def refresh_membership(self, user_id, community_id):
+        """
+        Updates the pairs of user_id with the members of community_id, after the membership of
+        user_id in community_id changed, and writes the difference with the stored pairs.
+        A pair is kept while another community still links both users.
+        Changes of a community run one after the other, under a lock of its row.
+        """
+        from core.models import Community, Member
+        with transaction.atomic():
+            list(Community.objects.select_for_update().filter(id=community_id).values_list('id', flat=True))
+            members = Member.objects.filter(community=community_id)
+            member_ids = members.values('user')
+            own = Member.objects.filter(user=user_id)
+
+            # user_id sees the members of the communities where it is accepted,
+            # and is seen by the accepted members of its communities
+            pairs = set((user_id, peer_id) for peer_id in Member.objects.filter(
+                models.Q(user__in=member_ids) | models.Q(user=user_id),
+                community__in=own.filter(status='1').values('community')
+            ).values_list('user', flat=True))
+            pairs.update((peer_id, user_id) for peer_id in Member.objects.filter(
+                community__in=own.values('community'), status='1', user__in=member_ids
+            ).values_list('user', flat=True))
+
+            # The stored pairs of user_id with the members of the community, and with itself
+            stored = self.select_for_update().filter(
+                models.Q(user=user_id, peer__in=member_ids) | models.Q(peer=user_id, user__in=member_ids) |
+                models.Q(user=user_id, peer=user_id)
+            ).values_list('id', 'user', 'peer')
+            stored = dict(((pair_user, pair_peer), pk) for pk, pair_user, pair_peer in stored)
+            stale = [pk for pair, pk in stored.items() if pair not in pairs]
+            if stale:
+                self.filter(id__in=stale).delete()
+            self.bulk_create([self.model(user_id=pair_user, peer_id=pair_peer)
+                              for pair_user, pair_peer in pairs if (pair_user, pair_peer) not in stored])
+
+    def rebuild(self, batch_size=500):
+        """
+        Recomputes every pair. Returns the number of rows written.
+        """
+        rows = [self.model(user_id=user_id, peer_id=peer_id) for user_id, peer_id in self.compute()]
+        with transaction.atomic():
+            self.all().delete()
+            self.bulk_create(rows, batch_size=batch_size)
+        return len(rows)
+
+
+class CoMembership(models.Model):
+    """
+    'peer' has a membership, whatever its status, in a community where 'user' is accepted:
+    'user' can see the requests of 'peer'.
+    Kept up to date by core.signals.co_membership.
+    """
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='co_memberships')
+
+    peer = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='peer_of')
+
+    objects = CoMembershipManager()
+
+    def __str__(self):
+        return str(self.user_id) + " / " + str(self.peer_id)
+
+    class Meta:
+        verbose_name = _('co-membership')
+        verbose_name_plural = _('co-memberships')
+        unique_together = ('user', 'peer')
+        app_label = 'core'
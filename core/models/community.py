@@ -1,6 +1,7 @@
 import os
 from django.utils.translation import ugettext as _
 from django.db import models
+from django.db.models import Count, F
 
 
 def get_banner_path(self, filename):
@@ -15,6 +16,54 @@ def get_logo_path(self, filename):
     return url
 
 
+class CommunityManager(models.Manager):
+    """ """
+
+    # Member status counted by each stored counter
+    COUNTED_STATUSES = {'0': 'pending_members_count', '1': 'accepted_members_count'}
+
+    def shift_members_count(self, community_id, former_status, status):
+        """
+        Moves a member between the stored counters of its community, from former_status (None for
+        a new member) to status (None for a removed member). Relative updates: concurrent changes
+        add up instead of overwriting each other.
+        """
+        if former_status == status:
+            return
+        values = {}
+        if former_status in self.COUNTED_STATUSES:
+            field = self.COUNTED_STATUSES[former_status]
+            values[field] = F(field) - 1
+        if status in self.COUNTED_STATUSES:
+            field = self.COUNTED_STATUSES[status]
+            values[field] = F(field) + 1
+        if values:
+            self.filter(id=community_id).update(**values)
+
+    def reconcile_members_count(self):
+        """
+        Fixes the stored member counters which drifted from the Member table.
+        Returns the number of corrected communities.
+        """
+        from core.models.member import Member
+        expected = {}
+        rows = Member.objects.filter(status__in=['0', '1']) \
+                             .values('community', 'status').annotate(total=Count('id')).order_by()
+        for row in rows:
+            field = 'accepted_members_count' if row['status'] == '1' else 'pending_members_count'
+            expected.setdefault(row['community'], {})[field] = row['total']
+        fixed = 0
+        stored = self.values_list('id', 'accepted_members_count', 'pending_members_count')
+        for community_id, accepted, pending in stored:
+            values = expected.get(community_id, {})
+            values.setdefault('accepted_members_count', 0)
+            values.setdefault('pending_members_count', 0)
+            if (accepted, pending) != (values['accepted_members_count'], values['pending_members_count']):
+                self.filter(id=community_id).update(**values)
+                fixed += 1
+        return fixed
+
+
 class Community(models.Model):
 
     name = models.CharField(max_length=50, unique=True)
@@ -33,6 +82,12 @@ class Community(models.Model):
 
     auto_accept_member = models.BooleanField(default=False)
 
+    accepted_members_count = models.IntegerField(default=0)
+
+    pending_members_count = models.IntegerField(default=0)
+
+    objects = CommunityManager()
+
     def get_type(self):
         """
         Returns the type of the community as a capital letter.
@@ -52,8 +107,7 @@ class Community(models.Model):
         return "O"
 
     def get_members_count(self):
-        from core.models.member import Member
-        return Member.objects.filter(community=self, status='1').count()
+        return self.accepted_members_count
 
     def __str__(self):
         return self.name
@@ -1,15 +1,28 @@
 from django.utils.translation import ugettext as _
 from django.db import models
+from core.geo import around, geohash_encode
 from core.models.community import Community
 from core.models.validator import ZipCodeValidatorFR
 
 
+class LocalCommunityManager(models.Manager):
+    """ """
+
+    def around(self, gps_x, gps_y, radius):
+        """
+        Returns the local communities within radius (km) of a GPS point, closest first.
+        """
+        return around(self.get_queryset(), gps_x, gps_y, radius)
+
+
 class LocalCommunity(Community):
 
     gps_x = models.FloatField()
 
     gps_y = models.FloatField()
 
+    geohash = models.CharField(max_length=12, db_index=True, blank=True, editable=False)
+
     street_num = models.IntegerField(blank=True, null=True)
 
     street = models.CharField(max_length=100,
@@ -23,6 +36,12 @@ class LocalCommunity(Community):
 
     country = models.CharField(max_length=50)
 
+    objects = LocalCommunityManager()
+
+    def save(self, *args, **kwargs):
+        self.geohash = geohash_encode(self.gps_x, self.gps_y)
+        super().save(*args, **kwargs)
+
     class Meta:
         verbose_name = _('local community')
         verbose_name_plural = _('local communities')
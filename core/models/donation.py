@@ -1,5 +1,5 @@
 from django.conf import settings
-from django.db import models
+from django.db import connection, models
 from django.utils.translation import ugettext as _
 
 
@@ -17,4 +17,14 @@ class Donation(models.Model):
     class Meta:
         verbose_name = _('donation')
         verbose_name_plural = _('donations')
-        app_label = 'core'
\ No newline at end of file
+        app_label = 'core'
+
+
+def donor_flag_sql(model):
+    """
+    SQL selecting if the author of a 'model' row made a donation, for QuerySet.extra.
+    """
+    qn = connection.ops.quote_name
+    return 'EXISTS (SELECT 1 FROM %s WHERE %s.%s = %s.%s)' % (
+        qn(Donation._meta.db_table), qn(Donation._meta.db_table), qn('user_id'),
+        qn(model._meta.db_table), qn('user_id'))
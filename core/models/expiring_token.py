@@ -0,0 +1,73 @@
+import datetime
+
+from django.conf import settings
+from django.db import models, transaction
+from django.utils import timezone
+
+import core.utils
+
+
+class ExpiringTokenManager(models.Manager):
+    """
+    Tokens valid for the number of hours given by the validity_setting setting, from their request_datetime.
+    Only a digest of the tokens is stored (token_hash).
+    Subclassed per model: related managers are built from the manager class, without arguments.
+    """
+
+    validity_setting = None
+
+    def _limit(self):
+        return timezone.now() - datetime.timedelta(hours=getattr(settings, self.validity_setting))
+
+    def expired(self):
+        return self.filter(request_datetime__lt=self._limit())
+
+    def issue(self, **kwargs):
+        """
+        Creates a token. The clear token is only available on the returned object, as 'token'.
+        """
+        token = core.utils.gen_temporary_token()
+        obj = self.create(token_hash=core.utils.hash_token(token), **kwargs)
+        obj.token = token
+        return obj
+
+    def consume(self, token):
+        """
+        Deletes a valid token, and returns it with its user loaded. Returns None for an unknown or expired token.
+        The row is locked from its read to its deletion: a token is consumed once.
+        """
+        with transaction.atomic():
+            try:
+                obj = self.select_for_update().select_related('user') \
+                          .get(token_hash=core.utils.hash_token(token), request_datetime__gte=self._limit())
+            except self.model.DoesNotExist:
+                return None
+            self.filter(id=obj.id).delete()
+        return obj
+
+    def reap(self, batch_size=1000, dry_run=False):
+        """
+        Deletes the expired tokens, batch_size rows per query.
+        Returns the number of deleted tokens, or of tokens to delete with dry_run.
+        """
+        expired = self.expired()
+        if dry_run:
+            return expired.count()
+        deleted = 0
+        while True:
+            ids = list(expired.order_by('request_datetime').values_list('id', flat=True)[:batch_size])
+            if not ids:
+                return deleted
+            self.filter(id__in=ids).delete()
+            deleted += len(ids)
+
+
+def reap_expired_tokens(batch_size=1000, dry_run=False):
+    """
+    Deletes the expired password recovery and activation tokens.
+    Returns the number of deleted tokens per model.
+    """
+    from core.models.activation_token import ActivationToken
+    from core.models.password_recovery import PasswordRecovery
+    return dict((model._meta.model_name, model.objects.reap(batch_size, dry_run))
+                for model in (PasswordRecovery, ActivationToken))
@@ -1,9 +1,20 @@
 from django.utils.translation import ugettext as _
 from django.db import models
+from core.geo import around, geohash_encode
 from core.models.community import Community
 from core.models.validator import ZipCodeValidatorFR
 
 
+class LocationManager(models.Manager):
+    """ """
+
+    def around(self, gps_x, gps_y, radius):
+        """
+        Returns the locations within radius (km) of a GPS point, closest first.
+        """
+        return around(self.get_queryset(), gps_x, gps_y, radius)
+
+
 class Location(models.Model):
 
     #TODO : Add creator
@@ -20,6 +31,8 @@ class Location(models.Model):
 
     gps_y = models.FloatField()
 
+    geohash = models.CharField(max_length=12, db_index=True, blank=True, editable=False)
+
     street_num = models.IntegerField(blank=True, null=True)
 
     street = models.CharField(max_length=100,
@@ -35,6 +48,12 @@ class Location(models.Model):
     country = models.CharField(max_length=50,
                                blank=True, null=True)
 
+    objects = LocationManager()
+
+    def save(self, *args, **kwargs):
+        self.geohash = geohash_encode(self.gps_x, self.gps_y)
+        super().save(*args, **kwargs)
+
     def __desc_str__(self):
         return self.community.name + " / " + self.name
 
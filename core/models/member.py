@@ -40,4 +40,5 @@ class Member(models.Model):
     class Meta:
         verbose_name = _('member')
         verbose_name_plural = _('members')
+        index_together = [('user', 'community'), ('community', 'status', 'role')]
         app_label = 'core'
@@ -1,11 +1,24 @@
 from django.utils.translation import ugettext as _
 from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
 from django.contrib.auth.models import User
 from django.db import models
+from core.models.donation import donor_flag_sql
 from core.models.offer import Offer
 from core.models.reportable_model import ReportableModel
 
 
+class MessageManager(models.Manager):
+    """ """
+
+    def feed(self):
+        """
+        Messages with everything read by MessageSerializer, fetched along in the same query.
+        """
+        return self.get_queryset().select_related('user__profile') \
+                                  .extra(select={'user_is_donor_flag': donor_flag_sql(self.model)})
+
+
 class Message(ReportableModel):
 
     offer = models.ForeignKey(Offer)
@@ -16,19 +29,29 @@ class Message(ReportableModel):
 
     creation_date = models.DateTimeField(auto_now_add=True)
 
+    objects = MessageManager()
+
     def get_photo(self):
         """ """
-        from core.models.profile import Profile
-        if Profile.objects.filter(user=self.user).exists():
-            profile = Profile.objects.get(user=self.user)
-            if profile.photo:
-                return profile.photo.url[len(settings.MEDIA_URL):]
+        try:
+            photo = self.user.profile.photo
+        except ObjectDoesNotExist:
+            return ''
+        if photo:
+            return photo.url[len(settings.MEDIA_URL):]
         return ''
 
+    def get_user_is_donor(self):
+        """ Reads the flag selected by objects.feed() when available """
+        if hasattr(self, 'user_is_donor_flag'):
+            return bool(self.user_is_donor_flag)
+        return self.user.profile.is_donor
+
     def __str__(self):
         return self.user.first_name + ' ' + self.user.last_name + ' - Offer : ' + str(self.offer.id)
 
     class Meta:
         verbose_name = _('message')
         verbose_name_plural = _('messages')
+        index_together = [('offer', 'creation_date')]
         app_label = 'core'
@@ -28,4 +28,5 @@ class Notification(models.Model):
     class Meta:
         verbose_name = _('notification')
         verbose_name_plural = _('notifications')
+        index_together = [('user', 'seen', 'created_on')]
         app_label = 'core'
@@ -1,11 +1,30 @@
 from django.utils.translation import ugettext as _
 from django.conf import settings
-from django.db import models
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import connection, models
+from core.models.donation import donor_flag_sql
 from core.models.skill import Skill
 from core.models.reportable_model import ReportableModel
 from core.models.request import Request
 
 
+class OfferManager(models.Manager):
+    """ """
+
+    def feed(self):
+        """
+        Offers with everything read by OfferSerializer, fetched along in the same query.
+        """
+        from core.models.evaluation import Evaluation
+        qn = connection.ops.quote_name
+        evaluated = 'EXISTS (SELECT 1 FROM %s WHERE %s.%s = %s.%s)' % (
+            qn(Evaluation._meta.db_table), qn(Evaluation._meta.db_table), qn('offer_id'),
+            qn(self.model._meta.db_table), qn('id'))
+        return self.get_queryset().select_related('user__profile', 'skill') \
+                                  .extra(select={'user_is_donor_flag': donor_flag_sql(self.model),
+                                                 'is_evaluated_flag': evaluated})
+
+
 class Offer(ReportableModel):
 
     request = models.ForeignKey(Request)
@@ -22,15 +41,24 @@ class Offer(ReportableModel):
 
     last_update = models.DateTimeField(auto_now=True)
 
+    objects = OfferManager()
+
     def get_photo(self):
         """ """
-        from core.models.profile import Profile
-        if Profile.objects.filter(user=self.user).exists():
-            profile = Profile.objects.get(user=self.user)
-            if profile.photo:
-                return profile.photo.url[len(settings.MEDIA_URL):]
+        try:
+            photo = self.user.profile.photo
+        except ObjectDoesNotExist:
+            return ''
+        if photo:
+            return photo.url[len(settings.MEDIA_URL):]
         return ''
 
+    def get_user_is_donor(self):
+        """ Reads the flag selected by objects.feed() when available """
+        if hasattr(self, 'user_is_donor_flag'):
+            return bool(self.user_is_donor_flag)
+        return self.user.profile.is_donor
+
     def get_skill_title(self):
         """ """
         if self.skill:
@@ -44,6 +72,8 @@ class Offer(ReportableModel):
         return ''
 
     def is_evaluated(self):
+        if hasattr(self, 'is_evaluated_flag'):
+            return bool(self.is_evaluated_flag)
         from core.models.evaluation import Evaluation
         return Evaluation.objects.filter(offer=self).exists()
 
@@ -56,4 +86,5 @@ class Offer(ReportableModel):
     class Meta:
         verbose_name = _('offer')
         verbose_name_plural = _('offers')
+        index_together = [('request', 'closed')]
         app_label = 'core'
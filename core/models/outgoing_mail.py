@@ -0,0 +1,134 @@
+import datetime
+import uuid
+
+from django.core.mail import EmailMultiAlternatives
+from django.core.mail.message import make_msgid
+from django.db import models
+from django.utils import timezone
+from django.utils.translation import ugettext as _
+
+
+class OutgoingMailManager(models.Manager):
+    """ """
+
+    def enqueue(self, subject, body, from_email, recipient_list, html=None):
+        """
+        Stores a mail to send, in the transaction of the caller.
+        """
+        return self.create(subject=subject, body=body, html=html, from_email=from_email,
+                           recipients='\n'.join(recipient_list), message_id=make_msgid())
+
+    def enqueue_many(self, datatuple, html=None):
+        """
+        Stores mails given as (subject, body, from_email, recipient_list) in one query.
+        """
+        return self.bulk_create([self.model(subject=subject, body=body, html=html, from_email=from_email,
+                                            recipients='\n'.join(recipient_list), message_id=make_msgid())
+                                 for subject, body, from_email, recipient_list in datatuple])
+
+    def claim(self, batch_size, lease=300):
+        """
+        Reserves up to batch_size mails due for sending, for 'lease' seconds.
+        Concurrent drains never get the same mail while the lease runs.
+        """
+        now = timezone.now()
+        claim = uuid.uuid4().hex
+        due = self.filter(status='0', next_attempt_on__lte=now) \
+                  .filter(models.Q(claimed_until=None) | models.Q(claimed_until__lt=now)) \
+                  .order_by('next_attempt_on', 'id')
+        ids = list(due.values_list('id', flat=True)[:batch_size])
+        # Only rows still unclaimed are taken, whatever another drain did meanwhile
+        due.filter(id__in=ids).update(claimed_by=claim, claimed_until=now + datetime.timedelta(seconds=lease))
+        return list(self.filter(claimed_by=claim).order_by('next_attempt_on', 'id'))
+
+    def purge_sent(self, keep_days, batch_size=1000):
+        """
+        Deletes the mails sent more than keep_days ago, batch_size rows per query.
+        Returns the number of deleted mails.
+        """
+        sent = self.filter(status='1', sent_on__lt=timezone.now() - datetime.timedelta(days=keep_days))
+        deleted = 0
+        while True:
+            ids = list(sent.order_by('sent_on').values_list('id', flat=True)[:batch_size])
+            if not ids:
+                return deleted
+            self.filter(id__in=ids).delete()
+            deleted += len(ids)
+
+
+class OutgoingMail(models.Model):
+    """
+    Transactional outbox of mails, sent by the drain_outbox command.
+    """
+
+    subject = models.CharField(max_length=255)
+
+    body = models.TextField()
+
+    html = models.TextField(blank=True, null=True)
+
+    from_email = models.CharField(max_length=255)
+
+    # One address per line
+    recipients = models.TextField()
+
+    # Same Message-ID on every attempt, so that a mail sent twice can be deduplicated
+    message_id = models.CharField(max_length=255, unique=True)
+
+    STATUS_CHOICES = (
+        ('0', _('Pending')),
+        ('1', _('Sent')),
+        ('2', _('Failed')),
+    )
+    status = models.CharField(max_length=1,
+                              choices=STATUS_CHOICES,
+                              default='0')
+
+    attempts = models.IntegerField(default=0)
+
+    next_attempt_on = models.DateTimeField(default=timezone.now)
+
+    claimed_by = models.CharField(max_length=32, blank=True, null=True, db_index=True)
+
+    claimed_until = models.DateTimeField(blank=True, null=True)
+
+    last_error = models.TextField(blank=True)
+
+    created_on = models.DateTimeField(auto_now_add=True)
+
+    sent_on = models.DateTimeField(blank=True, null=True)
+
+    objects = OutgoingMailManager()
+
+    def to_message(self):
+        msg = EmailMultiAlternatives(self.subject, self.body, self.from_email, self.recipients.split('\n'),
+                                     headers={'Message-ID': self.message_id})
+        if self.html:
+            msg.attach_alternative(self.html, "text/html")
+        return msg
+
+    def mark_sent(self):
+        OutgoingMail.objects.filter(id=self.id, claimed_by=self.claimed_by) \
+                            .update(status='1', sent_on=timezone.now(), attempts=self.attempts + 1,
+                                    claimed_by=None, claimed_until=None)
+
+    def mark_failed(self, error, max_attempts, backoff):
+        """
+        Schedules a new attempt after backoff * 2 ** attempts seconds, or gives up after max_attempts.
+        """
+        attempts = self.attempts + 1
+        OutgoingMail.objects.filter(id=self.id, claimed_by=self.claimed_by) \
+                            .update(status='2' if attempts >= max_attempts else '0', attempts=attempts,
+                                    last_error=error,
+                                    next_attempt_on=timezone.now() + datetime.timedelta(
+                                        seconds=backoff * 2 ** self.attempts),
+                                    claimed_by=None, claimed_until=None)
+
+    def __str__(self):
+        return self.subject
+
+    class Meta:
+        verbose_name = _('outgoing mail')
+        verbose_name_plural = _('outgoing mails')
+        index_together = [('status', 'next_attempt_on')]
+        app_label = 'core'
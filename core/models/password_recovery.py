@@ -2,16 +2,27 @@ from django.conf import settings
 from django.utils.translation import ugettext as _
 from django.db import models
 
+from core.models.expiring_token import ExpiringTokenManager
+
+
+class PasswordRecoveryManager(ExpiringTokenManager):
+    """ """
+
+    validity_setting = 'PRT_VALIDITY'
+
 
 class PasswordRecovery(models.Model):
 
     user = models.ForeignKey(settings.AUTH_USER_MODEL)
 
-    token = models.CharField(max_length=64)
+    # SHA-256 of the token sent to the user
+    token_hash = models.CharField(max_length=64, unique=True)
 
     ip_address = models.IPAddressField()
 
-    request_datetime = models.DateTimeField(auto_now_add=True)
+    request_datetime = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    objects = PasswordRecoveryManager()
 
     def __str__(self):
         return self.user.email
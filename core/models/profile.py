@@ -4,7 +4,6 @@ from django.utils.translation import ugettext as _
 from django.conf import settings
 from django.db import models
 import math
-from core.models.community import Community
 from core.models.skill import Skill
 from core.models.meeting import Meeting
 from core.models.offer import Offer
@@ -13,6 +12,7 @@ from core.models.member import Member
 from core.models.evaluation import Evaluation
 from core.models.message import Message
 from core.models.donation import Donation
+from core.models.user_stats import UserStats
 from core.models.validator import PhoneValidatorFR, ZipCodeValidatorFR
 
 
@@ -79,7 +79,7 @@ class Profile(models.Model):
 
     @property
     def is_early_adopter(self):
-        return self.user.id <= settings.EARLY_ADOPTER_MAX_ID
+        return self.user_id <= settings.EARLY_ADOPTER_MAX_ID
 
     def early_adopter(self):
         return self.is_early_adopter
@@ -100,41 +100,49 @@ class Profile(models.Model):
         from core.models.skill import Skill
         return Skill.objects.filter(user=self.user)
 
+    def get_stats(self):
+        """ Materialized activity counters of the user (one indexed lookup, cached on the instance) """
+        if not hasattr(self, '_stats'):
+            self._stats = UserStats.objects.get_for_user(self.user_id)
+        return self._stats
+
     def get_user_level(self):
+        stats = self.get_stats()
+
         # Profile level [1]
         # (Profile completion [0.6] + skills [0.4])
-        skills = self.get_skills_count() * 0.15
+        skills = stats.skills_count * 0.15
         profile_level = self.get_profile_completion() * 0.6 + self.get_value(skills, 0.4)
 
         # Requests level [0.5]
         # (0.1 / request)
-        requests = self.get_requests_count() * 0.1
+        requests = stats.requests_count * 0.1
         request_level = self.get_value(requests, 0.5)
 
         # Offers Level [1]
         # (0.1 / offer)
         offers_max = 1.5 - request_level
-        offers = self.get_requests_count() * 0.1
+        offers = stats.requests_count * 0.1
         offer_level = self.get_value(offers, offers_max)
 
         # Messages level [0.5]
         # (0.01 / message)
-        messages = self.get_messages_count() * 0.01
+        messages = stats.messages_count * 0.01
         message_level = self.get_value(messages, 0.5)
 
         # Meetings level [0.5]
         # (0.2 / meeting)
-        meetings = self.get_meetings_count() * 0.2
+        meetings = stats.meetings_count * 0.2
         meeting_level = self.get_value(meetings, 0.5)
 
         # Evaluations given level [0.5]
         # (0.05 / evaluation)
-        evaluations_g = self.get_evaluations_by_me_count() * 0.05
+        evaluations_g = stats.evaluations_by_me_count * 0.05
         evaluation_g_level = self.get_value(evaluations_g, 0.5)
 
         # Evaluations received level [1]
         # (0.05 / evaluation)
-        evaluations_r = self.get_evaluations_for_me_count() * 0.05
+        evaluations_r = stats.evaluations_for_me_count * 0.05
         evaluation_r_level = self.get_value(evaluations_r, 0.5)
 
         # TOTAL [5]
@@ -174,12 +182,8 @@ class Profile(models.Model):
     get_profile_completion.allow_tags = True
 
     def is_community_manager(self):
-        big_communities = [x for x in Community.objects.all() if x.get_members_count() > settings.BIG_COMMUNITY_TH]
-        o = Member.objects.filter(user=self.user, role="0", status="1",
-                                  community__in=big_communities).exists()
-        m = Member.objects.filter(user=self.user, role="1", status="1",
-                                  community__in=big_communities).exists()
-        return o, m
+        stats = self.get_stats()
+        return stats.owns_big_community, stats.moderates_big_community
 
     def get_skills_count(self):
         return Skill.objects.filter(user=self.user).count()
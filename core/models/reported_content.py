@@ -0,0 +1,62 @@
+from django.db import models, transaction
+from django.db.models import Count, F, Max
+from django.utils import timezone
+from django.utils.translation import ugettext as _
+
+
+class ReportedContentManager(models.Manager):
+    """ """
+
+    def fold_new_reports(self):
+        """
+        Adds the Inappropriate reports created since the last call to the counters.
+        The high-water mark is the greatest report id already counted.
+        Returns the content identifiers which got new reports.
+        """
+        from core.models.inappropriate import Inappropriate
+        mark = self.aggregate(mark=Max('last_report_id'))['mark'] or 0
+        rows = Inappropriate.objects.filter(id__gt=mark).values('content_identifier') \
+                                    .annotate(total=Count('id'), last=Max('id')).order_by()
+        identifiers = []
+        with transaction.atomic():
+            for row in rows:
+                updated = self.filter(content_identifier=row['content_identifier']) \
+                              .update(total=F('total') + row['total'], last_report_id=row['last'])
+                if not updated:
+                    self.create(content_identifier=row['content_identifier'], total=row['total'],
+                                last_report_id=row['last'])
+                identifiers.append(row['content_identifier'])
+        return identifiers
+
+    def new_alerts(self, identifiers, limit):
+        """
+        Returns the counters of identifiers over limit which were never alerted, and marks them alerted.
+        """
+        alerts = list(self.filter(content_identifier__in=identifiers, total__gt=limit, alerted_on=None)
+                          .order_by('content_identifier'))
+        self.filter(id__in=[alert.id for alert in alerts]).update(alerted_on=timezone.now())
+        return alerts
+
+
+class ReportedContent(models.Model):
+    """
+    Number of Inappropriate reports per content, folded by the manage_reported_objects server action.
+    """
+
+    content_identifier = models.CharField(max_length=255, unique=True)
+
+    total = models.IntegerField(default=0)
+
+    last_report_id = models.IntegerField(default=0, db_index=True)
+
+    alerted_on = models.DateTimeField(blank=True, null=True)
+
+    objects = ReportedContentManager()
+
+    def __str__(self):
+        return self.content_identifier
+
+    class Meta:
+        verbose_name = _('reported content')
+        verbose_name_plural = _('reported contents')
+        app_label = 'core'
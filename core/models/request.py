@@ -1,12 +1,60 @@
+import datetime
+import time
+
 from django.utils.translation import ugettext as _
 from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
 from django.contrib.auth.models import User
-from django.db import models
+from django.db import connection, models, transaction
+from django.db.models import Max, Min
+from django.utils import timezone
 from core.models.community import Community
+from core.models.donation import donor_flag_sql
 from core.models.reportable_model import ReportableModel
 from core.models.skill import SkillCategory
 
 
+class RequestManager(models.Manager):
+    """ """
+
+    def feed(self):
+        """
+        Requests with everything read by RequestSerializer, fetched along in the same query.
+        """
+        from core.models.offer import Offer
+        qn = connection.ops.quote_name
+        offers_total = 'SELECT COUNT(*) FROM %s WHERE %s.%s = %s.%s' % (
+            qn(Offer._meta.db_table), qn(Offer._meta.db_table), qn('request_id'),
+            qn(self.model._meta.db_table), qn('id'))
+        return self.get_queryset().select_related('user__profile', 'category', 'community') \
+                                  .extra(select={'user_is_donor_flag': donor_flag_sql(self.model),
+                                                 'offers_total': offers_total})
+
+    def auto_close(self, batch_size=1000):
+        """
+        Closes the auto_close requests whose expected end date is over, and their open offers.
+        Rows are updated by id ranges of batch_size requests, one short transaction per range.
+        Returns the numbers of closed requests and offers, and the elapsed time (seconds).
+        """
+        from core.models.offer import Offer
+        started = time.time()
+        today = datetime.date.today()
+        expired = self.filter(auto_close=True, closed=False, expected_end_date__lt=today)
+        stats = {'requests': 0, 'offers': 0}
+        bounds = expired.aggregate(first=Min('id'), last=Max('id'))
+        if bounds['first'] is not None:
+            for low in range(bounds['first'], bounds['last'] + 1, batch_size):
+                chunk = expired.filter(id__gte=low, id__lt=low + batch_size)
+                now = timezone.now()
+                with transaction.atomic():
+                    # Offers first: once closed, the requests of the range are out of 'expired'
+                    stats['offers'] += Offer.objects.filter(request__in=chunk, closed=False) \
+                                                    .update(closed=True, last_update=now)
+                    stats['requests'] += chunk.update(closed=True, end_date=today, last_update=now)
+        stats['elapsed'] = round(time.time() - started, 3)
+        return stats
+
+
 class Request(ReportableModel):
 
     user = models.ForeignKey(settings.AUTH_USER_MODEL)
@@ -33,17 +81,28 @@ class Request(ReportableModel):
 
     last_update = models.DateTimeField(auto_now=True)
 
+    objects = RequestManager()
+
     def get_photo(self):
         """ """
-        from core.models.profile import Profile
-        if Profile.objects.filter(user=self.user).exists():
-            profile = Profile.objects.get(user=self.user)
-            if profile.photo:
-                return profile.photo.url[len(settings.MEDIA_URL):]
+        try:
+            photo = self.user.profile.photo
+        except ObjectDoesNotExist:
+            return ''
+        if photo:
+            return photo.url[len(settings.MEDIA_URL):]
         return ''
 
+    def get_user_is_donor(self):
+        """ Reads the flag selected by objects.feed() when available """
+        if hasattr(self, 'user_is_donor_flag'):
+            return bool(self.user_is_donor_flag)
+        return self.user.profile.is_donor
+
     def get_offers_count(self):
         """  """
+        if hasattr(self, 'offers_total'):
+            return self.offers_total
         from core.models.offer import Offer
         return Offer.objects.filter(request=self).count()
 
@@ -56,4 +115,5 @@ class Request(ReportableModel):
     class Meta:
         verbose_name = _('request')
         verbose_name_plural = _('requests')
+        index_together = [('user', 'created_on'), ('community', 'closed')]
         app_label = 'core'
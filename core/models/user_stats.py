@@ -0,0 +1,165 @@
+from django.conf import settings
+from django.db import models, transaction, IntegrityError
+from django.db.models import Count, F, Q
+from django.utils.translation import ugettext as _
+
+
+class UserStatsManager(models.Manager):
+    """ """
+
+    def get_for_user(self, user_id):
+        """
+        Returns the stats of a user, computing and storing them on first access.
+        The row is inserted before the counters are computed, in the same transaction: increments
+        of concurrent writes wait for its lock and apply after the computed values, instead of
+        skipping a user without stats.
+        Read from the primary: a replica may lag behind the counters, or not have the row yet.
+        """
+        from core.db_router import use_primary
+        with use_primary():
+            return self._get_for_user(user_id)
+
+    def _get_for_user(self, user_id):
+        try:
+            return self.get(user_id=user_id)
+        except self.model.DoesNotExist:
+            pass
+        try:
+            with transaction.atomic():
+                stats = self.create(user_id=user_id)
+                values = self.compute(user_id)
+                values.update(self.compute_manager_flags([user_id]).get(user_id, {}))
+                self.filter(pk=stats.pk).update(**values)
+        except IntegrityError:
+            # Created by a concurrent request
+            return self.get(user_id=user_id)
+        for field, value in values.items():
+            setattr(stats, field, value)
+        return stats
+
+    def compute(self, user_id):
+        """
+        Computes every counter of a single user.
+        """
+        from core.models import Skill, Request, Offer, Message, Meeting, Evaluation, Notification
+        return {
+            'skills_count': Skill.objects.filter(user=user_id).count(),
+            'requests_count': Request.objects.filter(user=user_id).count(),
+            'offers_count': Offer.objects.filter(user=user_id).count(),
+            'messages_count': Message.objects.filter(user=user_id).count(),
+            'meetings_count': Meeting.objects.filter(Q(offer__user=user_id) |
+                                                     Q(offer__request__user=user_id)).count(),
+            'evaluations_by_me_count': Evaluation.objects.filter(offer__request__user=user_id).count(),
+            'evaluations_for_me_count': Evaluation.objects.filter(offer__user=user_id).count(),
+            'unread_notifications_count': Notification.objects.filter(user=user_id, seen=False).count(),
+        }
+
+    def compute_manager_flags(self, user_ids):
+        """
+        Computes, for each user, if he owns or moderates a community bigger than BIG_COMMUNITY_TH.
+        """
+        from core.models import Member
+        flags = dict((user_id, {'owns_big_community': False, 'moderates_big_community': False})
+                     for user_id in user_ids)
+        managed = Member.objects.filter(user__in=user_ids, status='1', role__in=['0', '1'],
+                                        community__accepted_members_count__gt=settings.BIG_COMMUNITY_TH) \
+                                .values_list('user', 'role')
+        for user_id, role in managed:
+            flags[user_id]['owns_big_community' if role == '0' else 'moderates_big_community'] = True
+        return flags
+
+    def increment(self, user_ids, field, delta=1):
+        """
+        Shifts a counter for the given users.
+        Users without stats are skipped, they are computed on first access.
+        """
+        self.filter(user__in=user_ids).update(**{field: F(field) + delta})
+
+    def refresh_manager_flags(self, user_ids):
+        """ """
+        for user_id, values in self.compute_manager_flags(user_ids).items():
+            self.filter(user=user_id).update(**values)
+
+    def rebuild(self, batch_size=500):
+        """
+        Recomputes the stats of every user with grouped queries.
+        Returns the number of rows written.
+        """
+        from django.contrib.auth import get_user_model
+        from core.models import Skill, Request, Offer, Message, Meeting, Evaluation, Notification
+
+        def grouped(queryset, field):
+            return dict((row[field], row['total'])
+                        for row in queryset.values(field).annotate(total=Count('id')).order_by())
+
+        counters = {
+            'skills_count': grouped(Skill.objects.all(), 'user'),
+            'requests_count': grouped(Request.objects.all(), 'user'),
+            'offers_count': grouped(Offer.objects.all(), 'user'),
+            'messages_count': grouped(Message.objects.all(), 'user'),
+            'evaluations_by_me_count': grouped(Evaluation.objects.all(), 'offer__request__user'),
+            'evaluations_for_me_count': grouped(Evaluation.objects.all(), 'offer__user'),
+            'unread_notifications_count': grouped(Notification.objects.filter(seen=False), 'user'),
+        }
+        # A meeting concerns both the offer and the request authors, but must be counted once
+        # when they are the same user.
+        as_helper = grouped(Meeting.objects.all(), 'offer__user')
+        as_requester = grouped(Meeting.objects.all(), 'offer__request__user')
+        as_both = grouped(Meeting.objects.filter(offer__user=F('offer__request__user')), 'offer__user')
+
+        user_ids = list(get_user_model().objects.values_list('id', flat=True))
+        flags = self.compute_manager_flags(user_ids)
+        rows = []
+        for user_id in user_ids:
+            values = dict((field, counters[field].get(user_id, 0)) for field in counters)
+            values['meetings_count'] = as_helper.get(user_id, 0) + as_requester.get(user_id, 0) \
+                - as_both.get(user_id, 0)
+            values.update(flags[user_id])
+            rows.append(self.model(user_id=user_id, **values))
+
+        with transaction.atomic():
+            self.all().delete()
+            self.bulk_create(rows, batch_size=batch_size)
+        return len(rows)
+
+
+class UserStats(models.Model):
+    """
+    Materialized activity counters of a user, used to compute his level.
+    Kept up to date by core.signals.user_stats.
+    """
+
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, related_name='stats')
+
+    skills_count = models.IntegerField(default=0)
+
+    requests_count = models.IntegerField(default=0)
+
+    offers_count = models.IntegerField(default=0)
+
+    messages_count = models.IntegerField(default=0)
+
+    meetings_count = models.IntegerField(default=0)
+
+    evaluations_by_me_count = models.IntegerField(default=0)
+
+    evaluations_for_me_count = models.IntegerField(default=0)
+
+    owns_big_community = models.BooleanField(default=False)
+
+    moderates_big_community = models.BooleanField(default=False)
+
+    # Kept up to date by api.utils.notifier.Notifier and NotificationViewSet
+    unread_notifications_count = models.IntegerField(default=0)
+
+    last_update = models.DateTimeField(auto_now=True)
+
+    objects = UserStatsManager()
+
+    def __str__(self):
+        return str(self.user_id)
+
+    class Meta:
+        verbose_name = _('user stats')
+        verbose_name_plural = _('user stats')
+        app_label = 'core'
@@ -0,0 +1,7 @@
+# Receivers run in import order: member counters must be refreshed
+# before the user stats which read them.
+import core.signals.community
+import core.signals.co_membership
+import core.signals.user_stats
+import core.signals.content_cache
+import core.signals.memberships
@@ -0,0 +1,14 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from core.models import CoMembership, Member
+
+
+# Keeps the core.models.CoMembership visibility index up to date.
+# Requests need no receiver: the index links users, not requests.
+
+@receiver([post_save, post_delete], sender=Member)
+def member_changed(sender, instance, **kwargs):
+    if kwargs.get('raw', False):
+        return
+    CoMembership.objects.refresh_membership(instance.user_id, instance.community_id)
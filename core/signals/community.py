@@ -0,0 +1,31 @@
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from core.models import Community, Member
+
+
+# Keeps Community.accepted_members_count and pending_members_count up to date.
+
+@receiver(pre_save, sender=Member)
+def member_saving(sender, instance, **kwargs):
+    if kwargs.get('raw', False):
+        return
+    former = Member.objects.filter(pk=instance.pk) if instance.pk else Member.objects.none()
+    if transaction.get_connection().in_atomic_block:
+        # Concurrent changes of the member wait for this transaction, and read the status saved here
+        former = former.select_for_update()
+    instance._former_status = former.values_list('status', flat=True).first()
+
+
+@receiver(post_save, sender=Member)
+def member_saved(sender, instance, **kwargs):
+    if kwargs.get('raw', False):
+        return
+    Community.objects.shift_members_count(instance.community_id, getattr(instance, '_former_status', None),
+                                          instance.status)
+
+
+@receiver(post_delete, sender=Member)
+def member_deleted(sender, instance, **kwargs):
+    Community.objects.shift_members_count(instance.community_id, instance.status, None)
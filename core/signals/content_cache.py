@@ -0,0 +1,28 @@
+from django.apps import apps
+from django.db.models.signals import post_save, post_delete
+
+from api.utils import content_cache
+from core.models import Faq, FaqSection
+from core.models.text import Text
+
+
+# Invalidates the cached responses of the FAQ and text endpoints (api.utils.content_cache).
+# Connected to the content models and their subclasses only: the administration saves proxy
+# models (administration.models), and a receiver without sender would disable the fast delete
+# (QuerySet.delete() in one query) of every model.
+# QuerySet.update() sends no signal, content must be changed by saving instances.
+# Within a transaction, the administration invalidates again once committed (administration.admin).
+
+NAMESPACES = ((Faq, 'faq'), (FaqSection, 'faq'), (Text, 'text'))
+
+
+def content_changed(sender, instance, **kwargs):
+    for model, namespace in NAMESPACES:
+        if isinstance(instance, model):
+            content_cache.invalidate(namespace)
+
+
+for _model in apps.get_models():
+    if issubclass(_model, tuple(model for model, namespace in NAMESPACES)):
+        post_save.connect(content_changed, sender=_model)
+        post_delete.connect(content_changed, sender=_model)
@@ -0,0 +1,12 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from api.utils import memberships
+from core.models import Member
+
+
+# Reloads the memberships of the permission checks (api.utils.memberships) after any membership change.
+
+@receiver([post_save, post_delete], sender=Member)
+def membership_changed(sender, instance, **kwargs):
+    memberships.invalidate()
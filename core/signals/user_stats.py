@@ -0,0 +1,80 @@
+from django.core.exceptions import ObjectDoesNotExist
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from core.models import UserStats, Skill, Request, Offer, Message, Meeting, Evaluation, Member
+
+
+# Keeps core.models.UserStats counters up to date.
+# Counters only move on creation and deletion: these objects never change of author.
+
+def _delta(kwargs):
+    if 'created' not in kwargs:
+        return -1
+    return 1 if kwargs['created'] and not kwargs.get('raw', False) else 0
+
+
+@receiver([post_save, post_delete], sender=Skill)
+def skill_changed(sender, instance, **kwargs):
+    delta = _delta(kwargs)
+    if delta:
+        UserStats.objects.increment([instance.user_id], 'skills_count', delta)
+
+
+@receiver([post_save, post_delete], sender=Request)
+def request_changed(sender, instance, **kwargs):
+    delta = _delta(kwargs)
+    if delta:
+        UserStats.objects.increment([instance.user_id], 'requests_count', delta)
+
+
+@receiver([post_save, post_delete], sender=Offer)
+def offer_changed(sender, instance, **kwargs):
+    delta = _delta(kwargs)
+    if delta:
+        UserStats.objects.increment([instance.user_id], 'offers_count', delta)
+
+
+@receiver([post_save, post_delete], sender=Message)
+def message_changed(sender, instance, **kwargs):
+    delta = _delta(kwargs)
+    if delta:
+        UserStats.objects.increment([instance.user_id], 'messages_count', delta)
+
+
+@receiver([post_save, post_delete], sender=Meeting)
+def meeting_changed(sender, instance, **kwargs):
+    delta = _delta(kwargs)
+    if not delta:
+        return
+    try:
+        users = {instance.offer.user_id, instance.offer.request.user_id}
+    except ObjectDoesNotExist:
+        return
+    UserStats.objects.increment(users, 'meetings_count', delta)
+
+
+@receiver([post_save, post_delete], sender=Evaluation)
+def evaluation_changed(sender, instance, **kwargs):
+    delta = _delta(kwargs)
+    if not delta:
+        return
+    try:
+        helper, requester = instance.offer.user_id, instance.offer.request.user_id
+    except ObjectDoesNotExist:
+        return
+    UserStats.objects.increment([helper], 'evaluations_for_me_count', delta)
+    UserStats.objects.increment([requester], 'evaluations_by_me_count', delta)
+
+
+@receiver([post_save, post_delete], sender=Member)
+def member_changed(sender, instance, **kwargs):
+    """
+    A membership change may move the community across BIG_COMMUNITY_TH,
+    so its owner and moderators are refreshed as well.
+    """
+    if kwargs.get('raw', False):
+        return
+    managers = Member.objects.filter(community=instance.community_id, status='1', role__in=['0', '1']) \
+                             .values_list('user', flat=True)
+    UserStats.objects.refresh_manager_flags(set(managers) | {instance.user_id})
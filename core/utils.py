@@ -1,4 +1,5 @@
-import random
+import hashlib
+import os
 import string
 from rest_framework_jwt import utils
 
@@ -18,4 +19,14 @@ def get_client_ip(request):
 
 
 def gen_temporary_token(size=64, chars=string.ascii_lowercase + string.digits):
-    return ''.join(random.choice(chars) for _ in range(size))
+    """ Random token drawn from os.urandom (bytes past the last whole alphabet are dropped: no bias) """
+    limit = 256 - 256 % len(chars)
+    token = []
+    while len(token) < size:
+        token.extend(chars[byte % len(chars)] for byte in os.urandom(size) if byte < limit)
+    return ''.join(token[:size])
+
+
+def hash_token(token):
+    """ Fixed-length digest of a temporary token, stored instead of the token """
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
@@ -0,0 +1,85 @@
+"""
+Gunicorn configuration of smartribe.wsgi:
+
+    gunicorn -c smartribe/gunicorn_conf.py smartribe.wsgi:application
+
+GUNICORN_PROFILE selects the worker model:
+    - sync: one request at a time per process
+    - threaded (default): GUNICORN_THREADS requests at a time per process (gthread workers),
+      for endpoints waiting on I/O (SMTP, media, database, notification long polling)
+    - gevent: GUNICORN_CONNECTIONS greenlets per process, requires gevent (pip3 install gevent)
+
+Notification long polling (/notifications/0/wait/) holds a thread, or a greenlet, for up to
+NOTIFICATION_WAIT_TIMEOUT seconds, but not a database connection: it is closed, or given back to the
+pool, while waiting. Waiters are capped per process (NOTIFICATION_MAX_WAITERS, half of the threads or
+greenlets by default, none with the sync profile) so that they never take every thread: once the cap
+is reached, further polls return at once, and clients poll again later.
+
+Other variables: GUNICORN_BIND, GUNICORN_WORKERS, GUNICORN_TIMEOUT, and DB_POOL_SIZE (see the settings).
+"""
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+
+PROFILES = ('sync', 'threaded', 'gevent')
+
+
+def worker_settings(profile, environ):
+    """ Gunicorn settings of a profile """
+    if profile not in PROFILES:
+        raise ValueError('Unknown GUNICORN_PROFILE "%s", expected one of %s' % (profile, ', '.join(PROFILES)))
+    settings = {
+        'bind': environ.get('GUNICORN_BIND', '0.0.0.0:7777'),
+        'workers': int(environ.get('GUNICORN_WORKERS', 2)),
+        # Longer than NOTIFICATION_WAIT_TIMEOUT
+        'timeout': int(environ.get('GUNICORN_TIMEOUT', 60)),
+        'worker_class': 'sync',
+    }
+    if profile == 'threaded':
+        # Full path: the 'gthread' alias is only registered from gunicorn 19.2
+        settings['worker_class'] = 'gunicorn.workers.gthread.ThreadWorker'
+        settings['threads'] = int(environ.get('GUNICORN_THREADS', 8))
+    elif profile == 'gevent':
+        try:
+            import gevent
+        except ImportError:
+            raise ImproperlyConfigured('The gevent profile requires gevent: pip3 install gevent')
+        settings['worker_class'] = 'gevent'
+        settings['worker_connections'] = int(environ.get('GUNICORN_CONNECTIONS', 100))
+    return settings
+
+
+def database_connection_age(profile):
+    """
+    Threads of gthread workers are reused: their database connections can be kept (CONN_MAX_AGE).
+    Greenlets are not, a kept connection would never be reused nor closed.
+    """
+    return 0 if profile == 'gevent' else 60
+
+
+def notification_waiters(settings):
+    """ Notification long polls held open at once per process, from the worker settings """
+    if 'threads' in settings:
+        return settings['threads'] // 2
+    if 'worker_connections' in settings:
+        return settings['worker_connections'] // 2
+    # A sync worker would not serve any other request while waiting
+    return 0
+
+
+def post_worker_init(worker):
+    """ Opens the pooled database connections of the worker before its first request """
+    from core.db_pool import warm_up
+    try:
+        warm_up()
+    except Exception:
+        # Connections are then opened by the first requests
+        worker.log.exception('Database connections warm up failed')
+
+
+_profile = os.environ.get('GUNICORN_PROFILE', 'threaded')
+globals().update(worker_settings(_profile, os.environ))
+# Read by the settings (CONN_MAX_AGE), loaded after this file by the workers
+os.environ.setdefault('DB_CONN_MAX_AGE', str(database_connection_age(_profile)))
+os.environ.setdefault('NOTIFICATION_MAX_WAITERS', str(notification_waiters(globals())))
@@ -57,7 +57,7 @@ AUTH_USER_MODEL='core.CustomUser'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_jwt.authentication.JSONWebTokenAuthentication',
+        'api.authenticate.CachedJSONWebTokenAuthentication',
         #'rest_framework.authentication.SessionAuthentication',
         #'rest_framework.authentication.BasicAuthentication',
    ),
@@ -84,6 +84,8 @@ MIDDLEWARE_CLASSES = (
     'django.contrib.auth.middleware.SessionAuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'api.utils.audit.AuditLogMiddleware',
+    'core.db_router.ReplicaRoutingMiddleware',
 )
 
 SESSION_SERIALIZER = 'django.contrib.sessions.serializers.PickleSerializer'
@@ -105,6 +107,12 @@ DATABASES = {
     }
 }
 
+# Read replicas (core.db_router) : aliases of DATABASES the reads of GET and HEAD requests are sent to,
+# and time (seconds) the reads of a client stay on 'default' after it wrote, longer than the replication lag
+DATABASE_ROUTERS = ['core.db_router.ReplicaRouter']
+DATABASE_REPLICAS = []
+DATABASE_REPLICA_STICKY_SECONDS = 5
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/dev/topics/i18n/
@@ -153,6 +161,10 @@ JWT_AUTH = {
     'JWT_EXPIRATION_DELTA': datetime.timedelta(seconds=3600*24*7)
 }
 
+# In-process cache of authenticated users, keyed by token (seconds, 0 disables it)
+JWT_USER_CACHE_TTL = 0
+JWT_USER_CACHE_SIZE = 1000
+
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 EMAIL_HOST = 'mail.gandi.net'
 EMAIL_PORT = 587
@@ -160,13 +172,76 @@ EMAIL_HOST_USER = 'noreply@smartribe.fr'
 EMAIL_HOST_PASSWORD = 'CrodPiedPomGudruWok0'
 EMAIL_USE_TLS = True
 
+# Asynchronous mails (api.utils.asyncronous_mail), per process :
+# worker threads, queue size, mails sent per connection round, retries with backoff (seconds),
+# time a producer waits for room in the queue before sending himself, idle time before closing SMTP connections
+MAIL_DISPATCHER = {
+    'WORKERS': 2,
+    'QUEUE_SIZE': 500,
+    'BATCH_SIZE': 20,
+    'MAX_RETRIES': 3,
+    'RETRY_BACKOFF': 1,
+    'ENQUEUE_TIMEOUT': 5,
+    'IDLE_TIMEOUT': 30,
+}
+
+# Store mails in the outbox (core.models.OutgoingMail), committed with the request transaction,
+# instead of sending them from the request ; they are sent by the drain_outbox command
+MAIL_OUTBOX = False
+
+# Audit log (api.utils.audit) : entries of a request are written at its end, in one query,
+# or from a background thread of each process, every FLUSH_INTERVAL seconds or BATCH_SIZE entries
+AUDIT_LOG = {
+    'BACKGROUND': False,
+    'FLUSH_INTERVAL': 5,
+    'BATCH_SIZE': 100,
+}
+
+# Cached responses of the FAQ and text endpoints (api.utils.content_cache), invalidated on change (seconds,
+# 0 disables the cache). Other processes only see the invalidation through a shared cache (CACHES).
+CONTENT_CACHE_TIMEOUT = 300
+
+# Maximum time (seconds) a request to /notifications/0/wait/ is held open
+NOTIFICATION_WAIT_TIMEOUT = 25
+
+# Requests to /notifications/0/wait/ held open at once per process, each holding a worker thread: further
+# ones return at once. Set from the worker model by smartribe/gunicorn_conf.py
+NOTIFICATION_MAX_WAITERS = int(os.environ.get('NOTIFICATION_MAX_WAITERS', 4))
+
 MEDIA_ROOT = 'media/'
 
 MEDIA_URL = '/media/'
 
+# Media caching (seconds), for URLs without the content hash ('v' parameter, the ETag value)
+MEDIA_CACHE_MAX_AGE = 3600
+
+# Media bodies sent by the web server in front of gunicorn : 'X-Accel-Redirect' (nginx, with an
+# internal location at MEDIA_SENDFILE_PREFIX aliased to MEDIA_ROOT) or 'X-Sendfile' (Apache, lighttpd).
+# None : streamed by the worker.
+MEDIA_SENDFILE = None
+MEDIA_SENDFILE_PREFIX = '/protected-media/'
+
+# Resized variants of uploaded images, served at /media/variants/<name>/<path> : (width, height),
+# cropped to fill both, or scaled to the width when height is None. Generated on first request.
+MEDIA_VARIANTS = {
+    'avatar_64': (64, 64),
+    'avatar_128': (128, 128),
+    'banner_640': (640, None),
+    'banner_1280': (1280, None),
+}
+
+# Largest original (width * height) from which variants are generated, larger ones are not found
+MEDIA_VARIANT_MAX_PIXELS = 40000000
+
+# Largest search radius (km) of the GPS searches (list_communities_around_me)
+GEO_MAX_RADIUS = 500
+
 # Password recovery token validity (hour) :
 PRT_VALIDITY = 1
 
+# Registration activation token validity (hour) :
+ACTIVATION_TOKEN_VALIDITY = 24 * 30
+
 # Warning threshold for inappropriate content :
 INAP_LIMIT = 5
 
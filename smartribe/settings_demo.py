@@ -1,3 +1,5 @@
+import os
+
 from smartribe.settings import *
 
 
@@ -11,9 +13,34 @@ DATABASES = {
         'USER': 'smartribe',
         'PASSWORD': 'password',
         'HOST': '10.129.235.136',
+        # Connections kept across requests (seconds), set by smartribe/gunicorn_conf.py per worker model
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
     }
 }
 
+# With DB_POOL_SIZE, connections are shared by the threads of a process in a pool (core.db_pool)
+# of DB_POOL_SIZE connections at most, and given back at the end of each request
+if os.environ.get('DB_POOL_SIZE'):
+    DATABASES['default'].update({
+        'ENGINE': 'core.db_pool.mysql',
+        'CONN_MAX_AGE': 0,
+        'POOL': {
+            'MAX_SIZE': int(os.environ['DB_POOL_SIZE']),
+            'MIN_SIZE': int(os.environ.get('DB_POOL_MIN_SIZE', 1)),
+        },
+    })
+
+# With DB_REPLICA_HOSTS (comma separated), GET requests read from these replicas of 'default' (core.db_router)
+for _index, _host in enumerate(filter(None, os.environ.get('DB_REPLICA_HOSTS', '').split(','))):
+    DATABASES['replica_%d' % _index] = dict(DATABASES['default'], HOST=_host.strip(), TEST={'MIRROR': 'default'})
+DATABASE_REPLICAS = sorted(alias for alias in DATABASES if alias != 'default')
+
+# Authenticated users are kept 30 seconds per worker process
+JWT_USER_CACHE_TTL = 30
+
+# Mails are sent by 'manage.py drain_outbox --loop'
+MAIL_OUTBOX = True
+
 # Allowed IP addresses for server actions
 ALLOWED_IP = ['127.0.0.1', '172.17.42.1', '95.85.39.49']
 
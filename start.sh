@@ -1,5 +1,8 @@
 #!/bin/bash
 
 export DJANGO_SETTINGS_MODULE="smartribe.settings_demo"
+# Worker model (sync, threaded or gevent), see smartribe/gunicorn_conf.py
+export GUNICORN_PROFILE="${GUNICORN_PROFILE:-threaded}"
 python3 manage.py migrate && \
-gunicorn -w 2 -b 0.0.0.0:7777 smartribe.wsgi:application
+(python3 manage.py drain_outbox --loop &) && \
+gunicorn -c smartribe/gunicorn_conf.py smartribe.wsgi:application